@@ -0,0 +1,56 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_vary_headers, quote_etag
+from django.utils.http import http_date
+
+
+class ConditionalGetMixin:
+    """
+    Conditional GET for list and retrieve: answers 304 Not Modified when the
+    client's If-None-Match / If-Modified-Since still match.
+
+    Views provide cheap validators without serializing the resource:
+    get_list_validators() / get_object_validators() return
+    (version, last_modified) or None to skip. version is any string that
+    changes with the representation; last_modified is a datetime and should
+    only be given when it covers every change of the representation.
+    """
+
+    def get_list_validators(self):
+        return None
+
+    def get_object_validators(self):
+        return None
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(self.get_list_validators, super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(self.get_object_validators, super().retrieve, request, *args, **kwargs)
+
+    def conditional_response(self, get_validators, respond, request, *args, **kwargs):
+        try:
+            validators = get_validators()
+        except (TypeError, ValueError):
+            # malformed pk, the regular view answers with 404
+            validators = None
+        if validators is None:
+            return respond(request, *args, **kwargs)
+
+        version, last_modified = validators
+        # The same resource looks different per user (e.g. is_favorite) and per query string
+        etag = quote_etag(hashlib.md5(
+            f"{request.get_full_path()}|{request.user.pk}|{version}".encode()
+        ).hexdigest())
+        last_modified = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = respond(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response["ETag"] = etag
+        if last_modified:
+            response["Last-Modified"] = http_date(last_modified)
+        patch_vary_headers(response, ["Authorization"])
+        return response
@@ -0,0 +1,64 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Selects the export format (?format=ndjson or Accept header). Exports
+    stream their rows themselves, so this only renders error responses.
+    """
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False).encode(self.charset)
+
+
+class CSVRenderer(NDJSONRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+
+EXPORT_RENDERERS = [NDJSONRenderer, CSVRenderer]
+
+
+class EchoBuffer:
+    """File-like object that hands every written csv row straight back."""
+
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+def csv_lines(rows, fieldnames, flatten=None):
+    writer = csv.DictWriter(EchoBuffer(), fieldnames=fieldnames, extrasaction="ignore")
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(flatten(row) if flatten else row)
+
+
+def streaming_export(request, rows, fieldnames, filename, flatten=None):
+    """
+    Streams rows (an iterator of dicts) as NDJSON or CSV, depending on the
+    renderer DRF negotiated. Rows are produced while the response is sent,
+    so the first byte goes out immediately and memory stays flat.
+    """
+    renderer = request.accepted_renderer
+    if renderer.format == "csv":
+        content = csv_lines(rows, fieldnames, flatten)
+    else:
+        content = ndjson_lines(rows)
+    response = StreamingHttpResponse(content, content_type=f"{renderer.media_type}; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{renderer.format}"'
+    return response
@@ -0,0 +1,99 @@
+import mimetypes
+import re
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+from .storage import content_hash, recipe_image_storage
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_range(header, size):
+    """
+    (start, end) of a single "bytes=" range, inclusive. None when the header
+    is absent or not a single byte range (then the whole file is sent),
+    False when it cannot be satisfied.
+    """
+    match = RANGE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        # suffix range: the last n bytes
+        length = int(end)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def read_range(file, start, end):
+    file.seek(start)
+    remaining = end - start + 1
+    try:
+        while remaining > 0:
+            chunk = file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Serves uploaded media. Content-addressed files (named by their sha256)
+    are immutable: they get a strong ETag and a one year Cache-Control.
+    Single byte ranges are answered with 206 Partial Content.
+    """
+    storage = recipe_image_storage()
+    try:
+        if not storage.exists(path):
+            raise Http404
+        size = storage.size(path)
+        modified = int(storage.get_modified_time(path).timestamp())
+    except (SuspiciousFileOperation, OSError):
+        raise Http404
+
+    digest = content_hash(path)
+    etag = quote_etag(digest) if digest else quote_etag(f"{size:x}-{modified:x}")
+    response = get_conditional_response(request, etag=etag, last_modified=modified)
+    if response is None:
+        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        byte_range = parse_range(request.headers.get("Range"), size)
+        if_range = request.headers.get("If-Range")
+        if if_range is not None and if_range.strip() != etag:
+            byte_range = None
+
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+        elif byte_range is None:
+            response = FileResponse(storage.open(path, "rb"), content_type=content_type)
+        else:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                read_range(storage.open(path, "rb"), start, end), status=206, content_type=content_type
+            )
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+            response["Content-Length"] = str(end - start + 1)
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(modified)
+    response["Accept-Ranges"] = "bytes"
+    response["Cache-Control"] = IMMUTABLE if digest else "public, no-cache"
+    return response
@@ -0,0 +1,26 @@
+from rest_framework.pagination import CursorPagination
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the primary key.
+
+    Pages are addressed with an opaque cursor instead of an offset, so every
+    page is an indexed range scan and no COUNT(*) is issued. The page size
+    defaults to REST_FRAMEWORK["PAGE_SIZE"] and can be chosen per request
+    with ?page_size= up to max_page_size.
+
+    Views can page by another key (e.g. a search rank) by implementing
+    get_pagination_ordering(queryset), ending with a unique field so the
+    order is stable.
+    """
+    ordering = "id"
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        get_view_ordering = getattr(view, "get_pagination_ordering", None)
+        ordering = get_view_ordering(queryset) if get_view_ordering else None
+        if ordering:
+            return tuple(ordering)
+        return super().get_ordering(request, queryset, view)
@@ -60,6 +60,9 @@ INSTALLED_APPS = [
     'modules.shoppinglists.shoppinglistitem',
     'modules.shoppinglists.listcollection',
     'modules.cookbook.favorites',
+    'modules.cookbook.pantry',
+    'modules.cookbook.similarity',
+    'modules.cookbook.trending',
     'modules.cookbook.mealplan',
     'modules.cookbook.mealplanitem',
     'corsheaders',
@@ -118,6 +121,29 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Serialized recipes. LocMemCache evicts the least recently used tenth
+    # once MAX_ENTRIES is reached; any other backend can be plugged in here.
+    'recipes': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'recipe-representations',
+        'TIMEOUT': 60 * 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+            'CULL_FREQUENCY': 10,
+        },
+    },
+}
+
+RECIPE_CACHE_ALIAS = 'recipes'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -166,6 +192,33 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+    # Recipe images and their renditions, named by content hash (MEDIA_ROOT / MEDIA_URL)
+    "recipe_images": {
+        "BACKEND": "cookbook_and_shoppinglist.storage.ContentAddressedStorage",
+    },
+}
+
+# Recipe image renditions: "thread" (background worker pool) or "sync"
+RECIPE_IMAGE_PROCESSING = 'thread'
+RECIPE_IMAGE_WORKERS = 2
+
+# Recipe views are counted in memory and written after this many views or seconds
+RECIPE_VIEW_FLUSH_EVENTS = 100
+RECIPE_VIEW_FLUSH_SECONDS = 10
+
+# Map new ingredient names that are near-duplicates of an existing one ("tomatoe") to it
+INGREDIENT_FUZZY_MATCH_ON_WRITE = False
+
+# Rebuilding the in-memory ingredient indexes after changes elsewhere: "thread" (in the background) or "sync"
+INGREDIENT_INDEX_RELOAD = 'thread'
+
 AUTH_USER_MODEL = "custom_user.CustomUser"
 
 CORS_ALLOWED_ORIGINS = [
@@ -189,7 +242,9 @@ SIMPLE_JWT = {
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'cookbook_and_shoppinglist.pagination.IdCursorPagination',
+    'PAGE_SIZE': 50,
 }
 
 AXES_FAILURE_LIMIT = 10                      # Max. Fehlversuche
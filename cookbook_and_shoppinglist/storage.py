@@ -0,0 +1,86 @@
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, storages
+
+CONTENT_HASH = re.compile(r"^[0-9a-f]{64}$")
+
+
+def recipe_image_storage():
+    # A callable keeps the configured backend out of the migrations
+    return storages["recipe_images"]
+
+
+def content_hash(name):
+    """The sha256 a content-addressed file is named after, or None for other names."""
+    stem = posixpath.splitext(posixpath.basename(name))[0]
+    return stem if CONTENT_HASH.match(stem) else None
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores files as <directory>/<ab>/<sha256 of the content><extension>.
+
+    Only the directory and the extension of the requested name are kept, so
+    identical uploads share one file and a name never changes its content,
+    which lets clients cache the files forever. A file is written to a
+    temporary name and renamed into place, so concurrent identical uploads
+    both end up with the one complete file.
+
+    delete() does nothing because other rows may reference the same file;
+    files no row references any more are removed by garbage collection
+    (manage.py collect_recipe_images), which calls purge().
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        content.seek(0)
+
+        directory = posixpath.dirname(name)
+        extension = posixpath.splitext(name)[1].lower()
+        name = posixpath.join(directory, digest[:2], digest + extension)
+        try:
+            # reused: the new modification time keeps it from being collected
+            os.utime(self.path(name))
+            return name
+        except FileNotFoundError:
+            return super().save(name, content, max_length=max_length)
+
+    def get_available_name(self, name, max_length=None):
+        # the name stands for the content, replacing the file changes nothing
+        return name
+
+    def _save(self, name, content):
+        path = self.path(name)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        descriptor, temporary_path = tempfile.mkstemp(dir=directory, prefix=".upload-")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                for chunk in content.chunks():
+                    file.write(chunk)
+            os.chmod(temporary_path, self.file_permissions_mode or 0o644)
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+        return name
+
+    def delete(self, name):
+        pass
+
+    def purge(self, name):
+        """Deletes the file for good; only for callers that know nothing references it."""
+        super().delete(name)
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cookbook_and_shoppinglist.settings')
 
 application = get_wsgi_application()
+
+# Server processes write buffered recipe views even while idle
+from modules.cookbook.recipe.counters import recipe_views  # noqa: E402
+
+recipe_views.start()
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from modules.cookbook.favorites.models import Favorite
+from modules.cookbook.pantry.index import chunks
+from modules.cookbook.recipe.models import Recipe
+
+
+class Command(BaseCommand):
+    help = "Recomputes Recipe.favorite_count from the favorites of every recipe that drifted."
+
+    def handle(self, *args, **options):
+        counts = (
+            Favorite.objects.filter(recipe=OuterRef("pk"))
+            .order_by()
+            .values("recipe")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        actual = Coalesce(Subquery(counts), 0)
+        drifted = list(
+            Recipe.objects.annotate(actual=actual).exclude(favorite_count=F("actual")).values_list("id", flat=True)
+        )
+        for batch in chunks(drifted):
+            Recipe.objects.filter(pk__in=batch).update(favorite_count=actual)
+        self.stdout.write(self.style.SUCCESS(f"Corrected the favorite count of {len(drifted)} recipes."))
@@ -0,0 +1,19 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from modules.cookbook.recipe.models import Recipe
+from .models import Favorite
+
+
+@receiver(post_save, sender=Favorite)
+def count_new_favorite(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Recipe.objects.filter(pk=instance.recipe_id).update(favorite_count=F("favorite_count") + 1)
+
+
+@receiver(post_delete, sender=Favorite)
+def count_removed_favorite(sender, instance, **kwargs):
+    Recipe.objects.filter(pk=instance.recipe_id, favorite_count__gt=0).update(
+        favorite_count=F("favorite_count") - 1
+    )
@@ -1,3 +1,78 @@
-from django.test import TestCase
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from modules.cookbook.favorites.models import Favorite
+from modules.cookbook.recipe.models import Recipe
 
-# Create your tests here.
+User = get_user_model()
+
+
+class FavoriteCountTests(APITestCase):
+    def setUp(self):
+        """
+        Set up two users and three recipes.
+        """
+        self.user = User.objects.create_user(email="fav@example.com", password="testpassword123")
+        self.other_user = User.objects.create_user(email="fav2@example.com", password="testpassword123")
+        self.client.force_authenticate(user=self.user)
+        self.soup, self.salad, self.cake = [
+            Recipe.objects.create(name=name, instructions="...", preparation_time=10, author=self.user)
+            for name in ["Suppe", "Salat", "Kuchen"]
+        ]
+
+    def favorite_count(self, recipe):
+        recipe.refresh_from_db(fields=["favorite_count"])
+        return recipe.favorite_count
+
+    def test_count_follows_favorites(self):
+        """
+        Adding and removing favorites through the API updates the count.
+        """
+        response = self.client.post(reverse("favorites-list"), {"recipe": self.soup.id})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        Favorite.objects.create(user=self.other_user, recipe=self.soup)
+        self.assertEqual(self.favorite_count(self.soup), 2)
+
+        response = self.client.delete(reverse("favorites-detail", kwargs={"pk": response.data["id"]}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.favorite_count(self.soup), 1)
+
+        self.other_user.delete()
+        self.assertEqual(self.favorite_count(self.soup), 0)
+
+    def test_popularity_ordering(self):
+        """
+        ?ordering=-popularity lists the most favorited recipes first, ties by newest.
+        """
+        Favorite.objects.create(user=self.user, recipe=self.salad)
+        Favorite.objects.create(user=self.other_user, recipe=self.salad)
+        Favorite.objects.create(user=self.user, recipe=self.cake)
+
+        response = self.client.get(reverse("recipes-list"), {"ordering": "-popularity"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [recipe["id"] for recipe in response.data["results"]],
+            [self.salad.id, self.cake.id, self.soup.id],
+        )
+        self.assertEqual(response.data["results"][0]["favorite_count"], 2)
+
+        response = self.client.get(reverse("recipes-list"), {"ordering": "-popularity", "view": "card", "page_size": 1})
+        self.assertEqual(response.data["results"][0]["id"], self.salad.id)
+        response = self.client.get(response.data["next"])
+        self.assertEqual(response.data["results"][0]["id"], self.cake.id)
+
+    def test_reconcile_command_repairs_drift(self):
+        """
+        reconcile_favorite_counts rewrites counts that no longer match.
+        """
+        Favorite.objects.create(user=self.user, recipe=self.cake)
+        Recipe.objects.filter(pk=self.cake.pk).update(favorite_count=5)
+        Recipe.objects.filter(pk=self.soup.pk).update(favorite_count=3)
+        out = StringIO()
+        call_command("reconcile_favorite_counts", stdout=out)
+        self.assertIn("Corrected the favorite count of 2 recipes.", out.getvalue())
+        self.assertEqual(self.favorite_count(self.cake), 1)
+        self.assertEqual(self.favorite_count(self.soup), 0)
@@ -1,3 +1,4 @@
+from django.db import transaction
 from rest_framework import status
 from rest_framework import viewsets
 from rest_framework.response import Response
@@ -19,7 +20,13 @@ class FavoritesView(viewsets.ModelViewSet):
         return Favorite.objects.filter(user=user)
     
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        # Recipe.favorite_count is updated in the same transaction (signals.py)
+        with transaction.atomic():
+            serializer.save(user=self.request.user)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
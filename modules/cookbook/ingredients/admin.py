@@ -1,7 +1,39 @@
-from django.contrib import admin
-from .models import Ingredient
+from django.contrib import admin, messages
+from .autocomplete import usage_counts
+from .merge import merge_ingredients
+from .models import Ingredient, IngredientAlias
 
 class IngredientAdmin(admin.ModelAdmin):
     fields = ["id","name"]
+    readonly_fields = ["id"]
+    list_display = ["id", "name", "updated_at"]
+    search_fields = ["name"]
+    actions = ["merge_selected"]
 
-admin.site.register(Ingredient)
\ No newline at end of file
+    @admin.action(description="Merge selected ingredients into the most used one")
+    def merge_selected(self, request, queryset):
+        ids = list(queryset.values_list("id", flat=True))
+        if len(ids) < 2:
+            self.message_user(request, "Select at least two ingredients to merge.", messages.WARNING)
+            return
+        usage = usage_counts()
+        target_id = max(ids, key=lambda ingredient_id: (usage[ingredient_id], -ingredient_id))
+        summary = merge_ingredients(target_id, ids)
+        self.message_user(
+            request,
+            f"Merged {len(summary['merged'])} ingredients into {Ingredient.objects.get(pk=target_id)}: "
+            f"{summary['recipe_lines_moved']} recipe lines and {summary['shopping_list_items_moved']} "
+            f"shopping list items moved, {summary['recipe_lines_combined'] + summary['shopping_list_items_combined']} "
+            f"combined.",
+            messages.SUCCESS,
+        )
+        if summary["shopping_list_items_dropped"]:
+            self.message_user(
+                request,
+                f"{len(summary['shopping_list_items_dropped'])} shopping list items in another unit than the "
+                f"item they were combined with were removed.",
+                messages.WARNING,
+            )
+
+admin.site.register(Ingredient, IngredientAdmin)
+admin.site.register(IngredientAlias)
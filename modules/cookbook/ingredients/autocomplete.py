@@ -0,0 +1,101 @@
+import heapq
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+
+from django.db.models import Count
+
+from modules.cookbook.recipe_ingredients.models import RecipeIngredient
+from modules.shoppinglists.shoppinglistitem.models import ShoppingListItem
+from .catalog import CatalogIndex
+
+# Usage counts change with every recipe and shopping list; they only steer
+# the ranking and are re-read at most this often (seconds).
+USAGE_TTL = 300
+MAX_LIMIT = 50
+# Rankings of prefixes matching more names than this (e.g. single letters)
+# are kept until the next change instead of being recomputed every time.
+MEMO_THRESHOLD = 200
+
+
+def usage_counts():
+    """{ingredient id: number of recipe lines and shopping list items using it}."""
+    usage = Counter()
+    for model in (RecipeIngredient, ShoppingListItem):
+        usage.update(dict(
+            model.objects.order_by().values("ingredient_id").annotate(count=Count("id"))
+            .values_list("ingredient_id", "count")
+        ))
+    return usage
+
+
+class AutocompleteIndex(CatalogIndex):
+    """
+    Ingredient names of this process, sorted for prefix lookups with
+    bisect. Writers build a new list and swap it in, so lookups never lock;
+    reloads and usage refreshes run in the background.
+    """
+    reload_in_background = True
+
+    def clear(self):
+        super().clear()
+        self.entries = []  # sorted [(name, id)]
+        self.names = {}
+        self.usage = Counter()
+        self.usage_loaded_at = 0.0
+        self.memo = {}
+
+    def build(self, names):
+        self.names = names
+        self.entries = sorted((name, ingredient_id) for ingredient_id, name in names.items())
+        self.memo = {}
+
+    def load(self, generation):
+        super().load(generation)
+        self.refresh_usage()
+
+    def update(self, saved, deleted, aliases):
+        names = dict(self.names)
+        entries = list(self.entries)
+        for ingredient_id in {*deleted, *(ingredient_id for ingredient_id, _ in saved)}:
+            name = names.pop(ingredient_id, None)
+            if name is not None:
+                entries.pop(bisect_left(entries, (name, ingredient_id)))
+        for ingredient_id, name in saved:
+            if ingredient_id not in deleted:
+                names[ingredient_id] = name
+                insort(entries, (name, ingredient_id))
+        self.names, self.entries, self.memo = names, entries, {}
+
+    def refresh_usage(self):
+        usage = usage_counts()
+        with self.lock:
+            self.usage = usage
+            self.usage_loaded_at = time.monotonic()
+            self.memo = {}
+
+    def complete(self, prefix, limit=10):
+        """[(id, name)] of the ingredients starting with the (normalized) prefix, most used first."""
+        if not prefix:
+            return []
+        self.ensure_current()
+        if time.monotonic() - self.usage_loaded_at > USAGE_TTL:
+            self.refresh(self.refresh_usage)
+        limit = min(limit, MAX_LIMIT)
+
+        entries, usage, memo = self.entries, self.usage, self.memo
+        ranked = memo.get(prefix)
+        if ranked is None:
+            start = bisect_left(entries, (prefix,))
+            end = bisect_left(entries, (prefix + "\U0010ffff",), start)
+            if end - start <= MEMO_THRESHOLD:
+                matches = sorted(entries[start:end], key=lambda entry: -usage[entry[1]])[:limit]
+                return [(ingredient_id, name) for name, ingredient_id in matches]
+            ranked = heapq.nsmallest(
+                MAX_LIMIT, entries[start:end], key=lambda entry: (-usage[entry[1]], entry[0])
+            )
+            memo[prefix] = ranked
+        return [(ingredient_id, name) for name, ingredient_id in ranked[:limit]]
+
+
+index = AutocompleteIndex()
@@ -0,0 +1,151 @@
+import unicodedata
+from collections import OrderedDict
+
+from django.db import router, transaction
+
+from .catalog import CatalogIndex
+from .models import Ingredient, IngredientAlias
+
+CACHE_SIZE = 10000
+# Singular/plural endings ("tomate"/"tomaten", "champignon"/"champignons");
+# a name only resolves to such a variant if that ingredient exists.
+PLURAL_ENDINGS = ("n", "e", "s", "en", "er", "es")
+# Shorter stems are left alone: "eis" must not become "ei".
+MIN_STEM_LENGTH = 4
+
+
+def normalize_name(name):
+    """NFKC-normalized, lower-cased name with single spaces ("  Crème  Fraîche " -> "crème fraîche")."""
+    return " ".join(unicodedata.normalize("NFKC", name).lower().split())
+
+
+def name_variants(name):
+    """Singular and plural spellings to try for an unknown name, closest first."""
+    variants = set()
+    for ending in PLURAL_ENDINGS:
+        if name.endswith(ending) and len(name) - len(ending) >= MIN_STEM_LENGTH:
+            variants.add(name[:-len(ending)])
+        if len(name) >= MIN_STEM_LENGTH:
+            variants.add(name + ending)
+    return sorted(variants, key=lambda variant: (abs(len(variant) - len(name)), variant))
+
+
+class InterningCache(CatalogIndex):
+    """
+    Bounded LRU of resolved names: {normalized name: (ingredient id,
+    canonical name)}. Filled on first use rather than loaded up front;
+    emptied when another process changes the catalog, and pruned of the
+    affected names when this process does.
+    """
+
+    def clear(self):
+        super().clear()
+        self.entries = OrderedDict()
+
+    def load(self, generation):
+        with self.lock:
+            self.entries = OrderedDict()
+            self.loaded = True
+            self.generation = generation
+
+    def update(self, saved, deleted, aliases):
+        changed_ids = deleted | {ingredient_id for ingredient_id, _ in saved}
+        changed_names = aliases | {name for _, name in saved}
+        for name in [
+            name for name, (ingredient_id, _) in self.entries.items()
+            if name in changed_names or ingredient_id in changed_ids
+        ]:
+            del self.entries[name]
+        self.store({name: (ingredient_id, name) for ingredient_id, name in saved if ingredient_id not in deleted})
+
+    def store(self, resolved):
+        self.entries.update(resolved)
+        for name in resolved:
+            self.entries.move_to_end(name)
+        while len(self.entries) > CACHE_SIZE:
+            self.entries.popitem(last=False)
+
+    def get_many(self, names):
+        self.ensure_current()
+        with self.lock:
+            found = {name: self.entries[name] for name in names if name in self.entries}
+            for name in found:
+                self.entries.move_to_end(name)
+            return found, self.generation
+
+    def discard(self, names):
+        with self.lock:
+            for name in names:
+                self.entries.pop(name, None)
+
+    def put_many(self, resolved, generation):
+        with self.lock:
+            # resolved for an older catalog: do not mix it into the current one
+            if self.loaded and generation == self.generation:
+                self.store(resolved)
+
+
+interned = InterningCache()
+
+
+def resolve_from_db(names):
+    """Exact names, then aliases, then singular/plural variants: {name: (id, canonical name)}."""
+    ids = dict(Ingredient.objects.filter(name__in=names).values_list("name", "id"))
+    found = {name: (ids[name], name) for name in names if name in ids}
+
+    rest = names - found.keys()
+    if rest:
+        for name, ingredient_id, ingredient_name in IngredientAlias.objects.filter(name__in=rest).values_list(
+            "name", "ingredient_id", "ingredient__name"
+        ):
+            found[name] = (ingredient_id, ingredient_name)
+        rest -= found.keys()
+
+    variants = {name: name_variants(name) for name in rest}
+    candidates = {variant for options in variants.values() for variant in options}
+    if candidates:
+        ids = dict(Ingredient.objects.filter(name__in=candidates).values_list("name", "id"))
+        for name, options in variants.items():
+            for variant in options:
+                if variant in ids:
+                    found[name] = (ids[variant], variant)
+                    break
+    return found
+
+
+def lookup(names, verify=False):
+    """
+    The known ingredients among normalized names: {name: (id, canonical
+    name)}. Interned names cost no query; the others are resolved in at
+    most three and interned once the current transaction commits.
+
+    Callers that write references to the ids pass verify=True: interned
+    ids are then checked against the table in one query, so a change
+    another process made since the last generation check cannot leave a
+    dangling foreign key.
+    """
+    names = set(names)
+    found, generation = interned.get_many(names)
+    if verify and found:
+        current = dict(Ingredient.objects.filter(
+            pk__in={ingredient_id for ingredient_id, _ in found.values()}
+        ).values_list("id", "name"))
+        stale = {
+            name for name, (ingredient_id, canonical_name) in found.items()
+            if current.get(ingredient_id) != canonical_name
+        }
+        if stale:
+            interned.discard(stale)
+            found = {name: resolved for name, resolved in found.items() if name not in stale}
+    missing = names - found.keys()
+    if missing:
+        resolved = resolve_from_db(missing)
+        if resolved:
+            transaction.on_commit(lambda: interned.put_many(resolved, generation))
+        found.update(resolved)
+    return found
+
+
+def as_ingredient(ingredient_id, name):
+    """An Ingredient for a resolved name, without loading the row."""
+    return Ingredient.from_db(router.db_for_read(Ingredient), ["id", "name"], [ingredient_id, name])
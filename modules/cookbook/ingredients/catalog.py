@@ -0,0 +1,151 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+
+from .models import CatalogGeneration, Ingredient
+
+# Changes of other processes are noticed within this many seconds: the
+# generation row is read at most once per interval and index.
+GENERATION_CHECK_INTERVAL = 1.0
+
+indexes = []
+
+logger = logging.getLogger(__name__)
+
+
+def current_generation():
+    return CatalogGeneration.objects.filter(pk=1).values_list("value", flat=True).first() or 0
+
+
+def bump_generation():
+    """Counts a change in the current transaction; returns the new generation."""
+    if not CatalogGeneration.objects.filter(pk=1).update(value=F("value") + 1):
+        CatalogGeneration.objects.get_or_create(pk=1)
+        CatalogGeneration.objects.filter(pk=1).update(value=F("value") + 1)
+    return current_generation()
+
+
+class CatalogIndex:
+    """
+    Base for the process-local, in-memory views of the ingredient catalog.
+    Subclasses build their structures from {id: name} in build() and keep
+    them current in update(); loading happens on the first lookup and
+    whenever another process changed an ingredient or alias.
+
+    Only one thread loads at a time. Indexes with reload_in_background
+    keep answering from their current data while a background thread
+    rebuilds them (INGREDIENT_INDEX_RELOAD = "thread").
+    """
+    reload_in_background = False
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.load_lock = threading.Lock()
+        self.refreshing = False
+        self.clear()
+        indexes.append(self)
+
+    def clear(self):
+        self.loaded = False
+        self.generation = None
+        self.checked_at = 0.0
+
+    def build(self, names):
+        raise NotImplementedError
+
+    def update(self, saved, deleted, aliases):
+        """saved [(id, name)], deleted ids and the names of added or removed aliases."""
+        raise NotImplementedError
+
+    def ensure_current(self):
+        now = time.monotonic()
+        if self.loaded and now - self.checked_at < GENERATION_CHECK_INTERVAL:
+            return
+        self.checked_at = now
+        generation = current_generation()
+        if not self.loaded:
+            self.load(generation)
+        elif generation != self.generation:
+            if self.reload_in_background:
+                self.refresh(lambda: self.load(generation))
+            else:
+                self.load(generation)
+
+    def load(self, generation):
+        with self.load_lock:
+            # another thread loaded it meanwhile
+            if self.loaded and self.generation == generation:
+                return
+            names = dict(Ingredient.objects.values_list("id", "name"))
+            with self.lock:
+                self.build(names)
+                self.loaded = True
+                self.generation = generation
+
+    def refresh(self, job):
+        """Runs job in a background thread unless one of this index is still running."""
+        if getattr(settings, "INGREDIENT_INDEX_RELOAD", "thread") == "sync":
+            job()
+            return
+        with self.lock:
+            if self.refreshing:
+                return
+            self.refreshing = True
+        threading.Thread(
+            target=self.run_refresh, args=(job,), name=f"{type(self).__name__}-refresh", daemon=True
+        ).start()
+
+    def run_refresh(self, job):
+        try:
+            job()
+        except Exception:
+            logger.exception("Refreshing the %s failed", type(self).__name__)
+        finally:
+            self.refreshing = False
+            close_old_connections()
+
+    def apply(self, saved, deleted, aliases, generation):
+        with self.lock:
+            if not self.loaded:
+                return
+            self.update(saved, deleted, aliases)
+            if generation == self.generation + 1:
+                self.generation = generation
+            else:
+                # another process changed ingredients too: reload on the next lookup
+                self.checked_at = 0.0
+
+
+def changes_committed(generation, saved=(), deleted=(), aliases=()):
+    """Applies committed changes of this process to all indexes (see CatalogIndex.update())."""
+    for index in indexes:
+        index.apply(saved, set(deleted), set(aliases), generation)
+
+
+def changed(**changes):
+    """Counts the changes in the current transaction and applies them to the indexes once it commits."""
+    generation = bump_generation()
+    transaction.on_commit(lambda: changes_committed(generation, **changes))
+
+
+def ingredients_saved(ingredients):
+    """Adds new or renamed ingredients to the indexes once the transaction commits."""
+    saved = [(ingredient.id, ingredient.name) for ingredient in ingredients]
+    if saved:
+        changed(saved=saved)
+
+
+def ingredients_deleted(ingredient_ids):
+    deleted = set(ingredient_ids)
+    if deleted:
+        changed(deleted=deleted)
+
+
+def aliases_changed(names):
+    names = set(names)
+    if names:
+        changed(aliases=names)
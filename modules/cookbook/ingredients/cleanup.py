@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from . import catalog
+from .models import Ingredient
+
+BATCH_SIZE = 500
+# Ingredients touched more recently may be about to be referenced by a
+# recipe or shopping list that is being saved right now.
+GRACE_PERIOD = timedelta(hours=1)
+# A batch whose delete keeps failing (rows referenced again and again) is
+# given up after this many attempts and left for the next run.
+MAX_ATTEMPTS = 3
+
+
+def unused_ingredients():
+    """Ingredients that no recipe line, shopping list item or other foreign key points to."""
+    queryset = Ingredient.objects.all()
+    for relation in Ingredient._meta.related_objects:
+        related = relation.related_model._base_manager.filter(**{relation.field.name: OuterRef("pk")})
+        queryset = queryset.filter(~Exists(related))
+    return queryset
+
+
+def batch_ids(after_id, batch_size):
+    """The ids of the next batch_size ingredients with an id above after_id."""
+    return list(
+        Ingredient.objects.filter(pk__gt=after_id).order_by("pk").values_list("pk", flat=True)[:batch_size]
+    )
+
+
+@transaction.atomic
+def collect_batch(after_id=0, batch_size=BATCH_SIZE, dry_run=False, now=None):
+    """
+    Looks at the next batch_size ingredients with an id above after_id and
+    deletes the unused ones among them. Each batch is its own short
+    transaction. Returns (scanned, deleted, last id); the scan continues
+    after the last id, which is None once all ingredients were looked at.
+
+    The usage check is part of the DELETE statement itself and nothing is
+    cascaded: an ingredient that got referenced meanwhile is either kept or
+    makes the foreign key check fail the batch, it is never deleted along
+    with the new reference.
+    """
+    cutoff = (now or timezone.now()) - GRACE_PERIOD
+    ids = batch_ids(after_id, batch_size)
+    if not ids:
+        return 0, 0, None
+
+    unused = unused_ingredients().filter(pk__in=ids, updated_at__lt=cutoff)
+    if dry_run:
+        return len(ids), unused.count(), ids[-1]
+
+    unused._raw_delete(unused.db)
+    deleted = set(ids) - set(Ingredient.objects.filter(pk__in=ids).values_list("pk", flat=True))
+    # the raw delete sends no post_delete
+    catalog.ingredients_deleted(deleted)
+    return len(ids), len(deleted), ids[-1]
+
+
+def collect(after_id=0, batch_size=BATCH_SIZE, dry_run=False, now=None):
+    """
+    Runs collect_batch() over all ingredients, yielding (scanned, deleted,
+    last id, skipped) for every batch. A batch that still fails after
+    MAX_ATTEMPTS is skipped: nothing of it is deleted and the scan goes on
+    after its last id.
+    """
+    while True:
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                scanned, deleted, last_id = collect_batch(after_id, batch_size, dry_run, now)
+            except IntegrityError:
+                # a row of the batch got referenced during the delete; the batch
+                # was rolled back and is looked at again, without that row
+                continue
+            skipped = False
+            break
+        else:
+            ids = batch_ids(after_id, batch_size)
+            scanned, deleted, last_id = len(ids), 0, ids[-1] if ids else None
+            skipped = True
+        if last_id is None:
+            return
+        yield scanned, deleted, last_id, skipped
+        after_id = last_id
@@ -0,0 +1,117 @@
+from collections import Counter, defaultdict
+
+from .catalog import CatalogIndex
+
+MAX_LIMIT = 20
+# Near-duplicates mapped on write must be this close and this long
+WRITE_MAX_DISTANCE = 1
+WRITE_MIN_LENGTH = 5
+
+
+def trigrams(name):
+    padded = f"  {name} "
+    return {padded[start:start + 3] for start in range(len(padded) - 2)}
+
+
+def default_max_distance(name):
+    """Typos tolerated for a name: none up to 3 characters, 1 up to 6, then 2."""
+    return max(0, min(2, (len(name) - 1) // 3))
+
+
+def bounded_distance(first, second, bound):
+    """Levenshtein distance of the two strings, or None if it exceeds bound."""
+    if abs(len(first) - len(second)) > bound:
+        return None
+    previous = list(range(len(second) + 1))
+    for row, first_char in enumerate(first, 1):
+        current = [row]
+        for column, second_char in enumerate(second, 1):
+            current.append(min(
+                previous[column] + 1,
+                current[column - 1] + 1,
+                previous[column - 1] + (first_char != second_char),
+            ))
+        if min(current) > bound:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= bound else None
+
+
+class FuzzyIndex(CatalogIndex):
+    """
+    Trigram postings over the ingredient names of this process. A lookup
+    counts shared trigrams to find candidates and verifies them with a
+    bounded edit distance: one edit changes at most three trigrams, so a
+    name within distance k shares all but 3k of the query's trigrams.
+    Reloads run in the background.
+    """
+    reload_in_background = True
+
+    def clear(self):
+        super().clear()
+        self.names = {}
+        self.postings = defaultdict(set)
+
+    def build(self, names):
+        self.names = dict(names)
+        self.postings = defaultdict(set)
+        for ingredient_id, name in names.items():
+            for gram in trigrams(name):
+                self.postings[gram].add(ingredient_id)
+
+    def update(self, saved, deleted, aliases):
+        for ingredient_id in {*deleted, *(ingredient_id for ingredient_id, _ in saved)}:
+            name = self.names.pop(ingredient_id, None)
+            if name is not None:
+                for gram in trigrams(name):
+                    self.postings[gram].discard(ingredient_id)
+        for ingredient_id, name in saved:
+            if ingredient_id not in deleted:
+                self.names[ingredient_id] = name
+                for gram in trigrams(name):
+                    self.postings[gram].add(ingredient_id)
+
+    def search(self, name, limit=5, max_distance=None):
+        """[(id, name, distance)] of the closest ingredient names (normalized query), closest first."""
+        if not name:
+            return []
+        self.ensure_current()
+        if max_distance is None:
+            max_distance = default_max_distance(name)
+        grams = trigrams(name)
+        min_shared = max(1, len(grams) - 3 * max_distance)
+
+        with self.lock:
+            shared = Counter()
+            for gram in grams:
+                shared.update(self.postings.get(gram, ()))
+            candidates = [
+                (ingredient_id, self.names[ingredient_id], count)
+                for ingredient_id, count in shared.items()
+                if count >= min_shared
+            ]
+
+        matches = []
+        for ingredient_id, candidate, count in candidates:
+            distance = bounded_distance(name, candidate, max_distance)
+            if distance is not None:
+                matches.append((distance, -count, candidate, ingredient_id))
+        matches.sort()
+        return [(ingredient_id, candidate, distance) for distance, _, candidate, ingredient_id in matches[:limit]]
+
+    def match(self, name):
+        """
+        (id, name) of the one existing ingredient a new name is a
+        near-duplicate of, or None if there is none or the choice is
+        ambiguous. The index may lag behind other processes, so callers
+        check that the ingredient still has that name.
+        """
+        if len(name) < WRITE_MIN_LENGTH:
+            return None
+        matches = self.search(name, limit=2, max_distance=WRITE_MAX_DISTANCE)
+        if not matches or (len(matches) > 1 and matches[1][2] == matches[0][2]):
+            return None
+        return matches[0][:2]
+
+
+index = FuzzyIndex()
@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from modules.cookbook.ingredients import cleanup
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes ingredients that are no longer used by any recipe or shopping list, in small batches. "
+        "Safe to run periodically (e.g. from cron); an interrupted run can be resumed with --after."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=cleanup.BATCH_SIZE)
+        parser.add_argument("--after", type=int, default=0, help="Only look at ingredients with a higher id.")
+        parser.add_argument("--pause", type=float, default=0, help="Seconds to wait between batches.")
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be deleted.")
+
+    def handle(self, *args, **options):
+        scanned = deleted = 0
+        skipped = []
+        for batch_scanned, batch_deleted, last_id, batch_skipped in cleanup.collect(
+            after_id=options["after"], batch_size=options["batch_size"], dry_run=options["dry_run"]
+        ):
+            scanned += batch_scanned
+            deleted += batch_deleted
+            if batch_skipped:
+                skipped.append(last_id)
+                self.stderr.write(
+                    f"Skipped the batch up to id {last_id} after {cleanup.MAX_ATTEMPTS} failed attempts."
+                )
+            elif options["verbosity"] > 1:
+                self.stdout.write(f"Up to id {last_id}: {batch_deleted} of {batch_scanned} unused.")
+            if options["pause"]:
+                time.sleep(options["pause"])
+
+        verb = "Would delete" if options["dry_run"] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {deleted} of {scanned} ingredients."))
+        if skipped:
+            self.stdout.write(self.style.WARNING(
+                f"Skipped {len(skipped)} batch(es) ending at id {', '.join(map(str, skipped))}; "
+                "run the command again to retry them."
+            ))
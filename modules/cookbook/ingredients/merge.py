@@ -0,0 +1,128 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, Value, When
+
+from modules.cookbook.pantry.index import chunks
+from modules.cookbook.recipe.signals import ingredients_changed
+from modules.cookbook.recipe_ingredients.models import RecipeIngredient
+from modules.shoppinglists.listcollection.signals import touch_lists
+from modules.shoppinglists.shoppinglistitem.models import ShoppingListItem
+from . import catalog
+from .models import Ingredient, IngredientAlias
+
+
+def combine_rows(model, rows, group_key, keeper_key, source_ids):
+    """
+    Folds rows that would collide once the sources share the target's id
+    into a single row per group: the keeper (smallest keeper_key) gets the
+    amounts of the rows in its unit added, the others are deleted. Amounts
+    in another unit cannot be added; those rows are deleted without
+    changing the keeper. Groups without a source row are left alone.
+
+    Returns (number of combined rows, the rows dropped for their unit).
+    """
+    groups = defaultdict(list)
+    for row in rows:
+        groups[group_key(row)].append(row)
+    totals = {}
+    combined = []
+    dropped = []
+    for group in groups.values():
+        if len(group) < 2 or not any(row["ingredient_id"] in source_ids for row in group):
+            continue
+        group.sort(key=keeper_key)
+        keeper, others = group[0], group[1:]
+        same_unit = [row for row in others if row["unit"] == keeper["unit"]]
+        if same_unit:
+            totals[keeper["id"]] = keeper["amount"] + sum(row["amount"] for row in same_unit)
+        combined.extend(row["id"] for row in same_unit)
+        dropped.extend(row for row in others if row["unit"] != keeper["unit"])
+
+    for batch in chunks(combined + [row["id"] for row in dropped]):
+        model.objects.filter(pk__in=batch).delete()
+    for batch in chunks(list(totals.items())):
+        model.objects.filter(pk__in=[pk for pk, _ in batch]).update(amount=Case(
+            *[When(pk=pk, then=Value(total)) for pk, total in batch],
+            output_field=DecimalField(max_digits=10, decimal_places=2),
+        ))
+    return len(combined), dropped
+
+
+@transaction.atomic
+def merge_ingredients(target_id, source_ids):
+    """
+    Merges the source ingredients into the target in one transaction:
+
+    - shopping list items of one list are combined into one item (amounts
+      of the same unit summed, the target's item is kept) because a list
+      holds an ingredient only once; items in another unit than the kept
+      one are removed and listed in the summary;
+    - recipe lines of one recipe with the same unit and note are combined
+      the same way (the first line is kept), other lines are repointed;
+    - aliases move to the target and the source names become aliases, so
+      they keep resolving to it;
+    - the sources are deleted and all derived indexes are updated.
+
+    Rows are rewritten with set-based UPDATEs and DELETEs in batches.
+    Returns a summary of the affected rows.
+    """
+    source_ids = set(source_ids) - {target_id}
+    if not source_ids:
+        raise ValueError("Select at least one ingredient other than the target.")
+    all_ids = source_ids | {target_id}
+    ingredients = Ingredient.objects.select_for_update().in_bulk(all_ids)
+    missing = all_ids - ingredients.keys()
+    if missing:
+        raise ValueError(f"Unknown ingredients: {', '.join(map(str, sorted(missing)))}.")
+
+    items = ShoppingListItem.objects.filter(ingredient_id__in=all_ids)
+    list_ids = set(items.filter(ingredient_id__in=source_ids).values_list("shopping_list_id", flat=True))
+    items_combined, items_dropped = combine_rows(
+        ShoppingListItem,
+        items.filter(shopping_list_id__in=list_ids).values(
+            "id", "ingredient_id", "shopping_list_id", "amount", "unit"
+        ),
+        lambda row: row["shopping_list_id"],
+        lambda row: (row["ingredient_id"] != target_id, row["id"]),
+        source_ids,
+    )
+    items_moved = ShoppingListItem.objects.filter(ingredient_id__in=source_ids).update(ingredient_id=target_id)
+
+    lines = RecipeIngredient.objects.filter(ingredient_id__in=all_ids)
+    recipe_ids = set(lines.filter(ingredient_id__in=source_ids).values_list("recipe_id", flat=True))
+    # the unit is part of the group, so no line is ever dropped
+    lines_combined, _ = combine_rows(
+        RecipeIngredient,
+        lines.filter(recipe_id__in=recipe_ids).values(
+            "id", "ingredient_id", "recipe_id", "position", "amount", "unit", "note"
+        ),
+        lambda row: (row["recipe_id"], row["unit"], row["note"]),
+        lambda row: (row["position"], row["id"]),
+        source_ids,
+    )
+    lines_moved = RecipeIngredient.objects.filter(ingredient_id__in=source_ids).update(ingredient_id=target_id)
+
+    source_names = [ingredients[source_id].name for source_id in sorted(source_ids)]
+    IngredientAlias.objects.filter(ingredient_id__in=source_ids).update(ingredient_id=target_id)
+    Ingredient.objects.filter(pk__in=source_ids).delete()
+    IngredientAlias.objects.bulk_create(
+        [IngredientAlias(name=name, ingredient_id=target_id) for name in source_names], ignore_conflicts=True
+    )
+    # bulk writes send no signals
+    catalog.aliases_changed(source_names)
+    touch_lists(list_ids)
+    ingredients_changed(recipe_ids)
+
+    return {
+        "target": target_id,
+        "merged": sorted(source_ids),
+        "recipe_lines_moved": lines_moved,
+        "recipe_lines_combined": lines_combined,
+        "shopping_list_items_moved": items_moved,
+        "shopping_list_items_combined": items_combined,
+        "shopping_list_items_dropped": [
+            {"id": row["id"], "shopping_list": row["shopping_list_id"], "amount": row["amount"], "unit": row["unit"]}
+            for row in items_dropped
+        ],
+    }
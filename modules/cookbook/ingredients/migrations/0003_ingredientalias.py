@@ -0,0 +1,25 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingredients', '0002_ingredient_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngredientAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='ingredients.ingredient')),
+            ],
+            options={
+                'verbose_name_plural': 'ingredient aliases',
+            },
+        ),
+    ]
@@ -1,13 +1,53 @@
+from django.core.exceptions import ValidationError
 from django.db import models
 
 class Ingredient(models.Model):
     name = models.CharField(max_length=100, unique=True, blank=False, null=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def save(self, *args, **kwargs):
-        self.name = self.name.strip().lower()
+        from .canonical import normalize_name
+        self.name = normalize_name(self.name)
         if not self.name:
             raise ValueError("Ingredient name cannot be empty")
         super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name.capitalize()
+
+
+class IngredientAlias(models.Model):
+    """Another name for an ingredient ("paradeiser" for "tomate"); resolves to it everywhere."""
+    name = models.CharField(max_length=100, unique=True)
+    ingredient = models.ForeignKey(Ingredient, on_delete=models.CASCADE, related_name="aliases")
+
+    class Meta:
+        verbose_name_plural = "ingredient aliases"
+
+    def clean(self):
+        from .canonical import normalize_name
+        self.name = normalize_name(self.name)
+        if Ingredient.objects.filter(name=self.name).exists():
+            raise ValidationError({"name": "An ingredient with this name already exists."})
+
+    def save(self, *args, **kwargs):
+        from .canonical import normalize_name
+        self.name = normalize_name(self.name)
+        if not self.name:
+            raise ValueError("Alias name cannot be empty")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.name.capitalize()} → {self.ingredient}"
+
+
+class CatalogGeneration(models.Model):
+    """
+    Single row counting changes to ingredients and aliases, bumped in the
+    transaction that makes them. Processes compare it with the generation
+    their in-memory indexes were built for (see catalog.py).
+    """
+    value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Generation {self.value}"
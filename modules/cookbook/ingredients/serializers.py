@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Ingredient
+from .utils import normalize_name
 
 class IngredientSerializer(serializers.ModelSerializer):
     # name = serializers.SerializerMethodField()
@@ -9,9 +10,14 @@ class IngredientSerializer(serializers.ModelSerializer):
         fields = ['id', 'name']
 
     def validate_name(self, value):
-        return value.strip().lower() 
+        return normalize_name(value)
     
     def to_representation(self, instance):
         representation = super().to_representation(instance)  # Standard-Daten abrufen
         representation['name'] = instance.name.capitalize()  # Name mit Großbuchstaben
-        return representation
\ No newline at end of file
+        return representation
+
+
+class IngredientMergeSerializer(serializers.Serializer):
+    target = serializers.IntegerField()
+    sources = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=1000)
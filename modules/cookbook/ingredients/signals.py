@@ -0,0 +1,33 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import catalog
+from .models import Ingredient, IngredientAlias
+
+
+@receiver(post_save, sender=Ingredient)
+def saved_ingredient(sender, instance, raw=False, **kwargs):
+    if not raw:
+        catalog.ingredients_saved([instance])
+
+
+@receiver(post_delete, sender=Ingredient)
+def deleted_ingredient(sender, instance, **kwargs):
+    catalog.ingredients_deleted([instance.pk])
+
+
+@receiver(pre_save, sender=IngredientAlias)
+def remember_alias_name(sender, instance, raw=False, **kwargs):
+    # a renamed alias must stop resolving under its old name as well
+    if not raw and instance.pk is not None:
+        instance._previous_name = (
+            IngredientAlias.objects.filter(pk=instance.pk).values_list("name", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=IngredientAlias)
+@receiver(post_delete, sender=IngredientAlias)
+def changed_alias(sender, instance, raw=False, **kwargs):
+    if not raw:
+        names = [instance.name, getattr(instance, "_previous_name", None)]
+        catalog.aliases_changed([name for name in names if name])
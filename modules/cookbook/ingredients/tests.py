@@ -1,7 +1,22 @@
-from django.test import TestCase
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
-from modules.cookbook.ingredients.models import Ingredient
+from modules.cookbook.ingredients import autocomplete, canonical, catalog, cleanup, fuzzy
+from modules.cookbook.ingredients.merge import merge_ingredients
+from modules.cookbook.ingredients.utils import get_or_create_ingredients
+from modules.cookbook.ingredients.models import Ingredient, IngredientAlias
+from modules.cookbook.recipe.models import Recipe
+from modules.cookbook.recipe_ingredients.models import RecipeIngredient
+from modules.shoppinglists.listcollection.models import ListCollection
+from modules.shoppinglists.shoppinglistitem.models import ShoppingListItem
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
@@ -69,9 +84,9 @@ class IngredientAPITestCase(APITestCase):
         """
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)  # Erwartet 2 Zutaten
-        self.assertEqual(response.data[0]["name"], "Mehl")  # Großbuchstabe!
-        self.assertEqual(response.data[1]["name"], "Brot")
+        self.assertEqual(len(response.data["results"]), 2)  # Erwartet 2 Zutaten
+        self.assertEqual(response.data["results"][0]["name"], "Mehl")  # Großbuchstabe!
+        self.assertEqual(response.data["results"][1]["name"], "Brot")
 
     def test_create_ingredient_success(self):
         """
@@ -125,4 +140,616 @@ class IngredientAPITestCase(APITestCase):
         url = reverse("ingredients-detail", kwargs={"pk": self.ingredient1.id})
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
-        self.assertFalse(Ingredient.objects.filter(id=self.ingredient1.id).exists())
\ No newline at end of file
+        self.assertFalse(Ingredient.objects.filter(id=self.ingredient1.id).exists())
+
+    def test_ingredient_list_is_cursor_paginated(self):
+        """
+        Test that the list is split into pages by cursor without a total count.
+        """
+        Ingredient.objects.create(name="zucker")
+        response = self.client.get(self.url, {"page_size": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", response.data)
+        self.assertEqual([item["name"] for item in response.data["results"]], ["Mehl", "Brot"])
+        self.assertIsNotNone(response.data["next"])
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual([item["name"] for item in response.data["results"]], ["Zucker"])
+        self.assertIsNone(response.data["next"])
+
+
+class IngredientConditionalGetTestCase(APITestCase):
+    def setUp(self):
+        """
+        Set up an authenticated user and one ingredient.
+        """
+        self.user1 = User.objects.create_user(email="etag@example.com", password="testpassword123")
+        self.client.force_authenticate(user=self.user1)
+        self.ingredient = Ingredient.objects.create(name="mehl")
+        self.url = reverse("ingredients-list")
+        self.detail_url = reverse("ingredients-detail", kwargs={"pk": self.ingredient.id})
+
+    def test_list_returns_304_for_matching_etag(self):
+        """
+        Test that the ingredient list answers 304 as long as the catalog is unchanged.
+        """
+        response = self.client.get(self.url)
+        etag = response["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Ingredient.objects.create(name="zucker")
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_list_etag_changes_on_delete(self):
+        """
+        Test that deleting an ingredient invalidates the list ETag.
+        """
+        Ingredient.objects.create(name="zucker")
+        etag = self.client.get(self.url)["ETag"]
+        Ingredient.objects.get(name="zucker").delete()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_detail_supports_if_modified_since(self):
+        """
+        Test that the detail endpoint answers If-Modified-Since with 304 until the ingredient changes.
+        """
+        response = self.client.get(self.detail_url)
+        last_modified = response["Last-Modified"]
+        response = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Ingredient.objects.filter(pk=self.ingredient.pk).update(updated_at=timezone.now() + timedelta(seconds=5))
+        response = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_unknown_ingredient_still_returns_404(self):
+        """
+        Test that a missing ingredient is not answered from the validators.
+        """
+        response = self.client.get(reverse("ingredients-detail", kwargs={"pk": 999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class UnusedIngredientCollectionTestCase(TestCase):
+    def setUp(self):
+        """
+        Set up ingredients used by a recipe, by a shopping list and by nothing, all past the grace period.
+        """
+        user = User.objects.create_user(email="cleanup@example.com", password="password")
+        recipe = Recipe.objects.create(name="Brot", instructions="Backen", preparation_time=60, author=user)
+        shopping_list = ListCollection.objects.create(name="Einkauf", author=user)
+        self.flour = Ingredient.objects.create(name="mehl")
+        self.milk = Ingredient.objects.create(name="milch")
+        self.unused = [Ingredient.objects.create(name=f"rest {index}") for index in range(5)]
+        RecipeIngredient.objects.create(recipe=recipe, ingredient=self.flour, amount=500, unit="g")
+        ShoppingListItem.objects.create(ingredient=self.milk, amount=1, unit="l", shopping_list=shopping_list)
+        Ingredient.objects.update(updated_at=timezone.now() - cleanup.GRACE_PERIOD * 2)
+
+    def remaining(self):
+        return set(Ingredient.objects.values_list("name", flat=True))
+
+    def test_deletes_only_unused_ingredients_in_batches(self):
+        """
+        Every batch is reported; ingredients referenced anywhere are kept.
+        """
+        batches = list(cleanup.collect(batch_size=2))
+        self.assertEqual(len(batches), 4)
+        self.assertEqual(sum(deleted for _, deleted, _, _ in batches), 5)
+        self.assertFalse(any(skipped for *_, skipped in batches))
+        self.assertEqual(self.remaining(), {"mehl", "milch"})
+
+    def test_recently_touched_ingredients_are_kept(self):
+        """
+        An ingredient inside the grace period may be about to be used and is not deleted.
+        """
+        fresh = Ingredient.objects.create(name="hefe")
+        list(cleanup.collect())
+        self.assertIn(fresh.name, self.remaining())
+
+    def test_scan_resumes_after_an_id(self):
+        """
+        Only ingredients with a higher id than the given one are looked at.
+        """
+        list(cleanup.collect(after_id=self.unused[2].id))
+        self.assertEqual(self.remaining(), {"mehl", "milch", "rest 0", "rest 1", "rest 2"})
+
+    def test_command_dry_run_reports_without_deleting(self):
+        """
+        The dry run reports what would go; the real run deletes it.
+        """
+        out = StringIO()
+        call_command("collect_unused_ingredients", "--dry-run", stdout=out)
+        self.assertIn("Would delete 5 of 7 ingredients.", out.getvalue())
+        self.assertEqual(Ingredient.objects.count(), 7)
+
+        out = StringIO()
+        call_command("collect_unused_ingredients", "--batch-size", "3", stdout=out)
+        self.assertIn("Deleted 5 of 7 ingredients.", out.getvalue())
+        self.assertEqual(self.remaining(), {"mehl", "milch"})
+
+    def test_a_failing_batch_is_skipped_after_a_few_attempts(self):
+        """
+        A batch whose delete keeps failing is tried MAX_ATTEMPTS times, reported as skipped and passed over.
+        """
+        collect_batch = cleanup.collect_batch
+        attempts = []
+
+        def failing_first_batch(after_id, *args):
+            if after_id == 0:
+                attempts.append(after_id)
+                raise IntegrityError("FOREIGN KEY constraint failed")
+            return collect_batch(after_id, *args)
+
+        with mock.patch.object(cleanup, "collect_batch", side_effect=failing_first_batch):
+            batches = list(cleanup.collect(batch_size=3))
+        self.assertEqual(len(attempts), cleanup.MAX_ATTEMPTS)
+        self.assertEqual(batches[0], (3, 0, self.unused[0].id, True))
+        self.assertEqual([skipped for *_, skipped in batches[1:]], [False, False])
+        self.assertEqual(self.remaining(), {"mehl", "milch", "rest 0"})
+
+    def test_command_reports_skipped_batches(self):
+        """
+        The command names the batches it had to skip.
+        """
+        out, err = StringIO(), StringIO()
+        with mock.patch.object(cleanup, "collect_batch", side_effect=IntegrityError):
+            call_command("collect_unused_ingredients", "--batch-size", "5", stdout=out, stderr=err)
+        self.assertIn("Deleted 0 of 7 ingredients.", out.getvalue())
+        self.assertIn(f"Skipped 2 batch(es) ending at id {self.unused[2].id}, {self.unused[4].id}", out.getvalue())
+        self.assertIn(f"Skipped the batch up to id {self.unused[2].id}", err.getvalue())
+        self.assertEqual(Ingredient.objects.count(), 7)
+
+    def test_usage_is_checked_by_the_delete_itself(self):
+        """
+        One non-cascading DELETE per batch carries the usage check; the catalog forgets the deleted names.
+        """
+        autocomplete.index.clear()
+        autocomplete.index.ensure_current()
+        with CaptureQueriesContext(connection) as context, self.captureOnCommitCallbacks(execute=True):
+            list(cleanup.collect())
+        deletes = [query["sql"] for query in context.captured_queries if query["sql"].startswith("DELETE")]
+        self.assertEqual(len(deletes), 1)
+        self.assertIn("NOT EXISTS", deletes[0])
+        self.assertEqual(self.remaining(), {"mehl", "milch"})
+        self.assertEqual(autocomplete.index.complete("rest"), [])
+
+
+@override_settings(INGREDIENT_INDEX_RELOAD="sync")
+class IngredientAutocompleteTestCase(APITestCase):
+    def setUp(self):
+        """
+        Set up ingredients used by different numbers of recipe lines and shopping list items.
+        """
+        autocomplete.index.clear()
+        self.user = User.objects.create_user(email="autocomplete@example.com", password="password")
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("ingredients-autocomplete")
+
+        recipe = Recipe.objects.create(name="Suppe", instructions="Kochen", preparation_time=30, author=self.user)
+        shopping_list = ListCollection.objects.create(name="Einkauf", author=self.user)
+        self.tomato = Ingredient.objects.create(name="tomate")
+        self.paste = Ingredient.objects.create(name="tomatenmark")
+        self.tofu = Ingredient.objects.create(name="tofu")
+        Ingredient.objects.create(name="zucker")
+        for position, ingredient in enumerate([self.tofu, self.tofu, self.paste]):
+            RecipeIngredient.objects.create(recipe=recipe, ingredient=ingredient, position=position, amount=1, unit="g")
+        ShoppingListItem.objects.create(ingredient=self.tofu, amount=1, unit="Packung", shopping_list=shopping_list)
+
+    def complete(self, query, **params):
+        response = self.client.get(self.url, {"q": query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item["name"] for item in response.data]
+
+    def test_prefix_matches_are_ranked_by_usage(self):
+        """
+        Matches are ordered by recipe and shopping list usage, then by name.
+        """
+        self.assertEqual(self.complete(" TO"), ["Tofu", "Tomatenmark", "Tomate"])
+        self.assertEqual(self.complete("tom"), ["Tomatenmark", "Tomate"])
+        self.assertEqual(self.complete("to", limit=1), ["Tofu"])
+        self.assertEqual(self.complete("x"), [])
+        self.assertEqual(self.complete(""), [])
+
+    def test_warm_lookups_need_no_queries(self):
+        """
+        Once loaded, the index answers from memory.
+        """
+        self.complete("to")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.complete("zu"), ["Zucker"])
+
+    def test_changes_are_applied_incrementally(self):
+        """
+        Created, renamed, bulk-created and deleted ingredients show up without reloading the index.
+        """
+        self.complete("to")
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.create(name="tortilla")
+            self.tomato.name = "paradeiser"
+            self.tomato.save()
+            get_or_create_ingredients(["Topinambur"])
+            self.tofu.delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.complete("to"), ["Tomatenmark", "Topinambur", "Tortilla"])
+            self.assertEqual(self.complete("par"), ["Paradeiser"])
+
+    def test_changes_from_other_processes_reload_the_index(self):
+        """
+        A generation bumped elsewhere makes the next check rebuild the index from the database.
+        """
+        self.complete("to")
+        Ingredient.objects.filter(pk=self.tofu.pk).update(name="seitan")
+        catalog.bump_generation()
+        self.assertEqual(self.complete("to"), ["Tofu", "Tomatenmark", "Tomate"])
+        with mock.patch.object(catalog, "GENERATION_CHECK_INTERVAL", 0):
+            self.assertEqual(self.complete("to"), ["Tomatenmark", "Tomate"])
+
+    def test_stale_index_is_served_while_it_reloads(self):
+        """
+        Lookups keep answering from the current names while the reload runs; only one reload runs at a time.
+        """
+        self.complete("to")
+        Ingredient.objects.filter(pk=self.tofu.pk).update(name="seitan")
+        catalog.bump_generation()
+        with mock.patch.object(catalog, "GENERATION_CHECK_INTERVAL", 0), \
+                mock.patch.object(autocomplete.index, "refresh") as refresh:
+            self.assertEqual(self.complete("to"), ["Tofu", "Tomatenmark", "Tomate"])
+        reload = refresh.call_args.args[0]
+        reload()
+        self.assertEqual(self.complete("to"), ["Tomatenmark", "Tomate"])
+
+        started, release = threading.Event(), threading.Event()
+        jobs = []
+
+        def job():
+            jobs.append(1)
+            started.set()
+            release.wait(5)
+
+        with override_settings(INGREDIENT_INDEX_RELOAD="thread"):
+            autocomplete.index.refresh(job)
+            started.wait(5)
+            autocomplete.index.refresh(job)
+            release.set()
+        for thread in threading.enumerate():
+            if thread.name == "AutocompleteIndex-refresh":
+                thread.join(5)
+        self.assertEqual(jobs, [1])
+        self.assertFalse(autocomplete.index.refreshing)
+
+    def test_invalid_limit(self):
+        """
+        A limit that is not a number is rejected.
+        """
+        response = self.client.get(self.url, {"q": "to", "limit": "viele"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(INGREDIENT_INDEX_RELOAD="sync")
+class FuzzyIngredientLookupTestCase(APITestCase):
+    def setUp(self):
+        """
+        Set up a small catalog with similar names.
+        """
+        fuzzy.index.clear()
+        self.user = User.objects.create_user(email="fuzzy@example.com", password="password")
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("ingredients-fuzzy")
+        self.tomato = Ingredient.objects.create(name="tomate")
+        Ingredient.objects.create(name="tomatenmark")
+        Ingredient.objects.create(name="kartoffel")
+        Ingredient.objects.create(name="reis")
+
+    def search(self, query):
+        response = self.client.get(self.url, {"q": query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(item["name"], item["distance"]) for item in response.data]
+
+    def test_bounded_distance(self):
+        """
+        The edit distance is exact within the bound and None beyond it.
+        """
+        self.assertEqual(fuzzy.bounded_distance("tomatoe", "tomate", 2), 1)
+        self.assertEqual(fuzzy.bounded_distance("kartofel", "kartoffel", 1), 1)
+        self.assertIsNone(fuzzy.bounded_distance("tomate", "kartoffel", 2))
+
+    def test_suggestions_tolerate_typos(self):
+        """
+        Misspelled names find the closest ingredients; short names need an exact match.
+        """
+        self.assertEqual(self.search("Tomatoe"), [("Tomate", 1)])
+        self.assertEqual(self.search("katofel"), [("Kartoffel", 2)])
+        self.assertEqual(self.search("reis"), [("Reis", 0)])
+        self.assertEqual(self.search("eis"), [])
+
+    def test_index_follows_changes(self):
+        """
+        New and deleted ingredients are reflected in the suggestions.
+        """
+        self.search("tomate")
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.create(name="tomaten")
+            self.tomato.delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.search("tomate"), [("Tomaten", 1)])
+
+    def test_write_mapping_is_off_by_default(self):
+        """
+        Without the setting every new spelling becomes an ingredient of its own.
+        """
+        self.assertEqual(get_or_create_ingredients(["Tomatoe"])["tomatoe"].name, "tomatoe")
+
+    @override_settings(INGREDIENT_FUZZY_MATCH_ON_WRITE=True)
+    def test_write_mapping_reuses_near_duplicates(self):
+        """
+        With the setting a clear near-duplicate resolves to the existing ingredient.
+        """
+        ingredients = get_or_create_ingredients(["Tomatoe", "kartofel", "ries", "gurke"])
+        self.assertEqual(ingredients["tomatoe"], self.tomato)
+        self.assertEqual(ingredients["kartofel"].name, "kartoffel")
+        self.assertEqual(ingredients["ries"].name, "ries")
+        self.assertEqual(ingredients["gurke"].name, "gurke")
+        self.assertFalse(Ingredient.objects.filter(name__in=["tomatoe", "kartofel"]).exists())
+
+    @override_settings(INGREDIENT_FUZZY_MATCH_ON_WRITE=True)
+    def test_write_mapping_ignores_candidates_changed_elsewhere(self):
+        """
+        A candidate another process renamed or deleted since the index was built is not mapped to.
+        """
+        fuzzy.index.ensure_current()
+        # no signals: as if another process did it before the next generation check
+        Ingredient.objects.filter(pk=self.tomato.pk).update(name="paradeiser")
+        Ingredient.objects.filter(name="kartoffel")._raw_delete("default")
+        ingredients = get_or_create_ingredients(["Tomatoe", "kartofel"])
+        self.assertEqual(ingredients["tomatoe"].name, "tomatoe")
+        self.assertEqual(ingredients["kartofel"].name, "kartofel")
+
+
+class IngredientCanonicalizationTestCase(APITestCase):
+    def setUp(self):
+        """
+        Set up a few ingredients, an alias and an empty interning cache.
+        """
+        canonical.interned.clear()
+        self.user = User.objects.create_user(email="canonical@example.com", password="password")
+        self.client.force_authenticate(user=self.user)
+        self.tomato = Ingredient.objects.create(name="tomate")
+        self.egg = Ingredient.objects.create(name="ei")
+        self.champignon = Ingredient.objects.create(name="champignons")
+        IngredientAlias.objects.create(name=" Paradeiser", ingredient=self.tomato)
+
+    def resolve(self, *names):
+        return {name: ingredient.pk for name, ingredient in get_or_create_ingredients(names).items()}
+
+    def test_names_are_unicode_normalized(self):
+        """
+        Decomposed accents, full-width letters, case and extra spaces do not make a new name.
+        """
+        self.assertEqual(canonical.normalize_name("  Cre\u0300me   FRAÎCHE "), "crème fraîche")
+        self.assertEqual(canonical.normalize_name("ＴＯＭＡＴＥ"), "tomate")
+        self.assertEqual(Ingredient.objects.create(name="Cre\u0300me  fraîche").name, "crème fraîche")
+
+    def test_aliases_and_plurals_resolve_to_existing_ingredients(self):
+        """
+        Aliases and singular/plural forms map to the existing ingredient; short stems are left alone.
+        """
+        resolved = self.resolve("PARADEISER", "Tomaten", "champignon", "eis")
+        self.assertEqual(resolved["paradeiser"], self.tomato.pk)
+        self.assertEqual(resolved["tomaten"], self.tomato.pk)
+        self.assertEqual(resolved["champignon"], self.champignon.pk)
+        self.assertNotEqual(resolved["eis"], self.egg.pk)
+        self.assertEqual(Ingredient.objects.count(), 4)
+
+    def test_known_names_cost_no_query_once_interned(self):
+        """
+        After the first resolution has committed, known names are answered from the interning cache;
+        one query checks that the interned ingredients still exist.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            self.resolve("tomate", "paradeiser", "tomaten")
+        with self.assertNumQueries(0):
+            self.assertEqual(set(canonical.lookup(["tomate", "paradeiser", "tomaten"]).values()), {
+                (self.tomato.pk, "tomate")
+            })
+        with self.assertNumQueries(1):
+            self.assertEqual(set(self.resolve("Tomate", "paradeiser", "tomaten").values()), {self.tomato.pk})
+
+    def test_changes_invalidate_interned_names(self):
+        """
+        Removing or renaming an alias or a change in another process stops serving the cached resolution.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            self.resolve("paradeiser", "tomate")
+        with self.captureOnCommitCallbacks(execute=True):
+            IngredientAlias.objects.get(name="paradeiser").delete()
+        self.assertNotEqual(self.resolve("paradeiser")["paradeiser"], self.tomato.pk)
+
+        alias = IngredientAlias.objects.create(name="pomodoro", ingredient=self.tomato)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.resolve("pomodoro")
+        with self.captureOnCommitCallbacks(execute=True):
+            alias.name = "pomodori"
+            alias.save()
+        self.assertNotEqual(self.resolve("pomodoro")["pomodoro"], self.tomato.pk)
+
+        catalog.bump_generation()
+        with mock.patch.object(catalog, "GENERATION_CHECK_INTERVAL", 0), self.assertNumQueries(2):
+            # the generation, then the name again from the table
+            self.resolve("tomate")
+
+    def test_writes_do_not_use_ingredients_changed_elsewhere(self):
+        """
+        An interned ingredient another process renamed or deleted is resolved again before it is referenced.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            self.resolve("tomate", "ei")
+        # no signals: as if another process did it before the next generation check
+        Ingredient.objects.filter(pk=self.tomato.pk).update(name="paradeiser tomate")
+        Ingredient.objects.filter(pk=self.egg.pk)._raw_delete("default")
+        resolved = self.resolve("tomate", "ei")
+        self.assertNotIn(resolved["tomate"], {self.tomato.pk, self.egg.pk})
+        self.assertNotIn(resolved["ei"], {self.tomato.pk, self.egg.pk})
+        self.assertEqual(Ingredient.objects.get(pk=resolved["tomate"]).name, "tomate")
+
+    def test_cache_is_bounded(self):
+        """
+        The least recently used names are evicted beyond CACHE_SIZE.
+        """
+        with mock.patch.object(canonical, "CACHE_SIZE", 2), self.captureOnCommitCallbacks(execute=True):
+            self.resolve("tomate")
+            self.resolve("ei")
+            self.resolve("champignons")
+        self.assertEqual(list(canonical.interned.entries), ["ei", "champignons"])
+
+    def test_api_writes_use_canonical_names(self):
+        """
+        Recipes and shopping lists store the canonical ingredient; creating a known plural is refused.
+        """
+        response = self.client.post(reverse("recipes-list"), {
+            "name": "Salat", "instructions": "Schneiden", "preparation_time": 5,
+            "ingredients": [{"ingredient": "Tomaten", "amount": "2", "unit": "Stück"}],
+        }, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["ingredients"][0]["ingredient"], "Tomate")
+
+        shopping_list = ListCollection.objects.create(name="Einkauf", author=self.user)
+        response = self.client.post(reverse("shoppinglistitem-list"), {
+            "ingredient": "Paradeiser", "amount": "3", "unit": "Stück", "shopping_list": shopping_list.id,
+        }, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(ShoppingListItem.objects.get().ingredient, self.tomato)
+
+        response = self.client.post(reverse("ingredients-list"), {"name": "Tomaten"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class IngredientMergeTestCase(APITestCase):
+    def setUp(self):
+        """
+        Set up duplicates of tomato used by recipes and shopping lists, partly in the same ones.
+        """
+        self.admin = User.objects.create_superuser(email="admin@example.com", password="password")
+        self.user = User.objects.create_user(email="merge@example.com", password="password")
+        self.url = reverse("ingredients-merge")
+        self.tomato = Ingredient.objects.create(name="tomate")
+        self.typo = Ingredient.objects.create(name="tomatoe")
+        self.english = Ingredient.objects.create(name="tomato")
+        IngredientAlias.objects.create(name="paradeiser", ingredient=self.typo)
+
+        self.salad = Recipe.objects.create(name="Salat", instructions="-", preparation_time=5, author=self.user)
+        self.soup = Recipe.objects.create(name="Suppe", instructions="-", preparation_time=5, author=self.user)
+        for recipe, ingredient, position, amount, unit in [
+            (self.salad, self.tomato, 0, 2, "Stück"),
+            (self.salad, self.typo, 1, 1, "Stück"),
+            (self.salad, self.english, 2, 100, "g"),
+            (self.soup, self.english, 0, 500, "g"),
+        ]:
+            RecipeIngredient.objects.create(
+                recipe=recipe, ingredient=ingredient, position=position, amount=amount, unit=unit
+            )
+        self.shopping_list = ListCollection.objects.create(name="Einkauf", author=self.user)
+        self.other_list = ListCollection.objects.create(name="Markt", author=self.user)
+        for shopping_list, ingredient, amount in [
+            (self.shopping_list, self.tomato, 3),
+            (self.shopping_list, self.typo, 2),
+            (self.other_list, self.english, 4),
+        ]:
+            ShoppingListItem.objects.create(ingredient=ingredient, amount=amount, unit="Stück", shopping_list=shopping_list)
+
+    def test_merge_rewrites_references_and_combines_collisions(self):
+        """
+        Lines and items move to the target; colliding ones are summed into one row.
+        """
+        summary = merge_ingredients(self.tomato.id, [self.typo.id, self.english.id])
+        self.assertEqual(summary["recipe_lines_combined"], 1)
+        self.assertEqual(summary["shopping_list_items_combined"], 1)
+
+        self.assertEqual(
+            list(self.salad.ingredients.values_list("ingredient_id", "amount", "unit")),
+            [(self.tomato.id, 3, "Stück"), (self.tomato.id, 100, "g")],
+        )
+        self.assertEqual(list(self.soup.ingredients.values_list("ingredient_id", flat=True)), [self.tomato.id])
+        self.assertEqual(
+            set(ShoppingListItem.objects.values_list("shopping_list_id", "ingredient_id", "amount")),
+            {(self.shopping_list.id, self.tomato.id, 5), (self.other_list.id, self.tomato.id, 4)},
+        )
+        self.assertEqual(list(Ingredient.objects.values_list("name", flat=True)), ["tomate"])
+
+    def test_shopping_list_items_are_only_summed_in_the_same_unit(self):
+        """
+        A source item in another unit leaves the target's item unchanged and is reported as dropped.
+        """
+        grams = ShoppingListItem.objects.get(ingredient=self.typo)
+        grams.amount, grams.unit = 500, "g"
+        grams.save()
+        summary = merge_ingredients(self.tomato.id, [self.typo.id, self.english.id])
+        self.assertEqual(summary["shopping_list_items_combined"], 0)
+        self.assertEqual(
+            summary["shopping_list_items_dropped"],
+            [{"id": grams.id, "shopping_list": self.shopping_list.id, "amount": 500, "unit": "g"}],
+        )
+        self.assertEqual(
+            set(ShoppingListItem.objects.values_list("shopping_list_id", "amount", "unit")),
+            {(self.shopping_list.id, 3, "Stück"), (self.other_list.id, 4, "Stück")},
+        )
+
+    def test_source_names_keep_resolving_to_the_target(self):
+        """
+        Source names and their aliases become aliases of the target.
+        """
+        merge_ingredients(self.tomato.id, [self.typo.id, self.english.id])
+        self.assertEqual(
+            set(self.tomato.aliases.values_list("name", flat=True)), {"tomatoe", "tomato", "paradeiser"}
+        )
+        self.assertEqual(get_or_create_ingredients(["Tomatoe"])["tomatoe"].pk, self.tomato.pk)
+
+    def test_merge_updates_recipe_search(self):
+        """
+        Recipes that used a source are reindexed under the target name.
+        """
+        self.client.force_authenticate(user=self.user)
+        merge_ingredients(self.tomato.id, [self.english.id])
+        response = self.client.get(reverse("recipes-list"), {"q": "tomate"})
+        self.assertEqual({recipe["id"] for recipe in response.data["results"]}, {self.salad.id, self.soup.id})
+
+    def test_merge_query_count_does_not_grow_with_rows(self):
+        """
+        Repointing many recipe lines takes the same number of queries as repointing one.
+        """
+        def count_queries(count):
+            target = Ingredient.objects.create(name=f"ziel {count}")
+            source = Ingredient.objects.create(name=f"quelle {count}")
+            for index in range(count):
+                recipe = Recipe.objects.create(
+                    name=f"Rezept {count}-{index}", instructions="-", preparation_time=5, author=self.user
+                )
+                RecipeIngredient.objects.create(recipe=recipe, ingredient=source, amount=1, unit="g")
+            with CaptureQueriesContext(connection) as context:
+                merge_ingredients(target.id, [source.id])
+            return len(context.captured_queries)
+
+        self.assertEqual(count_queries(1), count_queries(30))
+
+    def test_merge_endpoint_is_admin_only(self):
+        """
+        Regular users are refused; admins get the summary, invalid requests a 400.
+        """
+        self.client.force_authenticate(user=self.user)
+        payload = {"target": self.tomato.id, "sources": [self.typo.id]}
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post(self.url, {"target": self.tomato.id, "sources": [999]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.url, {"target": self.tomato.id, "sources": [self.tomato.id]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["merged"], [self.typo.id])
+        self.assertFalse(Ingredient.objects.filter(pk=self.typo.id).exists())
@@ -0,0 +1,59 @@
+from django.conf import settings
+
+from . import canonical, catalog, fuzzy
+from .canonical import normalize_name  # noqa: F401
+from .models import Ingredient
+
+
+def get_or_create_ingredients(names):
+    """
+    Resolves many ingredient names at once. Known names, aliases and
+    singular/plural variants come from the interning cache or at most three
+    lookups; unknown names are created with one bulk insert and one lookup.
+    Returns {normalized name: Ingredient}.
+
+    With INGREDIENT_FUZZY_MATCH_ON_WRITE, an unknown name that is a clear
+    near-duplicate of an existing ingredient ("tomatoe") resolves to it.
+    """
+    names = {normalize_name(name) for name in names}
+    if not names:
+        return {}
+
+    ingredients = {
+        name: canonical.as_ingredient(ingredient_id, canonical_name)
+        for name, (ingredient_id, canonical_name) in canonical.lookup(names, verify=True).items()
+    }
+    missing = names - ingredients.keys()
+    if missing and getattr(settings, "INGREDIENT_FUZZY_MATCH_ON_WRITE", False):
+        near = {name: fuzzy.index.match(name) for name in missing}
+        near = {name: match for name, match in near.items() if match}
+        existing = Ingredient.objects.in_bulk({ingredient_id for ingredient_id, _ in near.values()})
+        for name, (ingredient_id, candidate) in near.items():
+            # deleted or renamed by another process since the index was built
+            if ingredient_id in existing and existing[ingredient_id].name == candidate:
+                ingredients[name] = existing[ingredient_id]
+                missing.discard(name)
+    if missing:
+        # bulk_create skips Ingredient.save(), the names are normalized above
+        Ingredient.objects.bulk_create([Ingredient(name=name) for name in missing], ignore_conflicts=True)
+        created = list(Ingredient.objects.filter(name__in=missing))
+        ingredients.update((ingredient.name, ingredient) for ingredient in created)
+        # bulk_create sends no post_save
+        catalog.ingredients_saved(created)
+    return ingredients
+
+
+def find_ingredient_ids(names):
+    """
+    {normalized name: ingredient id} of the names that resolve to an
+    existing ingredient (directly, by alias or by singular/plural);
+    unknown names are left out and nothing is created.
+    """
+    names = {normalize_name(name) for name in names}
+    names.discard("")
+    return {name: ingredient_id for name, (ingredient_id, _) in canonical.lookup(names).items()}
+
+
+def get_or_create_ingredient(name):
+    """The Ingredient a single name resolves to, created if it is unknown."""
+    return get_or_create_ingredients([name])[normalize_name(name)]
@@ -1,21 +1,87 @@
 from django.shortcuts import get_object_or_404
 from rest_framework import status, serializers
+from rest_framework.decorators import action
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from django.db.models import Count, Max
+from cookbook_and_shoppinglist.conditional import ConditionalGetMixin
+from . import canonical
+from .merge import merge_ingredients
+from .autocomplete import MAX_LIMIT, index as autocomplete_index
+from .fuzzy import MAX_LIMIT as FUZZY_MAX_LIMIT, index as fuzzy_index
 from .models import Ingredient
-from .serializers import IngredientSerializer
+from .serializers import IngredientMergeSerializer, IngredientSerializer
+from .utils import normalize_name
 
-class IngredientViewSet(ModelViewSet):
+class IngredientViewSet(ConditionalGetMixin, ModelViewSet):
     permission_classes = [IsAuthenticated]
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
 
     def perform_create(self, serializer):
-        name = serializer.validated_data['name'].strip().lower()
+        name = normalize_name(serializer.validated_data['name'])
+        # an alias or the singular/plural of a known ingredient counts as existing
+        if canonical.lookup([name]):
+            raise serializers.ValidationError({'message': 'This ingredient already exists!'})
         ingredient, created = Ingredient.objects.get_or_create(name=name)
 
         if not created:
             raise serializers.ValidationError({'message': 'This ingredient already exists!'})
 
         serializer.instance = ingredient
+
+    @action(detail=False, methods=["get"])
+    def autocomplete(self, request):
+        """
+        Up to ?limit= (default 10) ingredients whose name starts with ?q=,
+        the most used ones first. Served from the in-memory prefix index.
+        """
+        try:
+            limit = max(1, min(int(request.query_params.get("limit", 10)), MAX_LIMIT))
+        except ValueError:
+            return Response({"detail": "limit must be a number."}, status=status.HTTP_400_BAD_REQUEST)
+        matches = autocomplete_index.complete(normalize_name(request.query_params.get("q", "")), limit)
+        return Response([{"id": ingredient_id, "name": name.capitalize()} for ingredient_id, name in matches])
+
+    @action(detail=False, methods=["get"])
+    def fuzzy(self, request):
+        """
+        Up to ?limit= (default 5) ingredients whose name is within a few
+        typos of ?q=, closest first, with their edit distance.
+        """
+        try:
+            limit = max(1, min(int(request.query_params.get("limit", 5)), FUZZY_MAX_LIMIT))
+        except ValueError:
+            return Response({"detail": "limit must be a number."}, status=status.HTTP_400_BAD_REQUEST)
+        matches = fuzzy_index.search(normalize_name(request.query_params.get("q", "")), limit)
+        return Response([
+            {"id": ingredient_id, "name": name.capitalize(), "distance": distance}
+            for ingredient_id, name, distance in matches
+        ])
+
+    @action(detail=False, methods=["post"], permission_classes=[IsAdminUser])
+    def merge(self, request):
+        """
+        Merges {"sources": [ids]} into {"target": id}: recipe lines and
+        shopping list items move to the target (colliding ones are
+        combined), the source names become aliases. Admins only.
+        """
+        serializer = IngredientMergeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            summary = merge_ingredients(serializer.validated_data["target"], serializer.validated_data["sources"])
+        except ValueError as error:
+            return Response({"detail": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(summary)
+
+    def get_list_validators(self):
+        # count catches deletes, the newest updated_at catches inserts and renames
+        catalog = self.get_queryset().aggregate(count=Count("id"), last_update=Max("updated_at"))
+        return f"{catalog['count']}|{catalog['last_update']}", None
+
+    def get_object_validators(self):
+        updated_at = Ingredient.objects.filter(pk=self.kwargs["pk"]).values_list("updated_at", flat=True).first()
+        if updated_at is None:
+            return None
+        return updated_at.isoformat(), updated_at
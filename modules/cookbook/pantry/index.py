@@ -0,0 +1,167 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+
+from modules.cookbook.recipe_ingredients.models import RecipeIngredient
+from .models import IngredientPostings, RecipeIngredientSet, pack_ids, unpack_ids
+
+BATCH_SIZE = 1000
+
+
+def chunks(items, size=BATCH_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def ingredient_sets(recipe_ids=None):
+    """Current distinct ingredient ids per recipe, read from the recipe data."""
+    lines = RecipeIngredient.objects.all()
+    if recipe_ids is not None:
+        lines = lines.filter(recipe_id__in=recipe_ids)
+    sets = defaultdict(set)
+    for recipe_id, ingredient_id in lines.values_list("recipe_id", "ingredient_id"):
+        sets[recipe_id].add(ingredient_id)
+    return sets
+
+
+def update_recipes(recipe_ids):
+    """
+    Brings the index up to date for the given recipes: only the posting
+    lists of ingredients that were added to or removed from a recipe are
+    rewritten. Deleted recipes disappear from all posting lists.
+    """
+    recipe_ids = set(recipe_ids)
+    if not recipe_ids:
+        return
+    new_sets = ingredient_sets(recipe_ids)
+
+    with transaction.atomic():
+        old_sets = {
+            entry.recipe_id: set(unpack_ids(entry.ingredient_ids))
+            for entry in RecipeIngredientSet.objects.select_for_update().filter(recipe_id__in=recipe_ids)
+        }
+        added = defaultdict(set)
+        removed = defaultdict(set)
+        for recipe_id in recipe_ids:
+            old = old_sets.get(recipe_id, set())
+            new = new_sets.get(recipe_id, set())
+            for ingredient_id in new - old:
+                added[ingredient_id].add(recipe_id)
+            for ingredient_id in old - new:
+                removed[ingredient_id].add(recipe_id)
+
+        update_postings(added, removed)
+
+        RecipeIngredientSet.objects.bulk_create(
+            [
+                RecipeIngredientSet(recipe_id=recipe_id, ingredient_ids=pack_ids(ids), ingredient_count=len(ids))
+                for recipe_id, ids in new_sets.items()
+                if ids != old_sets.get(recipe_id)
+            ],
+            update_conflicts=True,
+            unique_fields=["recipe_id"],
+            update_fields=["ingredient_ids", "ingredient_count"],
+        )
+        stale = [recipe_id for recipe_id in old_sets if recipe_id not in new_sets]
+        if stale:
+            RecipeIngredientSet.objects.filter(recipe_id__in=stale).delete()
+
+
+def update_postings(added, removed):
+    ingredient_ids = set(added) | set(removed)
+    if not ingredient_ids:
+        return
+    postings = {
+        posting.ingredient_id: set(unpack_ids(posting.recipe_ids))
+        for posting in IngredientPostings.objects.select_for_update().filter(ingredient_id__in=ingredient_ids)
+    }
+    changed = []
+    empty = []
+    for ingredient_id in ingredient_ids:
+        recipe_ids = (postings.get(ingredient_id, set()) | added.get(ingredient_id, set())) - removed.get(ingredient_id, set())
+        if recipe_ids:
+            changed.append(IngredientPostings(ingredient_id=ingredient_id, recipe_ids=pack_ids(recipe_ids)))
+        else:
+            empty.append(ingredient_id)
+    IngredientPostings.objects.bulk_create(
+        changed,
+        update_conflicts=True,
+        unique_fields=["ingredient_id"],
+        update_fields=["recipe_ids"],
+    )
+    if empty:
+        IngredientPostings.objects.filter(ingredient_id__in=empty).delete()
+
+
+@transaction.atomic
+def rebuild():
+    """Recreates both tables from scratch; returns (recipes, ingredients) indexed."""
+    IngredientPostings.objects.all().delete()
+    RecipeIngredientSet.objects.all().delete()
+
+    sets = ingredient_sets()
+    postings = defaultdict(list)
+    for recipe_id, ids in sets.items():
+        for ingredient_id in ids:
+            postings[ingredient_id].append(recipe_id)
+
+    for batch in chunks(sets.items()):
+        RecipeIngredientSet.objects.bulk_create(
+            RecipeIngredientSet(recipe_id=recipe_id, ingredient_ids=pack_ids(ids), ingredient_count=len(ids))
+            for recipe_id, ids in batch
+        )
+    for batch in chunks(postings.items()):
+        IngredientPostings.objects.bulk_create(
+            IngredientPostings(ingredient_id=ingredient_id, recipe_ids=pack_ids(ids))
+            for ingredient_id, ids in batch
+        )
+    return len(sets), len(postings)
+
+
+def match_recipes(ingredient_ids, limit=20):
+    """
+    Ranks recipes by how many of their ingredients are in ingredient_ids,
+    then by how few are missing. Returns up to limit dicts with recipe_id,
+    matched, total and missing_ids.
+    """
+    pantry = set(ingredient_ids)
+    hits = Counter()
+    for recipe_ids in IngredientPostings.objects.filter(ingredient_id__in=pantry).values_list("recipe_ids", flat=True):
+        hits.update(unpack_ids(recipe_ids))
+    if not hits:
+        return []
+
+    by_matched = defaultdict(list)
+    for recipe_id, matched in hits.items():
+        by_matched[matched].append(recipe_id)
+
+    # Walk the groups from the best match down; totals are only loaded
+    # until enough recipes are ranked.
+    ranked = []
+    for matched in sorted(by_matched, reverse=True):
+        totals = {}
+        for batch in chunks(by_matched[matched]):
+            totals.update(
+                RecipeIngredientSet.objects.filter(recipe_id__in=batch).values_list("recipe_id", "ingredient_count")
+            )
+        ranked.extend(
+            sorted((totals[recipe_id] - matched, recipe_id, matched) for recipe_id in totals)
+        )
+        if len(ranked) >= limit:
+            break
+    ranked = ranked[:limit]
+
+    missing = {
+        entry.recipe_id: sorted(set(unpack_ids(entry.ingredient_ids)) - pantry)
+        for entry in RecipeIngredientSet.objects.filter(recipe_id__in=[recipe_id for _, recipe_id, _ in ranked])
+    }
+    return [
+        {
+            "recipe_id": recipe_id,
+            "matched": matched,
+            "total": matched + missing_count,
+            "missing_ids": missing[recipe_id],
+        }
+        for missing_count, recipe_id, matched in ranked
+    ]
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from modules.cookbook.pantry import index
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the ingredient -> recipe index used by the pantry search."
+
+    def handle(self, *args, **options):
+        recipes, ingredients = index.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {recipes} recipes over {ingredients} ingredients."))
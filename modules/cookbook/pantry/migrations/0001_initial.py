@@ -0,0 +1,29 @@
+# Generated by Django 5.1.7 on 2026-10-18 08:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngredientPostings',
+            fields=[
+                ('ingredient_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('recipe_ids', models.BinaryField(default=bytes)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RecipeIngredientSet',
+            fields=[
+                ('recipe_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('ingredient_ids', models.BinaryField(default=bytes)),
+                ('ingredient_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
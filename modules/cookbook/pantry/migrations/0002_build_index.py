@@ -0,0 +1,52 @@
+from array import array
+from collections import defaultdict
+
+from django.db import migrations
+
+
+def build_index(apps, schema_editor):
+    Recipe = apps.get_model("recipe", "Recipe")
+    IngredientPostings = apps.get_model("pantry", "IngredientPostings")
+    RecipeIngredientSet = apps.get_model("pantry", "RecipeIngredientSet")
+
+    sets = defaultdict(set)
+    for recipe_id, ingredient_id in Recipe.ingredients.through.objects.values_list(
+        "recipe_id", "recipeingredient__ingredient_id"
+    ):
+        sets[recipe_id].add(ingredient_id)
+
+    postings = defaultdict(list)
+    for recipe_id, ids in sets.items():
+        for ingredient_id in ids:
+            postings[ingredient_id].append(recipe_id)
+
+    RecipeIngredientSet.objects.bulk_create(
+        [
+            RecipeIngredientSet(
+                recipe_id=recipe_id,
+                ingredient_ids=array("q", sorted(ids)).tobytes(),
+                ingredient_count=len(ids),
+            )
+            for recipe_id, ids in sets.items()
+        ],
+        batch_size=1000,
+    )
+    IngredientPostings.objects.bulk_create(
+        [
+            IngredientPostings(ingredient_id=ingredient_id, recipe_ids=array("q", sorted(ids)).tobytes())
+            for ingredient_id, ids in postings.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pantry', '0001_initial'),
+        ('recipe', '0007_recipe_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(build_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+from array import array
+
+from django.db import models
+
+
+def pack_ids(ids):
+    """Sorted ids as a compact array of 64-bit integers."""
+    return array("q", sorted(ids)).tobytes()
+
+
+def unpack_ids(data):
+    ids = array("q")
+    ids.frombytes(bytes(data or b""))
+    return ids
+
+
+class IngredientPostings(models.Model):
+    """Inverted index: every recipe that uses an ingredient."""
+    ingredient_id = models.BigIntegerField(primary_key=True)
+    recipe_ids = models.BinaryField(default=bytes)
+
+    def __str__(self):
+        return f"Ingredient {self.ingredient_id}: {len(unpack_ids(self.recipe_ids))} recipes"
+
+
+class RecipeIngredientSet(models.Model):
+    """
+    Forward index: the distinct ingredients of a recipe as of the last update.
+    Used to diff against the new state and to list missing ingredients.
+    Neither table has foreign keys, so rows outlive deleted recipes and
+    ingredients until the index has removed them from the postings.
+    """
+    recipe_id = models.BigIntegerField(primary_key=True)
+    ingredient_ids = models.BinaryField(default=bytes)
+    ingredient_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Recipe {self.recipe_id}: {self.ingredient_count} ingredients"
@@ -0,0 +1,9 @@
+from django.dispatch import receiver
+
+from modules.cookbook.recipe.signals import recipes_changed
+from . import index
+
+
+@receiver(recipes_changed)
+def update_pantry_index(sender, recipe_ids, **kwargs):
+    index.update_recipes(recipe_ids)
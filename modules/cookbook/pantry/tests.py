@@ -0,0 +1,117 @@
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from modules.cookbook.ingredients.models import Ingredient, IngredientAlias
+from modules.cookbook.recipe.models import Recipe
+from modules.cookbook.recipe_ingredients.models import RecipeIngredient
+from modules.cookbook.pantry.models import IngredientPostings, RecipeIngredientSet, unpack_ids
+
+User = get_user_model()
+
+
+class PantryBaseSetup(APITestCase):
+    def setUp(self):
+        """
+        Set up an authenticated user and three recipes with overlapping ingredients.
+        """
+        self.user = User.objects.create_user(email="pantry@example.com", password="testpassword123")
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("recipes-pantry")
+
+        self.omelette = self.create_recipe("Omelette", ["ei", "milch", "salz"])
+        self.fried_egg = self.create_recipe("Spiegelei", ["ei", "salz"])
+        self.pancakes = self.create_recipe("Pfannkuchen", ["ei", "milch", "mehl", "zucker"])
+
+    def create_recipe(self, name, ingredient_names):
+        recipe = Recipe.objects.create(name=name, instructions="...", preparation_time=10, author=self.user)
+        for ingredient_name in ingredient_names:
+            ingredient, _ = Ingredient.objects.get_or_create(name=ingredient_name)
+            RecipeIngredient.objects.create(recipe=recipe, ingredient=ingredient, amount=1, unit="Stück")
+        return recipe
+
+    def postings(self, name):
+        posting = IngredientPostings.objects.filter(ingredient_id=Ingredient.objects.get(name=name).id).first()
+        return list(unpack_ids(posting.recipe_ids)) if posting else []
+
+
+class PantryIndexTests(PantryBaseSetup):
+    def test_postings_are_built_incrementally(self):
+        """
+        Every ingredient lists the recipes that use it.
+        """
+        self.assertEqual(self.postings("ei"), sorted([self.omelette.id, self.fried_egg.id, self.pancakes.id]))
+        self.assertEqual(self.postings("zucker"), [self.pancakes.id])
+
+    def test_removing_an_ingredient_updates_postings(self):
+        """
+        Removing an ingredient line drops the recipe from that posting list only.
+        """
+        self.pancakes.ingredients.get(ingredient__name="zucker").delete()
+        self.assertEqual(self.postings("zucker"), [])
+        self.assertEqual(RecipeIngredientSet.objects.get(recipe_id=self.pancakes.id).ingredient_count, 3)
+
+    def test_deleting_a_recipe_updates_postings(self):
+        """
+        A deleted recipe disappears from all posting lists.
+        """
+        recipe_id = self.omelette.id
+        self.omelette.delete()
+        self.assertNotIn(recipe_id, self.postings("ei"))
+        self.assertFalse(RecipeIngredientSet.objects.filter(recipe_id=recipe_id).exists())
+
+    def test_rebuild_command_recreates_the_index(self):
+        """
+        The rebuild command produces the same postings as the incremental updates.
+        """
+        before = self.postings("milch")
+        IngredientPostings.objects.all().delete()
+        call_command("rebuild_pantry_index", stdout=StringIO())
+        self.assertEqual(self.postings("milch"), before)
+
+
+class PantryEndpointTests(PantryBaseSetup):
+    def test_recipes_are_ranked_by_coverage(self):
+        """
+        Recipes with more covered ingredients come first, ties by fewer missing.
+        """
+        response = self.client.get(self.url, {"ingredients": "Ei, Salz,milch"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [result["recipe"]["id"] for result in response.data],
+            [self.omelette.id, self.fried_egg.id, self.pancakes.id],
+        )
+        self.assertEqual(response.data[0]["matched"], 3)
+        self.assertEqual(response.data[0]["missing"], [])
+        self.assertEqual(response.data[2]["matched"], 2)
+        self.assertEqual(response.data[2]["total"], 4)
+        self.assertCountEqual(response.data[2]["missing"], ["Mehl", "Zucker"])
+
+    def test_limit_and_unknown_ingredients(self):
+        """
+        Unknown ingredient names are ignored and the result size is limited.
+        """
+        response = self.client.get(self.url, {"ingredients": ["ei", "trüffel"], "limit": 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([result["recipe"]["id"] for result in response.data], [self.fried_egg.id])
+
+    def test_aliases_and_plurals_count_as_the_ingredient(self):
+        """
+        Pantry names go through the ingredient canonicalization: aliases, plurals and
+        spelling variants match the ingredient they stand for.
+        """
+        IngredientAlias.objects.create(name="hühnerei", ingredient=Ingredient.objects.get(name="ei"))
+        response = self.client.get(self.url, {"ingredients": "Hühnerei,ＳＡＬＺ,Milchen"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]["recipe"]["id"], self.omelette.id)
+        self.assertEqual(response.data[0]["matched"], 3)
+        self.assertEqual(response.data[0]["missing"], [])
+
+    def test_missing_ingredients_parameter(self):
+        """
+        Calling the endpoint without ingredients returns a 400 error.
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
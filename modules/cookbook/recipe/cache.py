@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.cache import caches
+
+
+def get_cache():
+    return caches[getattr(settings, "RECIPE_CACHE_ALIAS", "default")]
+
+
+def cache_key(recipe_id):
+    return f"recipe-representation:{recipe_id}"
+
+
+def version(recipe):
+    return recipe.updated_at.isoformat()
+
+
+def get_cached(recipe):
+    """The cached representation of the recipe, or None if missing or outdated."""
+    entry = get_cache().get(cache_key(recipe.pk))
+    if entry is None or entry[0] != version(recipe):
+        return None
+    return entry[1]
+
+
+def store(recipe, representation):
+    get_cache().set(cache_key(recipe.pk), (version(recipe), representation))
+
+
+def invalidate(recipe_ids):
+    get_cache().delete_many([cache_key(recipe_id) for recipe_id in recipe_ids])
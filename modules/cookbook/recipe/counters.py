@@ -0,0 +1,135 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+
+from modules.cookbook.trending.models import RecipeViewEvent
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    """
+    Write-behind buffer for recipe views. Increments are summed in memory and
+    written with one UPDATE ... CASE (plus one insert of trending events)
+    once RECIPE_VIEW_FLUSH_EVENTS views were counted or the oldest pending
+    view is RECIPE_VIEW_FLUSH_SECONDS old, and when the process exits.
+
+    Every worker process has its own buffer. Flushes add to view_count
+    instead of overwriting it, so concurrent workers never lose each other's
+    views; a forked child starts with an empty buffer. Server processes
+    call start() (see wsgi.py) so an idle worker still writes its views
+    within RECIPE_VIEW_FLUSH_SECONDS; the flush thread is started again in
+    forked children.
+    """
+
+    def __init__(self):
+        self.thread = None
+        self.reset()
+
+    def reset(self):
+        self.lock = threading.Lock()
+        self.pending = Counter()
+        self.events = 0
+        self.oldest = None
+
+    def add(self, recipe_id):
+        with self.lock:
+            self.pending[recipe_id] += 1
+            self.events += 1
+            if self.oldest is None:
+                self.oldest = time.monotonic()
+            due = self.events >= getattr(settings, "RECIPE_VIEW_FLUSH_EVENTS", 100) or self.is_old()
+        if due:
+            self.flush()
+
+    def is_old(self):
+        return (
+            self.oldest is not None
+            and time.monotonic() - self.oldest >= getattr(settings, "RECIPE_VIEW_FLUSH_SECONDS", 10)
+        )
+
+    def flush_if_due(self):
+        with self.lock:
+            due = self.is_old()
+        return self.flush() if due else 0
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, Counter()
+            self.events = 0
+            self.oldest = None
+        if not pending:
+            return 0
+        try:
+            write_views(pending)
+        except DatabaseError:
+            logger.warning("Flushing %s recipe views failed, keeping them for the next flush",
+                           sum(pending.values()), exc_info=True)
+            with self.lock:
+                self.pending.update(pending)
+                self.events += sum(pending.values())
+                if self.oldest is None:
+                    self.oldest = time.monotonic()
+            return 0
+        return sum(pending.values())
+
+    def start(self):
+        """Starts the daemon thread that flushes due views while no new views arrive."""
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self.run, name="recipe-view-flush", daemon=True)
+            self.thread.start()
+
+    def run(self):
+        while True:
+            # a pending view is written at most 1.5 flush periods after it was counted
+            time.sleep(getattr(settings, "RECIPE_VIEW_FLUSH_SECONDS", 10) / 2)
+            try:
+                self.flush_if_due()
+            except Exception:
+                logger.exception("Flushing recipe views failed")
+            finally:
+                close_old_connections()
+
+    def after_fork(self):
+        """The child starts with an empty buffer and, if the parent had one, its own flush thread."""
+        self.reset()
+        if self.thread is not None:
+            self.thread = None
+            self.start()
+
+
+def write_views(pending):
+    with transaction.atomic():
+        Recipe.objects.filter(pk__in=pending).update(
+            view_count=F("view_count") + Case(
+                *[When(pk=recipe_id, then=Value(count)) for recipe_id, count in pending.items()],
+                default=Value(0),
+                output_field=PositiveIntegerField(),
+            )
+        )
+        RecipeViewEvent.objects.bulk_create(
+            [RecipeViewEvent(recipe_id=recipe_id, weight=count) for recipe_id, count in pending.items()]
+        )
+
+
+recipe_views = ViewCounter()
+
+
+def flush_at_exit():
+    try:
+        recipe_views.flush()
+    finally:
+        close_old_connections()
+
+
+atexit.register(flush_at_exit)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=recipe_views.after_fork)
@@ -0,0 +1,217 @@
+import base64
+import logging
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections
+from django.utils import timezone
+from PIL import ExifTags, Image, ImageOps
+
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+# name -> bounding box; images are scaled down to fit, never up or cropped
+RENDITIONS = {
+    "thumbnail": (160, 160),
+    "card": (500, 300),
+    "full": (1600, 1600),
+}
+
+# format key -> (Pillow format, file extension, save options)
+FORMATS = {
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+RENDITION_DIR = "images/recipes/renditions"
+
+# Width/height bound of the inline placeholder shown while the image loads
+PLACEHOLDER_SIZE = 32
+
+# Unreferenced files written more recently may belong to an upload or a
+# rendition job whose row is not saved yet.
+COLLECT_GRACE_PERIOD = timedelta(hours=1)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "RECIPE_IMAGE_WORKERS", 2),
+                thread_name_prefix="recipe-images",
+            )
+        return _executor
+
+
+def schedule_renditions(recipe_id):
+    """
+    Queues the rendition job for a freshly uploaded image. With
+    RECIPE_IMAGE_PROCESSING = "sync" the job runs right away (tests, scripts).
+    """
+    if getattr(settings, "RECIPE_IMAGE_PROCESSING", "thread") == "sync":
+        process_recipe_image(recipe_id)
+    else:
+        get_executor().submit(_run_in_worker, recipe_id)
+
+
+def _run_in_worker(recipe_id):
+    close_old_connections()
+    try:
+        process_recipe_image(recipe_id)
+    except Exception:
+        logger.exception("Generating image renditions for recipe %s failed", recipe_id)
+    finally:
+        close_old_connections()
+
+
+def placeholder(image):
+    """A tiny blurred-looking JPEG of the image as data URI (well under 1 KB)."""
+    small = ImageOps.exif_transpose(image).convert("RGB")
+    small.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    buffer = BytesIO()
+    small.save(buffer, format="JPEG", quality=40)
+    return "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+
+def inspect_upload(file):
+    """
+    (width, height, placeholder) of an upload, measured after EXIF rotation.
+    Only the header is parsed; JPEGs are decoded in draft mode at 1/8 scale
+    or less, so the placeholder costs a few milliseconds. Other formats get
+    their placeholder from the rendition job.
+    """
+    try:
+        file.seek(0)
+        with Image.open(file) as image:
+            width, height = image.size
+            if image.getexif().get(ExifTags.Base.Orientation, 1) in (5, 6, 7, 8):
+                width, height = height, width
+            lqip = ""
+            if image.format == "JPEG":
+                image.draft("RGB", (PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+                lqip = placeholder(image)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None, None, ""
+    finally:
+        file.seek(0)
+    return width, height, lqip
+
+
+def render(image, size, image_format, options):
+    rendition = image.copy()
+    rendition.thumbnail(size, Image.LANCZOS)
+    buffer = BytesIO()
+    rendition.save(buffer, format=image_format, **options)
+    return buffer.getvalue()
+
+
+def generate_renditions(recipe):
+    """
+    Writes all renditions of recipe.recipe_img.
+    Returns ({rendition: {format: path}}, placeholder, (width, height)).
+    """
+    storage = recipe.recipe_img.storage
+    with recipe.recipe_img.open("rb") as source:
+        image = Image.open(source)
+        image = ImageOps.exif_transpose(image).convert("RGB")
+
+    stem = posixpath.splitext(posixpath.basename(recipe.recipe_img.name))[0]
+    renditions = {}
+    for name, size in RENDITIONS.items():
+        renditions[name] = {}
+        for key, (image_format, extension, options) in FORMATS.items():
+            # The storage names the file after its content; the name is only a hint
+            path = posixpath.join(RENDITION_DIR, f"{stem}-{name}.{extension}")
+            renditions[name][key] = storage.save(path, ContentFile(render(image, size, image_format, options)))
+    return renditions, placeholder(image), image.size
+
+
+def process_recipe_image(recipe_id):
+    """
+    Generates the renditions of a recipe's current image and marks it ready
+    (or failed). The result is dropped if the image was replaced meanwhile;
+    the newer upload has its own job queued.
+    """
+    from .signals import notify_recipes_changed
+
+    recipe = Recipe.objects.filter(pk=recipe_id).only("id", "recipe_img").first()
+    if recipe is None or not recipe.recipe_img:
+        return None
+    changes = {}
+    try:
+        renditions, lqip, (width, height) = generate_renditions(recipe)
+        changes.update(image_renditions=renditions, img_placeholder=lqip, img_width=width, img_height=height)
+        status = "ready"
+    except (OSError, ValueError, Image.DecompressionBombError):
+        logger.warning("Image of recipe %s could not be processed", recipe_id, exc_info=True)
+        changes["image_renditions"], status = {}, "failed"
+
+    updated = Recipe.objects.filter(pk=recipe_id, recipe_img=recipe.recipe_img.name).update(
+        image_status=status, updated_at=timezone.now(), **changes
+    )
+    if updated:
+        notify_recipes_changed([recipe_id])
+    return status
+
+
+def stored_files(storage, directory):
+    try:
+        directories, files = storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for name in files:
+        yield posixpath.join(directory, name)
+    for name in directories:
+        yield from stored_files(storage, posixpath.join(directory, name))
+
+
+def referenced_files():
+    """Names of all stored files a recipe points to: its image and the renditions."""
+    names = set()
+    for image, renditions in Recipe.objects.values_list("recipe_img", "image_renditions").iterator():
+        if image:
+            names.add(image)
+        names.update(path for formats in renditions.values() for path in formats.values())
+    return names
+
+
+def collect_unused_files(dry_run=False, now=None):
+    """
+    Deletes stored image files no recipe references any more (replaced or
+    removed images and their renditions, leftovers of aborted writes).
+    Files stay for COLLECT_GRACE_PERIOD after they were last written or
+    reused. Returns (scanned, deleted).
+    """
+    field = Recipe._meta.get_field("recipe_img")
+    storage = field.storage
+    cutoff = (now or timezone.now()) - COLLECT_GRACE_PERIOD
+
+    def is_old(name):
+        try:
+            return storage.get_modified_time(name) < cutoff
+        except FileNotFoundError:
+            return False
+
+    # listed before the references are read, so a file written in between is
+    # either not listed or too young
+    files = [name for name in stored_files(storage, field.upload_to.rstrip("/")) if is_old(name)]
+    referenced = referenced_files()
+    deleted = 0
+    for name in files:
+        # checked again: saving an identical file reuses it and renews its time
+        if name in referenced or not is_old(name):
+            continue
+        if not dry_run:
+            storage.purge(name)
+        deleted += 1
+    return len(files), deleted
@@ -0,0 +1,134 @@
+import json
+
+from django.db import DatabaseError, transaction
+
+from modules.cookbook.ingredients.utils import get_or_create_ingredients, normalize_name
+from modules.cookbook.recipe_ingredients.models import RecipeIngredient
+from modules.cookbook.recipe_ingredients.utils import build_recipe_ingredients
+from .models import Recipe
+from .serializers import RecipeSerializer
+from .signals import notify_recipes_changed
+
+CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 100
+
+
+class RecipeImporter:
+    """
+    Imports recipes from JSON lines (one RecipeSerializer payload per line).
+
+    Lines are validated one by one and written in chunks, each in its own
+    transaction, so memory stays bounded by the chunk size. A chunk that
+    fails to save is retried line by line, so a broken line only costs
+    that line. Ingredient names are resolved once per import and reused
+    across chunks once their chunk has committed.
+    """
+
+    def __init__(self, author, chunk_size=CHUNK_SIZE, on_progress=None):
+        self.author = author
+        self.chunk_size = chunk_size
+        self.on_progress = on_progress
+        self.ingredient_ids = {}
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def run(self, lines):
+        chunk = []
+        for line_number, line in enumerate(lines, start=1):
+            data = self.validate(line_number, line)
+            if data is None:
+                continue
+            chunk.append((line_number, data))
+            if len(chunk) >= self.chunk_size:
+                self.write_chunk(chunk)
+                chunk = []
+        if chunk:
+            self.write_chunk(chunk)
+        return self.report()
+
+    def report(self):
+        return {"created": self.created, "failed": self.failed, "errors": self.errors}
+
+    def add_error(self, line_number, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_number, "errors": errors})
+
+    def validate(self, line_number, line):
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", errors="replace")
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            payload = json.loads(line)
+        except ValueError as error:
+            self.add_error(line_number, {"detail": f"Invalid JSON: {error}"})
+            return None
+
+        serializer = RecipeSerializer(data=payload)
+        if not serializer.is_valid():
+            self.add_error(line_number, serializer.errors)
+            return None
+        data = serializer.validated_data
+        if any(not ingredient_line["amount"] for ingredient_line in data.get("ingredients", [])):
+            self.add_error(line_number, {"ingredients": ["Amount cannot be empty"]})
+            return None
+        return data
+
+    def write_chunk(self, chunk):
+        try:
+            recipe_ids = self.write_records([data for _, data in chunk])
+        except DatabaseError as error:
+            recipe_ids = []
+            if len(chunk) == 1:
+                self.add_error(chunk[0][0], {"detail": f"Could not be saved: {error}"})
+            else:
+                # retry line by line so only the broken lines are reported
+                for line_number, data in chunk:
+                    try:
+                        recipe_ids.extend(self.write_records([data]))
+                    except DatabaseError as line_error:
+                        self.add_error(line_number, {"detail": f"Could not be saved: {line_error}"})
+        self.created += len(recipe_ids)
+        notify_recipes_changed(recipe_ids)
+        if self.on_progress:
+            self.on_progress(self.report())
+
+    def write_records(self, records):
+        with transaction.atomic():
+            recipe_ids, resolved = self.save_chunk(records)
+        # only ids of committed ingredients are reused: a rolled back chunk
+        # may have created the ones it resolved
+        self.ingredient_ids.update(resolved)
+        return recipe_ids
+
+    def save_chunk(self, records):
+        """Writes the records, returns their recipe ids and the newly resolved {name: ingredient id}."""
+        unknown_names = {
+            normalize_name(line["ingredient"])
+            for data in records
+            for line in data.get("ingredients", [])
+        } - self.ingredient_ids.keys()
+        resolved = {}
+        if unknown_names:
+            resolved = {name: ingredient.id for name, ingredient in get_or_create_ingredients(unknown_names).items()}
+        ingredient_ids = {**self.ingredient_ids, **resolved}
+
+        recipes = []
+        lines = []
+        for data in records:
+            data = dict(data)
+            lines.append(data.pop("ingredients", []))
+            # bulk_create skips Recipe.save(), so normalize the name here
+            data["name"] = Recipe.normalize_name(data["name"])
+            recipes.append(Recipe(author=self.author, **data))
+        Recipe.objects.bulk_create(recipes)
+
+        RecipeIngredient.objects.bulk_create([
+            row
+            for recipe, recipe_lines in zip(recipes, lines)
+            for row in build_recipe_ingredients(recipe, recipe_lines, ingredient_ids=ingredient_ids)
+        ])
+        return [recipe.id for recipe in recipes], resolved
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from modules.cookbook.recipe.images import collect_unused_files
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes stored recipe images and renditions that no recipe references any more. "
+        "Safe to run periodically (e.g. from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be deleted.")
+
+    def handle(self, *args, **options):
+        scanned, deleted = collect_unused_files(dry_run=options["dry_run"])
+        verb = "Would delete" if options["dry_run"] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {deleted} of {scanned} files."))
@@ -0,0 +1,42 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from modules.cookbook.recipe.importer import CHUNK_SIZE, RecipeImporter
+
+
+class Command(BaseCommand):
+    help = "Imports recipes from a JSON lines file (one recipe per line, '-' reads stdin)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--author", required=True, help="E-mail address of the recipe author.")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            author = get_user_model().objects.get(email=options["author"].strip().lower())
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {options['author']} does not exist.")
+
+        importer = RecipeImporter(author, chunk_size=options["chunk_size"], on_progress=self.progress)
+        if options["path"] == "-":
+            report = importer.run(sys.stdin)
+        else:
+            try:
+                with open(options["path"], encoding="utf-8") as lines:
+                    report = importer.run(lines)
+            except OSError as error:
+                raise CommandError(str(error))
+
+        for error in report["errors"]:
+            self.stderr.write(f"Line {error['line']}: {error['errors']}")
+        if report["failed"] > len(report["errors"]):
+            self.stderr.write(f"... {report['failed'] - len(report['errors'])} more errors not shown.")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['created']} recipes, {report['failed']} lines failed."
+        ))
+
+    def progress(self, report):
+        self.stdout.write(f"{report['created']} recipes imported, {report['failed']} failed so far")
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from modules.cookbook.recipe.images import process_recipe_image
+from modules.cookbook.recipe.models import Recipe
+
+
+class Command(BaseCommand):
+    help = "Generates the image renditions of recipes that are pending or failed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Regenerate the renditions of every recipe image.")
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(recipe_img="").exclude(recipe_img__isnull=True)
+        if not options["all"]:
+            recipes = recipes.exclude(image_status="ready")
+
+        results = {"ready": 0, "failed": 0}
+        for recipe_id in recipes.values_list("id", flat=True).iterator():
+            status = process_recipe_image(recipe_id)
+            if status:
+                results[status] += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {results['ready']} recipe images, {results['failed']} failed."
+        ))
@@ -0,0 +1,43 @@
+from django.db import migrations
+
+FTS_TABLE = "recipe_recipe_fts"
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+        "name, instructions, ingredients, "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    # name weighs most, then ingredient names, then the instructions
+    schema_editor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rank) VALUES ('rank', 'bm25(10.0, 1.0, 5.0)')")
+
+    Recipe = apps.get_model("recipe", "Recipe")
+    ingredient_names = {}
+    lines = Recipe.ingredients.through.objects.values_list("recipe_id", "recipeingredient__ingredient__name")
+    for recipe_id, name in lines:
+        ingredient_names.setdefault(recipe_id, []).append(name)
+    for recipe_id, name, instructions in Recipe.objects.values_list("id", "name", "instructions"):
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, name, instructions, ingredients) VALUES (%s, %s, %s, %s)",
+            [recipe_id, name, instructions, " ".join(ingredient_names.get(recipe_id, []))],
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0006_remove_recipe_is_favorite'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
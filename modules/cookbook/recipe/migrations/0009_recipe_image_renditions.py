@@ -0,0 +1,35 @@
+# Generated by Django 5.1.7 on 2026-10-18 08:18
+
+from django.db import migrations, models
+
+
+def mark_existing_images_pending(apps, schema_editor):
+    # Renditions for images uploaded before the pipeline: manage.py process_recipe_images
+    Recipe = apps.get_model("recipe", "Recipe")
+    Recipe.objects.exclude(recipe_img="").exclude(recipe_img__isnull=True).update(image_status="pending")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0008_recipe_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_renditions',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='image_status',
+            field=models.CharField(choices=[('none', 'Kein Bild'), ('pending', 'In Bearbeitung'), ('ready', 'Fertig'), ('failed', 'Fehlgeschlagen')], default='none', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='recipe_img',
+            field=models.ImageField(blank=True, null=True, upload_to='images/recipes/'),
+        ),
+        migrations.RunPython(mark_existing_images_pending, migrations.RunPython.noop),
+    ]
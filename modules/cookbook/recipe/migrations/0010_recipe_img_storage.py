@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-18 08:22
+
+import cookbook_and_shoppinglist.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0009_recipe_image_renditions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='recipe_img',
+            field=models.ImageField(blank=True, null=True, storage=cookbook_and_shoppinglist.storage.recipe_image_storage, upload_to='images/recipes/'),
+        ),
+    ]
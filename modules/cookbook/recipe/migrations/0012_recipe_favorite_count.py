@@ -0,0 +1,36 @@
+# Generated by Django 5.1.7 on 2026-10-18 08:34
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_favorites(apps, schema_editor):
+    Recipe = apps.get_model("recipe", "Recipe")
+    Favorite = apps.get_model("favorites", "Favorite")
+    counts = Favorite.objects.filter(recipe=OuterRef("pk")).order_by().values("recipe").annotate(count=Count("pk")).values("count")
+    Recipe.objects.update(favorite_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0011_recipe_image_placeholder'),
+        ('recipe_ingredients', '0001_initial'),
+        ('favorites', '0005_favorite_favorites_f_user_id_2ac2bf_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorite_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['favorite_count', 'id'], name='recipe_popularity_idx'),
+        ),
+        migrations.RunPython(count_favorites, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0013_recipe_view_count'),
+        ('recipe_ingredients', '0003_copy_shared_lines'),
+        # their backfills read the many-to-many table removed here
+        ('pantry', '0002_build_index'),
+        ('similarity', '0002_build_index'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='recipe',
+            name='ingredients',
+        ),
+    ]
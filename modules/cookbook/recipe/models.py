@@ -1,7 +1,6 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
-from modules.cookbook.recipe_ingredients.models import RecipeIngredient
-from django_resized import ResizedImageField
+from cookbook_and_shoppinglist.storage import recipe_image_storage
 
 class Recipe(models.Model):
     DIFFICULTY_CHOICES = [
@@ -24,17 +23,60 @@ class Recipe(models.Model):
     category = models.CharField(max_length=15, choices=CATEGORY_CHOICES, default='breakfast')
     author = models.ForeignKey(get_user_model(), on_delete=models.CASCADE)
     portion = models.PositiveIntegerField(default=2)
-    ingredients = models.ManyToManyField(RecipeIngredient)
-    recipe_img = ResizedImageField(size=[500, 300],
+    IMAGE_STATUS_CHOICES = [
+        ("none", "Kein Bild"),
+        ("pending", "In Bearbeitung"),
+        ("ready", "Fertig"),
+        ("failed", "Fehlgeschlagen"),
+    ]
+
+    # Stored as uploaded under its content hash; the renditions are generated in
+    # the background (images.py)
+    recipe_img = models.ImageField(
         upload_to="images/recipes/",
-        force_format="JPEG",  # oder "PNG"
+        storage=recipe_image_storage,
         blank=True,
         null=True
     )
+    image_status = models.CharField(max_length=10, choices=IMAGE_STATUS_CHOICES, default="none")
+    image_renditions = models.JSONField(default=dict, blank=True)
+    # Known before the image itself is loaded: layout size and an inline preview
+    img_width = models.PositiveIntegerField(null=True, blank=True)
+    img_height = models.PositiveIntegerField(null=True, blank=True)
+    img_placeholder = models.TextField(blank=True, default="")
+    # Maintained by the favorites app; manage.py reconcile_favorite_counts repairs drift
+    favorite_count = models.PositiveIntegerField(default=0)
+    # Written in batches by counters.recipe_views, not on every request
+    view_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["favorite_count", "id"], name="recipe_popularity_idx"),
+        ]
+
+    @staticmethod
+    def normalize_name(name):
+        """Recipe names are stored trimmed and lower-cased."""
+        return name.strip().lower()
 
     def save(self, *args, **kwargs):
-        self.name = self.name.strip().lower()
+        self.name = self.normalize_name(self.name)
+        new_image = bool(self.recipe_img) and not self.recipe_img._committed
+        if new_image:
+            from .images import inspect_upload
+            self.image_status = "pending"
+            self.image_renditions = {}
+            self.img_width, self.img_height, self.img_placeholder = inspect_upload(self.recipe_img.file)
+        elif not self.recipe_img and self.image_status != "none":
+            self.image_status = "none"
+            self.image_renditions = {}
+            self.img_width = self.img_height = None
+            self.img_placeholder = ""
         super().save(*args, **kwargs)
+        if new_image:
+            from .images import schedule_renditions
+            transaction.on_commit(lambda: schedule_renditions(self.pk))
 
     def __str__(self):
         return self.name.capitalize()
\ No newline at end of file
@@ -0,0 +1,9 @@
+from rest_framework.permissions import SAFE_METHODS, BasePermission
+
+
+class IsAuthorOrReadOnly(BasePermission):
+    """Every user may read a recipe; only its author may change or delete it."""
+    message = "You do not have permission to edit this recipe."
+
+    def has_object_permission(self, request, view, obj):
+        return request.method in SAFE_METHODS or obj.author_id == request.user.id
@@ -0,0 +1,69 @@
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+
+from modules.cookbook.recipe_ingredients.utils import AMOUNT_QUANTUM
+
+MAX_PORTIONS = 1000
+
+# Rounding step per unit (lower case). Scaled amounts are rounded half up to a
+# multiple of the step but never below one step, so "0.3 Eier" becomes 0.5
+# and "3 g Salz" for one portion stays at least 1 g.
+UNIT_QUANTA = {
+    **dict.fromkeys(["g", "gramm", "gr", "ml", "milliliter", "prise", "prisen"], Decimal("1")),
+    **dict.fromkeys(["kg", "kilogramm", "l", "liter"], Decimal("0.01")),
+    **dict.fromkeys(["el", "esslöffel", "tl", "teelöffel", "tasse", "tassen", "becher"], Decimal("0.25")),
+    **dict.fromkeys(
+        ["stück", "stk", "scheibe", "scheiben", "zehe", "zehen", "dose", "dosen",
+         "bund", "packung", "packungen", "päckchen", "pck", "ei", "eier"],
+        Decimal("0.5"),
+    ),
+}
+
+
+def quantum_for(unit):
+    return UNIT_QUANTA.get(unit.strip().lower(), AMOUNT_QUANTUM)
+
+
+def scale_amount(amount, unit, portions, base_portions):
+    """amount for base_portions scaled to portions, rounded by the rules of the unit."""
+    quantum = quantum_for(unit)
+    exact = Decimal(amount) * Decimal(portions) / Decimal(base_portions or 1)
+    steps = (exact / quantum).to_integral_value(rounding=ROUND_HALF_UP)
+    return (max(steps, 1) * quantum).quantize(AMOUNT_QUANTUM)
+
+
+def scale_recipe(recipe, portions):
+    """
+    The ingredient lines of a recipe (with lines and ingredients prefetched)
+    for the given number of portions.
+    """
+    return {
+        "id": recipe.id,
+        "name": recipe.name.capitalize(),
+        "portion": recipe.portion,
+        "portions": portions,
+        "ingredients": [
+            {
+                "ingredient_id": line.ingredient_id,
+                "ingredient": line.ingredient.name.capitalize(),
+                "amount": str(scale_amount(line.amount, line.unit, portions, recipe.portion)),
+                "unit": line.unit,
+            }
+            for line in recipe.ingredients.all()
+        ],
+    }
+
+
+def sum_scaled(scaled_recipes):
+    """Adds up the scaled lines of several recipes per ingredient and unit."""
+    totals = defaultdict(Decimal)
+    names = {}
+    for scaled in scaled_recipes:
+        for line in scaled["ingredients"]:
+            key = (line["ingredient_id"], line["unit"].strip().lower())
+            totals[key] += Decimal(line["amount"])
+            names.setdefault(key, (line["ingredient"], line["unit"]))
+    return [
+        {"ingredient_id": key[0], "ingredient": names[key][0], "amount": str(amount), "unit": names[key][1]}
+        for key, amount in totals.items()
+    ]
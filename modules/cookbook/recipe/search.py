@@ -0,0 +1,90 @@
+import re
+
+from django.db import connection
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+
+from modules.cookbook.recipe_ingredients.models import RecipeIngredient
+
+FTS_TABLE = "recipe_recipe_fts"
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def is_available():
+    """The FTS5 index only exists on SQLite (see migration 0007)."""
+    return connection.vendor == "sqlite"
+
+
+def build_match_expression(query):
+    """
+    Turns free text into an FTS5 expression: every word becomes a quoted
+    prefix term and all terms must match ("tom sup" -> "tom"* "sup"*).
+    """
+    terms = TOKEN_RE.findall(query or "")
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def filter_recipes(queryset, query):
+    """
+    Restricts a Recipe queryset to the matches of query and annotates their
+    BM25 rank as search_rank (lower is better). The FTS table is joined
+    once, so MATCH and the rank are evaluated a single time per query and
+    the database orders and pages all matches without an id list in Python.
+    """
+    expression = build_match_expression(query)
+    if expression is None:
+        return queryset.none()
+    quote = connection.ops.quote_name
+    fts_table = quote(FTS_TABLE)
+    recipe_id = f"{quote(queryset.model._meta.db_table)}.{quote('id')}"
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f"{fts_table}.rowid = {recipe_id}", f"{fts_table} MATCH %s"],
+        params=[expression],
+    ).annotate(search_rank=RawSQL(f"{fts_table}.rank", [], output_field=FloatField()))
+
+
+def index_recipes(recipe_ids):
+    """(Re-)writes the index rows of the given recipes from the current data."""
+    from .models import Recipe
+
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids or not is_available():
+        return
+
+    ingredient_names = {}
+    lines = RecipeIngredient.objects.filter(recipe_id__in=recipe_ids).values_list(
+        "recipe_id", "ingredient__name"
+    )
+    for recipe_id, name in lines:
+        ingredient_names.setdefault(recipe_id, []).append(name)
+
+    rows = [
+        (recipe_id, name, instructions, " ".join(ingredient_names.get(recipe_id, [])))
+        for recipe_id, name, instructions in Recipe.objects.filter(pk__in=recipe_ids).values_list(
+            "id", "name", "instructions"
+        )
+    ]
+
+    remove_recipes(recipe_ids)
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, name, instructions, ingredients) VALUES (%s, %s, %s, %s)",
+            rows,
+        )
+
+
+def remove_recipes(recipe_ids):
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids or not is_available():
+        return
+    placeholders = ", ".join(["%s"] * len(recipe_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", recipe_ids)
+
+
+def recipe_ids_for_ingredient(ingredient_id):
+    return set(RecipeIngredient.objects.filter(ingredient_id=ingredient_id).values_list("recipe_id", flat=True))
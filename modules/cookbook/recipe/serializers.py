@@ -1,7 +1,11 @@
+from django.db import transaction
 from rest_framework import serializers
+from rest_framework.fields import SkipField
 from .models import Recipe 
+from . import cache as recipe_cache
+from .signals import notify_recipes_changed
 from modules.cookbook.recipe_ingredients.serializers import RecipeIngredientSerializer
-from modules.cookbook.ingredients.models import Ingredient 
+from modules.cookbook.recipe_ingredients.utils import create_recipe_ingredients, replace_recipe_ingredients
 from modules.cookbook.favorites.models import Favorite
 # from modules.cookbook.recipe_ingredients.models import RecipeIngredient 
 
@@ -11,6 +15,8 @@ class RecipeSerializer(serializers.ModelSerializer):
     is_favorite = serializers.BooleanField(read_only=True)
     ingredients = RecipeIngredientSerializer(many=True)
     author = serializers.StringRelatedField(read_only=True)
+    image_status = serializers.CharField(read_only=True)
+    images = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
@@ -25,34 +31,107 @@ class RecipeSerializer(serializers.ModelSerializer):
             "portion", 
             "ingredients", 
             "recipe_img", 
+            "image_status",
+            "images",
+            "img_width",
+            "img_height",
+            "img_placeholder",
+            "favorite_count",
             "is_favorite"
             ]
+        read_only_fields = ["img_width", "img_height", "img_placeholder", "favorite_count"]
 
-    def create(self, validated_data):     
-        from modules.cookbook.recipe_ingredients.models import RecipeIngredient   
+    # Everything a recipe list screen needs (?view=card)
+    CARD_FIELDS = [
+        "id", "name", "category", "difficulty", "preparation_time",
+        "recipe_img", "images", "img_width", "img_height", "img_placeholder",
+    ]
+
+    def __init__(self, *args, fields=None, **kwargs):
+        """
+        fields limits the output to a subset of Meta.fields (sparse fieldsets).
+        """
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+    def create(self, validated_data):
+        """
+        Ingredients are resolved and the lines inserted in bulk, so creating a
+        recipe costs the same number of queries for 2 or 25 ingredients.
+        """
         ingredients_data = validated_data.pop("ingredients", [])
-        recipe = Recipe.objects.create(**validated_data)
+        with transaction.atomic():
+            recipe = Recipe.objects.create(**validated_data)
+            if create_recipe_ingredients(recipe, ingredients_data):
+                notify_recipes_changed([recipe.pk])
+        return recipe
 
+    def update(self, instance, validated_data):
+        """
+        Updates the recipe in place. Submitted ingredients are diffed against
+        the current lines: unchanged lines stay, only added, removed and moved
+        lines are written, each in one bulk query.
+        """
+        ingredients_data = validated_data.pop("ingredients", None)
+        with transaction.atomic():
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+            if ingredients_data is not None and replace_recipe_ingredients(instance, ingredients_data):
+                notify_recipes_changed([instance.pk])
+        return instance
 
-        
-        recipe_ingredients = []
-        for ingredient_data in ingredients_data:
-            ingredient_name = ingredient_data["ingredient"].strip().lower()
-            ingredient_unit = ingredient_data["unit"].strip()
-            ingredient, created = Ingredient.objects.get_or_create(name=ingredient_name)
+    # Not cached: per user, per host (absolute image URL), owned by another model
+    # or changed without touching updated_at (favorite_count)
+    PER_REQUEST_FIELDS = ("is_favorite", "recipe_img", "images", "author", "favorite_count")
 
-            recipe_ingredient, _ = RecipeIngredient.objects.get_or_create(
-                ingredient=ingredient, 
-                amount=ingredient_data["amount"],
-                unit=ingredient_unit
-            )
-            recipe_ingredients.append(recipe_ingredient)
-        
-        recipe.ingredients.set(recipe_ingredients)
+    def get_images(self, instance):
+        """
+        URLs of the generated renditions, {"thumbnail": {"webp": url, "jpeg": url}, ...},
+        or None until the background job has finished.
+        """
+        if instance.image_status != "ready" or not instance.recipe_img:
+            return None
+        storage = instance.recipe_img.storage
+        request = self.context.get("request")
 
-        return recipe
+        def url(path):
+            url = storage.url(path)
+            return request.build_absolute_uri(url) if request is not None else url
+
+        return {
+            name: {image_format: url(path) for image_format, path in paths.items()}
+            for name, paths in instance.image_renditions.items()
+        }
 
     def to_representation(self, instance):
-        representation = super().to_representation(instance)
-        representation['name'] = instance.name.capitalize()
+        """
+        The full representation is cached per recipe and version (see
+        cache.py); only PER_REQUEST_FIELDS are rendered on every request.
+        """
+        if set(self.fields) != set(self.Meta.fields) or not getattr(instance, "updated_at", None):
+            return self.represent(instance, self.fields)
+
+        shared = recipe_cache.get_cached(instance)
+        if shared is None:
+            shared = self.represent(instance, [name for name in self.fields if name not in self.PER_REQUEST_FIELDS])
+            recipe_cache.store(instance, shared)
+        representation = dict(shared, **self.represent(instance, self.PER_REQUEST_FIELDS))
+        return {name: representation[name] for name in self.fields if name in representation}
+
+    def represent(self, instance, field_names):
+        """ModelSerializer.to_representation() restricted to field_names."""
+        representation = {}
+        for field in self._readable_fields:
+            if field.field_name not in field_names:
+                continue
+            try:
+                attribute = field.get_attribute(instance)
+            except SkipField:
+                continue
+            representation[field.field_name] = None if attribute is None else field.to_representation(attribute)
+        if 'name' in representation:
+            representation['name'] = instance.name.capitalize()
         return representation
\ No newline at end of file
@@ -0,0 +1,85 @@
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from modules.cookbook.ingredients.models import Ingredient
+from modules.cookbook.recipe_ingredients.models import RecipeIngredient
+from . import cache as recipe_cache
+from . import search
+from .models import Recipe
+
+# Sent with recipe_ids whenever a recipe was saved, deleted or its ingredients
+# changed. Receivers re-read the current state of those recipes (a deleted
+# recipe simply no longer exists) and update their derived data.
+recipes_changed = Signal()
+
+
+def notify_recipes_changed(recipe_ids):
+    recipe_ids = set(recipe_ids)
+    if recipe_ids:
+        recipes_changed.send(sender=Recipe, recipe_ids=recipe_ids)
+
+
+def touch_recipes(recipe_ids):
+    """Bumps updated_at of recipes whose ingredients changed (Recipe.save() does it itself)."""
+    recipe_ids = set(recipe_ids)
+    if recipe_ids:
+        Recipe.objects.filter(pk__in=recipe_ids).update(updated_at=timezone.now())
+
+
+def ingredients_changed(recipe_ids):
+    touch_recipes(recipe_ids)
+    notify_recipes_changed(recipe_ids)
+
+
+@receiver(post_save, sender=Recipe)
+def saved_recipe(sender, instance, raw=False, **kwargs):
+    if not raw:
+        notify_recipes_changed([instance.pk])
+
+
+@receiver(post_delete, sender=Recipe)
+def deleted_recipe(sender, instance, **kwargs):
+    notify_recipes_changed([instance.pk])
+
+
+# Single line saves and deletes (admin, shell) notify right away. Lines
+# deleted by a QuerySet.delete() or a cascade (e.g. deleting ingredients in
+# the admin) are collected per delete() call and notified once it commits;
+# lines deleted together with their recipe are covered by deleted_recipe().
+@receiver(post_save, sender=RecipeIngredient)
+def saved_line(sender, instance, raw=False, **kwargs):
+    if not raw:
+        ingredients_changed([instance.recipe_id])
+
+
+@receiver(post_delete, sender=RecipeIngredient)
+def deleted_line(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Recipe) or (isinstance(origin, QuerySet) and origin.model is Recipe):
+        return
+    if origin is None or isinstance(origin, RecipeIngredient):
+        ingredients_changed([instance.recipe_id])
+        return
+    recipe_ids = getattr(origin, "_deleted_line_recipe_ids", None)
+    if recipe_ids is None:
+        recipe_ids = origin._deleted_line_recipe_ids = set()
+        transaction.on_commit(lambda: ingredients_changed(recipe_ids))
+    recipe_ids.add(instance.recipe_id)
+
+
+@receiver(post_save, sender=Ingredient)
+def renamed_ingredient(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        ingredients_changed(search.recipe_ids_for_ingredient(instance.pk))
+
+
+@receiver(recipes_changed)
+def update_search_index(sender, recipe_ids, **kwargs):
+    search.index_recipes(recipe_ids)
+
+
+@receiver(recipes_changed)
+def invalidate_cached_representations(sender, recipe_ids, **kwargs):
+    recipe_cache.invalidate(recipe_ids)
@@ -1,10 +1,32 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+from PIL import Image
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from modules.cookbook.recipe.models import Recipe
+from modules.cookbook.recipe.serializers import RecipeSerializer
+from modules.cookbook.favorites.models import Favorite
 from modules.cookbook.recipe_ingredients.models import RecipeIngredient
+from modules.cookbook.ingredients import canonical
 from modules.cookbook.ingredients.models import Ingredient
 from django.db.utils import IntegrityError
 from rest_framework.test import APITestCase
+from rest_framework import status
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from modules.cookbook.recipe import cache as recipe_cache
+from modules.cookbook.recipe.counters import ViewCounter, recipe_views
+from modules.cookbook.recipe import images, importer
 
 class RecipeTestCase(TestCase):
     def setUp(self):
@@ -17,11 +39,6 @@ class RecipeTestCase(TestCase):
         )
         
         self.ingredient = Ingredient.objects.create(name="Ei")
-        self.recipe_ingredient = RecipeIngredient.objects.create(
-            ingredient=self.ingredient, 
-            amount=1,
-            unit = "Stück"
-        )
 
         recipe = Recipe.objects.create(
             name="Spiegelei",
@@ -30,7 +47,12 @@ class RecipeTestCase(TestCase):
             difficulty="easy",
             author=user
         )
-        recipe.ingredients.add(self.recipe_ingredient)
+        self.recipe_ingredient = RecipeIngredient.objects.create(
+            recipe=recipe,
+            ingredient=self.ingredient, 
+            amount=1,
+            unit = "Stück"
+        )
 
     def test_recipe_creation(self):
         """
@@ -76,4 +98,1031 @@ class RecipeTestCase(TestCase):
         """
         recipe = Recipe.objects.get(name="spiegelei")
         recipe.delete()
-        self.assertFalse(Recipe.objects.filter(name="spiegelei").exists())
\ No newline at end of file
+        self.assertFalse(Recipe.objects.filter(name="spiegelei").exists())
+
+class RecipeQueryCountTestCase(APITestCase):
+    def setUp(self):
+        """
+        Set up an authenticated user and a helper to create recipes with several ingredient lines.
+        """
+        self.user = get_user_model().objects.create_user(
+            email="querycount@example.com",
+            password="password"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("recipes-list")
+
+    def create_recipes(self, count, start=0):
+        for index in range(start, start + count):
+            recipe = Recipe.objects.create(
+                name=f"Rezept {index}",
+                instructions="Alles verrühren",
+                preparation_time=15,
+                author=self.user
+            )
+            for position in range(3):
+                ingredient, _ = Ingredient.objects.get_or_create(name=f"zutat {index}-{position}")
+                RecipeIngredient.objects.create(
+                    recipe=recipe, ingredient=ingredient, position=position, amount=position + 1, unit="g"
+                )
+
+    def count_list_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+
+    def test_list_query_count_is_constant(self):
+        """
+        The number of queries for the recipe list must not grow with the number of recipes.
+        """
+        self.create_recipes(2)
+        queries_for_few = self.count_list_queries()
+
+        self.create_recipes(20, start=2)
+        queries_for_many = self.count_list_queries()
+
+        self.assertEqual(queries_for_few, queries_for_many)
+        self.assertLessEqual(queries_for_many, 4)
+
+    def test_list_contains_ingredients_and_author(self):
+        """
+        The prefetched read path still returns ingredient names and the author.
+        """
+        self.create_recipes(1)
+        response = self.client.get(self.url)
+        recipe = response.data["results"][0]
+        self.assertEqual(recipe["author"], self.user.email)
+        self.assertEqual(len(recipe["ingredients"]), 3)
+        self.assertEqual(recipe["ingredients"][0]["ingredient"], "Zutat 0-0")
+
+    def test_detail_query_count(self):
+        """
+        Retrieving a single recipe needs a fixed number of queries.
+        """
+        self.create_recipes(1)
+        recipe = Recipe.objects.get()
+        url = reverse("recipes-detail", kwargs={"pk": recipe.id})
+        recipe_views.reset()
+        # ETag validator, recipe with author, ingredient lines; the view is only buffered
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data["is_favorite"])
+
+
+class RecipeSearchTestCase(APITestCase):
+    def setUp(self):
+        """
+        Set up an authenticated user and a few recipes for full-text search.
+        """
+        self.user = get_user_model().objects.create_user(
+            email="search@example.com",
+            password="password"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("recipes-list")
+
+        self.soup = self.create_recipe("Tomatensuppe", "Tomaten kochen und pürieren", ["tomate", "zwiebel"])
+        self.salad = self.create_recipe("Gurkensalat", "Gurken hobeln", ["gurke", "dill"])
+        self.pasta = self.create_recipe("Nudeln", "Nudeln kochen, Soße aus Tomaten", ["nudeln", "tomate"])
+
+    def create_recipe(self, name, instructions, ingredient_names):
+        recipe = Recipe.objects.create(
+            name=name,
+            instructions=instructions,
+            preparation_time=20,
+            author=self.user
+        )
+        for ingredient_name in ingredient_names:
+            ingredient, _ = Ingredient.objects.get_or_create(name=ingredient_name)
+            RecipeIngredient.objects.create(recipe=recipe, ingredient=ingredient, amount=1, unit="Stück")
+        return recipe
+
+    def search(self, query):
+        response = self.client.get(self.url, {"q": query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [recipe["id"] for recipe in response.data["results"]]
+
+    def test_search_matches_prefix_and_ranks_name_first(self):
+        """
+        A prefix matches name, instructions and ingredients; a hit in the name ranks first.
+        """
+        self.assertEqual(self.search("tomat"), [self.soup.id, self.pasta.id])
+
+    def test_search_matches_ingredient_names(self):
+        """
+        Ingredient names are part of the index.
+        """
+        self.assertEqual(self.search("dill"), [self.salad.id])
+
+    def test_search_requires_all_terms(self):
+        """
+        All words of the query must match.
+        """
+        self.assertEqual(self.search("nudel tomat"), [self.pasta.id])
+        self.assertEqual(self.search("gurke tomate"), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        """
+        Renaming a recipe, changing its ingredients and deleting it keeps the index in sync.
+        """
+        self.salad.name = "Kartoffelsalat"
+        self.salad.save()
+        self.assertEqual(self.search("kartoffel"), [self.salad.id])
+        self.assertEqual(self.search("gurkensalat"), [])
+
+        for line in self.salad.ingredients.all():
+            line.delete()
+        self.assertEqual(self.search("dill"), [])
+
+        self.soup.delete()
+        self.assertEqual(self.search("tomat"), [self.pasta.id])
+
+    def test_search_follows_ingredient_rename(self):
+        """
+        Renaming an ingredient updates every recipe that uses it.
+        """
+        ingredient = Ingredient.objects.get(name="dill")
+        ingredient.name = "petersilie"
+        ingredient.save()
+        self.assertEqual(self.search("petersil"), [self.salad.id])
+
+    def test_cascaded_line_deletes_update_the_index(self):
+        """
+        Lines deleted with their ingredient (admin delete action) are removed from the index in one update.
+        """
+        updated_at = self.salad.updated_at
+        with mock.patch.object(recipe_cache, "invalidate", wraps=recipe_cache.invalidate) as invalidate:
+            with self.captureOnCommitCallbacks(execute=True):
+                Ingredient.objects.filter(name__in=["dill", "gurke"]).delete()
+        self.assertEqual(invalidate.call_count, 1)
+        self.assertEqual(self.search("dill"), [])
+        self.salad.refresh_from_db()
+        self.assertGreater(self.salad.updated_at, updated_at)
+
+    def test_search_results_are_paginated(self):
+        """
+        Search results are paged by rank.
+        """
+        response = self.client.get(self.url, {"q": "tomat", "page_size": 1})
+        self.assertEqual([recipe["id"] for recipe in response.data["results"]], [self.soup.id])
+        response = self.client.get(response.data["next"])
+        self.assertEqual([recipe["id"] for recipe in response.data["results"]], [self.pasta.id])
+
+    def test_search_pages_through_all_matches(self):
+        """
+        Every match is reachable page by page, also when ranks are tied.
+        """
+        eintopf = [self.create_recipe(f"Eintopf {number}", "Tomaten schmoren", ["tomate"]) for number in range(5)]
+        expected = {self.soup.id, self.pasta.id, *(recipe.id for recipe in eintopf)}
+
+        seen = []
+        response = self.client.get(self.url, {"q": "tomat", "page_size": 2})
+        while True:
+            seen.extend(recipe["id"] for recipe in response.data["results"])
+            if not response.data["next"]:
+                break
+            response = self.client.get(response.data["next"])
+        self.assertEqual(sorted(seen), sorted(expected))
+        self.assertEqual(seen[0], self.soup.id)
+
+    def test_search_joins_the_index_once(self):
+        """
+        The page query joins the FTS table and evaluates MATCH a single time.
+        """
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.search("tomat"), [self.soup.id, self.pasta.id])
+        searches = [query["sql"] for query in context.captured_queries if "MATCH" in query["sql"]]
+        self.assertEqual(len(searches), 1)
+        self.assertEqual(searches[0].count("MATCH"), 1)
+
+
+class RecipeCreateTestCase(APITestCase):
+    def setUp(self):
+        """
+        Set up an authenticated user and an existing ingredient line.
+        """
+        self.user = get_user_model().objects.create_user(
+            email="create@example.com",
+            password="password"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("recipes-list")
+        self.egg = Ingredient.objects.create(name="ei")
+
+    def payload(self, ingredients):
+        return {
+            "name": "Testrezept",
+            "instructions": "Alles vermengen",
+            "preparation_time": 30,
+            "ingredients": ingredients,
+        }
+
+    def count_create_queries(self, ingredient_count, prefix):
+        ingredients = [
+            {"ingredient": f"{prefix} {index}", "amount": "1.5", "unit": "g"}
+            for index in range(ingredient_count)
+        ]
+        # both runs start with a cold interning cache
+        canonical.interned.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(self.url, self.payload(ingredients), format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return len(context.captured_queries)
+
+    def test_create_query_count_does_not_grow_with_ingredients(self):
+        """
+        Creating a recipe with 25 ingredients needs as many queries as with 2.
+        """
+        self.assertEqual(self.count_create_queries(2, "klein"), self.count_create_queries(25, "groß"))
+
+    def test_create_reuses_existing_ingredients_and_keeps_line_order(self):
+        """
+        Existing ingredients are reused instead of duplicated; the lines belong
+        to the recipe and keep the submitted order and notes.
+        """
+        response = self.client.post(self.url, self.payload([
+            {"ingredient": "Milch", "amount": "200", "unit": "ml"},
+            {"ingredient": " Ei ", "amount": "2", "unit": "Stück ", "note": "zimmerwarm"},
+            {"ingredient": "milch", "amount": "100", "unit": "ml", "note": "zum Verdünnen"},
+        ]), format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        recipe = Recipe.objects.get(pk=response.data["id"])
+        self.assertEqual(
+            list(recipe.ingredients.values_list("position", "ingredient__name", "unit", "note")),
+            [(0, "milch", "ml", ""), (1, "ei", "Stück", "zimmerwarm"), (2, "milch", "ml", "zum Verdünnen")],
+        )
+        self.assertEqual(Ingredient.objects.filter(name="ei").get(), self.egg)
+        self.assertEqual(Ingredient.objects.filter(name="milch").count(), 1)
+        self.assertEqual(
+            [line["note"] for line in response.data["ingredients"]], ["", "zimmerwarm", "zum Verdünnen"]
+        )
+        self.assertEqual(recipe.author, self.user)
+
+
+class RecipeUpdateTestCase(APITestCase):
+    def setUp(self):
+        """
+        Set up an authenticated user and a recipe with three ingredient lines.
+        """
+        self.user = get_user_model().objects.create_user(email="update@example.com", password="password")
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(reverse("recipes-list"), {
+            "name": "Pfannkuchen",
+            "instructions": "Verrühren und braten",
+            "preparation_time": 20,
+            "ingredients": [
+                {"ingredient": "Ei", "amount": "2", "unit": "Stück"},
+                {"ingredient": "Mehl", "amount": "200", "unit": "g"},
+                {"ingredient": "Milch", "amount": "300", "unit": "ml"},
+            ],
+        }, format="json")
+        self.recipe = Recipe.objects.get(pk=response.data["id"])
+        self.url = reverse("recipes-detail", kwargs={"pk": self.recipe.id})
+
+    def lines(self):
+        return {str(line) for line in self.recipe.ingredients.select_related("ingredient")}
+
+    def test_put_diffs_ingredient_lines(self):
+        """
+        Unchanged lines are kept, changed ones replaced; the recipe keeps its id and favorites.
+        """
+        Favorite.objects.create(user=self.user, recipe=self.recipe)
+        kept = set(self.recipe.ingredients.filter(ingredient__name__in=["ei", "mehl"]).values_list("id", flat=True))
+        response = self.client.put(self.url, {
+            "name": "Pfannkuchen",
+            "instructions": "Verrühren und braten",
+            "preparation_time": 25,
+            "ingredients": [
+                {"ingredient": "Ei", "amount": "2", "unit": "Stück"},
+                {"ingredient": "Mehl", "amount": "200", "unit": "g"},
+                {"ingredient": "Milch", "amount": "250", "unit": "ml"},
+                {"ingredient": "Zucker", "amount": "1", "unit": "EL"},
+            ],
+        }, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["preparation_time"], 25)
+        self.assertEqual(len(response.data["ingredients"]), 4)
+        self.assertTrue(response.data["is_favorite"])
+        self.assertEqual(
+            self.lines(), {"2.00 Stück Ei", "200.00 g Mehl", "250.00 ml Milch", "1.00 EL Zucker"}
+        )
+        self.assertTrue(kept <= set(self.recipe.ingredients.values_list("id", flat=True)))
+
+    def test_patch_without_ingredients_keeps_lines(self):
+        """
+        A PATCH of other fields leaves the ingredient lines alone.
+        """
+        response = self.client.patch(self.url, {"instructions": "Nur braten"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["instructions"], "Nur braten")
+        self.assertEqual(len(self.lines()), 3)
+
+    def test_update_query_count_does_not_grow_with_ingredients(self):
+        """
+        Replacing 2 or 20 lines costs the same number of queries.
+        """
+        def count_queries(prefix, count):
+            ingredients = [{"ingredient": f"{prefix} {index}", "amount": "1", "unit": "g"} for index in range(count)]
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.patch(self.url, {"ingredients": ingredients}, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(context.captured_queries)
+
+        count_queries("start", 3)
+        self.assertEqual(count_queries("klein", 2), count_queries("groß", 20))
+
+    def test_reordering_lines_only_renumbers_them(self):
+        """
+        Moving lines around keeps their rows and changes only their positions.
+        """
+        ids = {line.ingredient.name: line.id for line in self.recipe.ingredients.select_related("ingredient")}
+        response = self.client.patch(self.url, {"ingredients": [
+            {"ingredient": "Milch", "amount": "300", "unit": "ml"},
+            {"ingredient": "Ei", "amount": "2", "unit": "Stück"},
+            {"ingredient": "Mehl", "amount": "200", "unit": "g"},
+        ]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([line["ingredient"] for line in response.data["ingredients"]], ["Milch", "Ei", "Mehl"])
+        self.assertEqual(
+            list(self.recipe.ingredients.values_list("id", flat=True)),
+            [ids["milch"], ids["ei"], ids["mehl"]],
+        )
+
+    def test_deleting_the_recipe_deletes_its_lines(self):
+        """
+        Ingredient lines belong to one recipe and go away with it.
+        """
+        self.recipe.delete()
+        self.assertFalse(RecipeIngredient.objects.exists())
+
+    def test_only_the_author_may_change_the_recipe(self):
+        """
+        Other users can read the recipe but get 403 for PUT, PATCH and DELETE.
+        """
+        other = get_user_model().objects.create_user(email="other-update@example.com", password="password")
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        response = self.client.patch(self.url, {"name": "Gestohlen"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.put(self.url, {
+            "name": "Gestohlen", "instructions": "-", "preparation_time": 1, "ingredients": [],
+        }, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.delete(self.url).status_code, status.HTTP_403_FORBIDDEN)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.name, "pfannkuchen")
+        self.assertEqual(len(self.lines()), 3)
+
+
+class RecipeImportTestCase(APITestCase):
+    def setUp(self):
+        """
+        Set up an authenticated user and the import endpoint.
+        """
+        self.user = get_user_model().objects.create_user(
+            email="import@example.com",
+            password="password"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("recipes-import-recipes")
+
+    def jsonl(self, *records):
+        return "\n".join(record if isinstance(record, str) else json.dumps(record) for record in records)
+
+    def recipe(self, name, *ingredient_names):
+        return {
+            "name": name,
+            "instructions": "Kochen",
+            "preparation_time": 10,
+            "ingredients": [
+                {"ingredient": ingredient_name, "amount": "1", "unit": "Stück"}
+                for ingredient_name in ingredient_names
+            ],
+        }
+
+    def test_import_endpoint_creates_recipes_and_reports_errors(self):
+        """
+        Valid lines are imported, invalid lines are reported with their line number.
+        """
+        body = self.jsonl(
+            self.recipe("Rührei", "Ei", "Salz"),
+            "{kein json",
+            {"name": "Ohne Zutaten"},
+            "",
+            self.recipe("Spiegelei", "ei", "salz", "Pfeffer"),
+        )
+        response = self.client.post(self.url, body, content_type="application/x-ndjson")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(response.data["failed"], 2)
+        self.assertEqual([error["line"] for error in response.data["errors"]], [2, 3])
+
+        recipe = Recipe.objects.get(name="spiegelei")
+        self.assertEqual(recipe.author, self.user)
+        self.assertEqual(recipe.ingredients.count(), 3)
+        self.assertEqual(Ingredient.objects.filter(name="ei").count(), 1)
+        self.assertEqual(RecipeIngredient.objects.count(), 5)
+
+    def test_imported_recipes_are_searchable(self):
+        """
+        Imported recipes are added to the search index.
+        """
+        self.client.post(self.url, self.jsonl(self.recipe("Kürbissuppe", "Kürbis")), content_type="application/x-ndjson")
+        response = self.client.get(reverse("recipes-list"), {"q": "kürbis"})
+        self.assertEqual(len(response.data["results"]), 1)
+
+    def test_import_command_writes_in_chunks(self):
+        """
+        The management command imports a file chunk by chunk and reports progress.
+        """
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False, encoding="utf-8") as file:
+            file.write(self.jsonl(*[self.recipe(f"Rezept {index}", "Mehl", f"Zutat {index}") for index in range(5)]))
+        self.addCleanup(os.remove, file.name)
+
+        stdout = StringIO()
+        call_command("import_recipes", file.name, author=self.user.email, chunk_size=2, stdout=stdout)
+        self.assertEqual(Recipe.objects.count(), 5)
+        self.assertEqual(Ingredient.objects.filter(name="mehl").count(), 1)
+        self.assertIn("Imported 5 recipes, 0 lines failed.", stdout.getvalue())
+        self.assertEqual(stdout.getvalue().count("so far"), 3)
+
+    def test_failed_chunk_is_retried_line_by_line(self):
+        """
+        A chunk that cannot be saved is retried per line: only the broken line fails
+        and ingredient ids of rolled back writes are not reused.
+        """
+        build = importer.build_recipe_ingredients
+
+        def build_or_fail(recipe, lines, **kwargs):
+            if recipe.name == "kaputt":
+                raise IntegrityError("broken line")
+            return build(recipe, lines, **kwargs)
+
+        recipe_importer = importer.RecipeImporter(self.user, chunk_size=3)
+        with mock.patch.object(importer, "build_recipe_ingredients", build_or_fail):
+            report = recipe_importer.run([
+                json.dumps(self.recipe("Rührei", "Ei")),
+                json.dumps(self.recipe("Kaputt", "Trüffel")),
+                json.dumps(self.recipe("Omelett", "Ei", "Käse")),
+            ])
+        self.assertEqual(report["created"], 2)
+        self.assertEqual(report["failed"], 1)
+        self.assertEqual([error["line"] for error in report["errors"]], [2])
+        self.assertEqual(set(Recipe.objects.values_list("name", flat=True)), {"rührei", "omelett"})
+        self.assertNotIn("trüffel", recipe_importer.ingredient_ids)
+        self.assertEqual(
+            set(Ingredient.objects.filter(name__in=recipe_importer.ingredient_ids).values_list("id", flat=True)),
+            set(recipe_importer.ingredient_ids.values()),
+        )
+
+
+class RecipeExportTestCase(APITestCase):
+    def setUp(self):
+        """
+        Set up two users with one recipe each.
+        """
+        self.user = get_user_model().objects.create_user(
+            email="export@example.com",
+            password="password"
+        )
+        other_user = get_user_model().objects.create_user(
+            email="other@example.com",
+            password="password"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("recipes-export")
+
+        self.recipe = Recipe.objects.create(name="Rührei", instructions="Braten", preparation_time=5, author=self.user)
+        for name, amount in [("ei", 3), ("salz", 1)]:
+            RecipeIngredient.objects.create(
+                recipe=self.recipe, ingredient=Ingredient.objects.create(name=name), amount=amount, unit="Stück"
+            )
+        Recipe.objects.create(name="Fremdes Rezept", instructions="-", preparation_time=5, author=other_user)
+
+    def test_export_streams_own_recipes_as_ndjson(self):
+        """
+        Only the user's own recipes are exported, one JSON object per line.
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["name"], "Rührei")
+        self.assertEqual(rows[0]["ingredients"][0], {"ingredient": "Ei", "amount": "3.00", "unit": "Stück"})
+
+    def test_export_as_csv_flattens_ingredients(self):
+        """
+        The CSV export puts all ingredient lines of a recipe into one column.
+        """
+        response = self.client.get(self.url, HTTP_ACCEPT="text/csv")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="recipes.csv"')
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].endswith("3.00 Stück Ei; 1.00 Stück Salz"))
+
+
+class RecipeSparseFieldsTestCase(APITestCase):
+    def setUp(self):
+        """
+        Set up an authenticated user and a recipe with ingredients.
+        """
+        self.user = get_user_model().objects.create_user(
+            email="fields@example.com",
+            password="password"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("recipes-list")
+        self.recipe = Recipe.objects.create(
+            name="Pfannkuchen", instructions="Teig rühren und backen", preparation_time=25, author=self.user
+        )
+        for name in ["mehl", "milch", "ei"]:
+            RecipeIngredient.objects.create(
+                recipe=self.recipe, ingredient=Ingredient.objects.create(name=name), amount=1, unit="Stück"
+            )
+
+    def test_card_view_returns_only_card_fields(self):
+        """
+        ?view=card returns the list projection in a single query.
+        """
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {"view": "card"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(response.data["results"][0]),
+            set(RecipeSerializer.CARD_FIELDS),
+        )
+        self.assertEqual(response.data["results"][0]["name"], "Pfannkuchen")
+
+    def test_fields_parameter_selects_fields(self):
+        """
+        ?fields= returns the requested fields and ignores unknown ones.
+        """
+        response = self.client.get(self.url, {"fields": "id,ingredients,unknown"})
+        self.assertEqual(set(response.data["results"][0]), {"id", "ingredients"})
+        self.assertEqual(len(response.data["results"][0]["ingredients"]), 3)
+
+    def test_fields_parameter_on_detail(self):
+        """
+        Sparse fieldsets also work on the detail endpoint.
+        """
+        url = reverse("recipes-detail", kwargs={"pk": self.recipe.id})
+        response = self.client.get(url, {"fields": "name,is_favorite"})
+        self.assertEqual(response.data, {"name": "Pfannkuchen", "is_favorite": False})
+
+    def test_full_representation_without_parameters(self):
+        """
+        Without parameters the full representation is returned.
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(set(response.data["results"][0]), set(RecipeSerializer.Meta.fields))
+
+
+class RecipeConditionalGetTestCase(APITestCase):
+    def setUp(self):
+        """
+        Set up an authenticated user and a recipe.
+        """
+        self.user = get_user_model().objects.create_user(
+            email="etag@example.com",
+            password="password"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.recipe = Recipe.objects.create(name="Toast", instructions="Toasten", preparation_time=3, author=self.user)
+        self.url = reverse("recipes-detail", kwargs={"pk": self.recipe.id})
+
+    def test_unchanged_recipe_returns_304_with_one_query(self):
+        """
+        A matching If-None-Match is answered from the validator query alone.
+        """
+        etag = self.client.get(self.url)["ETag"]
+        recipe_views.reset()
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_etag_changes_with_ingredients_and_favorites(self):
+        """
+        Adding an ingredient line or a favorite changes the ETag.
+        """
+        etag = self.client.get(self.url)["ETag"]
+        RecipeIngredient.objects.create(
+            recipe=self.recipe, ingredient=Ingredient.objects.create(name="brot"), amount=1, unit="Scheibe"
+        )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        etag = response["ETag"]
+        Favorite.objects.create(user=self.user, recipe=self.recipe)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data["is_favorite"])
+
+    def test_etag_depends_on_fieldset(self):
+        """
+        Different sparse fieldsets have different ETags.
+        """
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, {"view": "card"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class RecipeRepresentationCacheTestCase(APITestCase):
+    def setUp(self):
+        """
+        Set up two users and a recipe with one ingredient line; start with an empty cache.
+        """
+        recipe_cache.get_cache().clear()
+        self.user = get_user_model().objects.create_user(email="cache@example.com", password="password")
+        self.other_user = get_user_model().objects.create_user(email="other@example.com", password="password")
+        self.client.force_authenticate(user=self.user)
+        self.ingredient = Ingredient.objects.create(name="tomate")
+        self.recipe = Recipe.objects.create(name="Salat", instructions="Schneiden", preparation_time=5, author=self.user)
+        RecipeIngredient.objects.create(recipe=self.recipe, ingredient=self.ingredient, amount=2, unit="Stück")
+        self.url = reverse("recipes-detail", kwargs={"pk": self.recipe.id})
+
+    def test_repeated_reads_are_served_from_cache(self):
+        """
+        A change that neither bumps updated_at nor sends recipes_changed is not
+        visible, i.e. the second response came from the cache.
+        """
+        self.client.get(self.url)
+        Recipe.objects.filter(pk=self.recipe.pk).update(instructions="Geändert")
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["instructions"], "Schneiden")
+
+    def test_recipe_and_ingredient_changes_invalidate(self):
+        """
+        Saving the recipe, renaming an ingredient and adding a line all show up.
+        """
+        self.client.get(self.url)
+        self.recipe.instructions = "Waschen und schneiden"
+        self.recipe.save()
+        self.assertEqual(self.client.get(self.url).data["instructions"], "Waschen und schneiden")
+
+        self.ingredient.name = "tomaten"
+        self.ingredient.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["ingredients"][0]["ingredient"], "Tomaten")
+
+        RecipeIngredient.objects.create(
+            recipe=self.recipe, ingredient=Ingredient.objects.create(name="gurke"), position=1, amount=1, unit="Stück"
+        )
+        self.assertEqual(len(self.client.get(self.url).data["ingredients"]), 2)
+
+    def test_is_favorite_is_not_cached(self):
+        """
+        is_favorite stays per user although the rest of the recipe is cached.
+        """
+        Favorite.objects.create(user=self.user, recipe=self.recipe)
+        self.assertTrue(self.client.get(self.url).data["is_favorite"])
+        self.client.force_authenticate(user=self.other_user)
+        self.assertFalse(self.client.get(self.url).data["is_favorite"])
+
+    def test_cached_representation_matches_uncached(self):
+        """
+        Cache hits return the same fields in the same order.
+        """
+        first = self.client.get(self.url).data
+        second = self.client.get(self.url).data
+        self.assertEqual(list(first), RecipeSerializer.Meta.fields)
+        self.assertEqual(first, second)
+
+
+class RecipeImageTestCase(APITestCase):
+    def setUp(self):
+        """
+        Set up a user and a recipe; uploads go to a temporary MEDIA_ROOT.
+        """
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, RECIPE_IMAGE_PROCESSING="sync")
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = get_user_model().objects.create_user(email="image@example.com", password="password")
+        self.client.force_authenticate(user=self.user)
+        self.recipe = Recipe.objects.create(name="Pizza", instructions="Backen", preparation_time=30, author=self.user)
+        self.url = reverse("recipes-detail", kwargs={"pk": self.recipe.id})
+
+    def upload(self, content=None):
+        if content is None:
+            buffer = BytesIO()
+            Image.new("RGB", (2000, 1000), "red").save(buffer, format="PNG")
+            content = buffer.getvalue()
+        self.recipe.recipe_img = SimpleUploadedFile("pizza.png", content, content_type="image/png")
+        self.recipe.save()
+
+    def test_jpeg_upload_gets_dimensions_and_placeholder_right_away(self):
+        """
+        Size (after EXIF rotation) and the inline placeholder are known before the job ran.
+        """
+        exif = Image.Exif()
+        exif[0x0112] = 6  # rotated 90 degrees: stored 1200x800, displayed 800x1200
+        buffer = BytesIO()
+        Image.new("RGB", (1200, 800), "green").save(buffer, format="JPEG", exif=exif)
+        with self.captureOnCommitCallbacks(execute=False):
+            self.upload(buffer.getvalue())
+
+        response = self.client.get(reverse("recipes-list"), {"view": "card"})
+        card = response.data["results"][0]
+        self.assertEqual((card["img_width"], card["img_height"]), (800, 1200))
+        self.assertTrue(card["img_placeholder"].startswith("data:image/jpeg;base64,"))
+        self.assertLess(len(card["img_placeholder"]), 2000)
+
+    def test_placeholder_of_other_formats_comes_from_the_job(self):
+        """
+        PNGs are not decoded during the upload; the rendition job adds the placeholder.
+        """
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.upload()
+        self.assertEqual((self.recipe.img_width, self.recipe.img_height), (2000, 1000))
+        self.assertEqual(self.recipe.img_placeholder, "")
+        callbacks[0]()
+        self.recipe.refresh_from_db()
+        self.assertTrue(self.recipe.img_placeholder.startswith("data:image/jpeg;base64,"))
+
+    def test_upload_is_stored_as_is_and_processed_after_commit(self):
+        """
+        The original is kept untouched; renditions appear once the job ran.
+        """
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.upload()
+        self.assertEqual(len(callbacks), 1)
+        self.assertTrue(self.recipe.recipe_img.name.endswith(".png"))
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["image_status"], "pending")
+        self.assertIsNone(response.data["images"])
+
+        callbacks[0]()
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["image_status"], "ready")
+        self.assertEqual(set(response.data["images"]), {"thumbnail", "card", "full"})
+        self.assertTrue(response.data["images"]["card"]["webp"].startswith("http://testserver/media/"))
+
+        self.recipe.refresh_from_db()
+        storage = self.recipe.recipe_img.storage
+        with storage.open(self.recipe.image_renditions["card"]["jpeg"]) as card:
+            self.assertEqual(Image.open(card).size, (500, 250))
+        with storage.open(self.recipe.image_renditions["full"]["webp"]) as full:
+            self.assertEqual(Image.open(full).format, "WEBP")
+
+    def test_broken_image_is_marked_failed(self):
+        """
+        Files Pillow cannot read end up as failed instead of raising.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload(b"not an image")
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["image_status"], "failed")
+        self.assertIsNone(response.data["images"])
+
+    def test_command_processes_pending_images(self):
+        """
+        process_recipe_images picks up recipes whose job never ran.
+        """
+        with self.captureOnCommitCallbacks(execute=False):
+            self.upload()
+        out = StringIO()
+        call_command("process_recipe_images", stdout=out)
+        self.assertIn("Processed 1 recipe images, 0 failed.", out.getvalue())
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_status, "ready")
+
+    def test_identical_uploads_share_one_content_addressed_file(self):
+        """
+        Files are named by their sha256, so the same image is stored once.
+        """
+        with self.captureOnCommitCallbacks(execute=False):
+            self.upload()
+        other = Recipe.objects.create(name="Pasta", instructions="Kochen", preparation_time=10, author=self.user)
+        other.recipe_img = SimpleUploadedFile("other-name.PNG", self.recipe.recipe_img.read(), content_type="image/png")
+        with self.captureOnCommitCallbacks(execute=False):
+            other.save()
+        self.assertEqual(other.recipe_img.name, self.recipe.recipe_img.name)
+        self.assertRegex(self.recipe.recipe_img.name, r"^images/recipes/[0-9a-f]{2}/[0-9a-f]{64}\.png$")
+
+    def test_racing_identical_writes_leave_one_complete_file(self):
+        """
+        A second write of the same content replaces the file atomically instead of renaming it.
+        """
+        storage = Recipe._meta.get_field("recipe_img").storage
+        name = storage.save("images/recipes/a.txt", ContentFile(b"content"))
+        # both writers missed the other's file
+        self.assertEqual(storage._save(name, ContentFile(b"content")), name)
+        directory = os.path.dirname(storage.path(name))
+        self.assertEqual(os.listdir(directory), [os.path.basename(name)])
+        with storage.open(name) as file:
+            self.assertEqual(file.read(), b"content")
+
+    def test_unreferenced_files_are_collected(self):
+        """
+        Replaced images and their renditions are deleted once the grace period is over.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload()
+        self.recipe.refresh_from_db()
+        old_files = {self.recipe.recipe_img.name} | {
+            path for formats in self.recipe.image_renditions.values() for path in formats.values()
+        }
+        buffer = BytesIO()
+        Image.new("RGB", (200, 100), "blue").save(buffer, format="PNG")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload(buffer.getvalue())
+        self.recipe.refresh_from_db()
+        storage = self.recipe.recipe_img.storage
+
+        self.assertEqual(images.collect_unused_files(), (0, 0))
+        later = timezone.now() + images.COLLECT_GRACE_PERIOD + timedelta(minutes=1)
+        self.assertEqual(images.collect_unused_files(dry_run=True, now=later), (12, 7))
+        self.assertEqual(images.collect_unused_files(now=later), (12, 7))
+        self.assertFalse(any(storage.exists(name) for name in old_files))
+        self.assertTrue(storage.exists(self.recipe.recipe_img.name))
+        self.assertTrue(storage.exists(self.recipe.image_renditions["card"]["webp"]))
+
+    def test_media_is_served_immutable_with_ranges(self):
+        """
+        Content-addressed files get a strong ETag, immutable caching and byte ranges.
+        """
+        with self.captureOnCommitCallbacks(execute=False):
+            self.upload()
+        url = self.recipe.recipe_img.url
+        size = self.recipe.recipe_img.size
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b"".join(response.streaming_content), self.recipe.recipe_img.open("rb").read())
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        etag = response["ETag"]
+        self.assertFalse(etag.startswith("W/"))
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(url, HTTP_RANGE="bytes=0-9")
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(response["Content-Range"], f"bytes 0-9/{size}")
+        self.assertEqual(len(b"".join(response.streaming_content)), 10)
+
+        response = self.client.get(url, HTTP_RANGE="bytes=-4")
+        self.assertEqual(response["Content-Range"], f"bytes {size - 4}-{size - 1}/{size}")
+
+        response = self.client.get(url, HTTP_RANGE=f"bytes={size}-")
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+        response = self.client.get(url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"outdated"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_media_outside_media_root_is_not_served(self):
+        """
+        Paths escaping MEDIA_ROOT answer 404.
+        """
+        response = self.client.get("/media/../manage.py")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class RecipeScalingTestCase(APITestCase):
+    def setUp(self):
+        """
+        Set up a pancake recipe for 4 portions and an omelette for 2.
+        """
+        self.user = get_user_model().objects.create_user(email="scale@example.com", password="password")
+        self.client.force_authenticate(user=self.user)
+        self.pancakes = Recipe.objects.create(
+            name="Pfannkuchen", instructions="Braten", preparation_time=20, author=self.user, portion=4
+        )
+        self.omelette = Recipe.objects.create(
+            name="Omelett", instructions="Braten", preparation_time=10, author=self.user, portion=2
+        )
+        egg = Ingredient.objects.create(name="ei")
+        flour = Ingredient.objects.create(name="mehl")
+        milk = Ingredient.objects.create(name="milch")
+        for recipe, ingredient, amount, unit in [
+            (self.pancakes, egg, 3, "Stück"),
+            (self.pancakes, flour, 250, "Gramm"),
+            (self.pancakes, milk, "0.5", "l"),
+            (self.omelette, egg, 3, "Stück"),
+        ]:
+            RecipeIngredient.objects.create(recipe=recipe, ingredient=ingredient, amount=amount, unit=unit)
+
+    def amounts(self, scaled):
+        return {line["ingredient"]: line["amount"] for line in scaled["ingredients"]}
+
+    def test_scaled_amounts_are_rounded_per_unit(self):
+        """
+        Pieces round to halves, grams to whole grams, litres to 10 ml.
+        """
+        url = reverse("recipes-scaled", kwargs={"pk": self.pancakes.id})
+        response = self.client.get(url, {"portions": 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["portions"], 3)
+        self.assertEqual(self.amounts(response.data), {"Ei": "2.50", "Mehl": "188.00", "Milch": "0.38"})
+
+        response = self.client.get(url, {"portions": 1})
+        self.assertEqual(self.amounts(response.data)["Ei"], "1.00")
+
+        response = self.client.get(url)
+        self.assertEqual(self.amounts(response.data), {"Ei": "3.00", "Mehl": "250.00", "Milch": "0.50"})
+
+    def test_invalid_portions(self):
+        """
+        portions must be a positive number.
+        """
+        url = reverse("recipes-scaled", kwargs={"pk": self.pancakes.id})
+        for value in ["0", "-2", "viele"]:
+            response = self.client.get(url, {"portions": value})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_batch_scaling_sums_totals(self):
+        """
+        The batch variant scales all recipes with a constant number of queries and adds them up.
+        """
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                reverse("recipes-scaled-batch"), {"recipes": f"{self.pancakes.id}:8,{self.omelette.id}"}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([recipe["portions"] for recipe in response.data["recipes"]], [8, 2])
+        totals = {line["ingredient"]: line["amount"] for line in response.data["totals"]}
+        self.assertEqual(totals, {"Ei": "9.00", "Mehl": "500.00", "Milch": "1.00"})
+
+        response = self.client.get(reverse("recipes-scaled-batch"), {"recipes": "abc"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RecipeViewCounterTestCase(APITestCase):
+    def setUp(self):
+        """
+        Set up an authenticated user, two recipes and an empty view buffer.
+        """
+        recipe_views.reset()
+        self.user = get_user_model().objects.create_user(email="views@example.com", password="password")
+        self.client.force_authenticate(user=self.user)
+        self.soup = Recipe.objects.create(name="Suppe", instructions="Kochen", preparation_time=20, author=self.user)
+        self.salad = Recipe.objects.create(name="Salat", instructions="Schneiden", preparation_time=5, author=self.user)
+
+    def view_counts(self):
+        return dict(Recipe.objects.values_list("id", "view_count"))
+
+    def test_views_are_buffered_and_flushed_in_one_update(self):
+        """
+        Views are only counted in memory until the flush writes all of them at once.
+        """
+        for recipe, views in [(self.soup, 3), (self.salad, 1)]:
+            for _ in range(views):
+                self.client.get(reverse("recipes-detail", kwargs={"pk": recipe.id}))
+        self.assertEqual(self.view_counts(), {self.soup.id: 0, self.salad.id: 0})
+
+        # savepoint, the UPDATE ... CASE, the insert of trending events, release
+        with self.assertNumQueries(4):
+            self.assertEqual(recipe_views.flush(), 4)
+        self.assertEqual(self.view_counts(), {self.soup.id: 3, self.salad.id: 1})
+        self.assertEqual(recipe_views.flush(), 0)
+
+    def test_flush_after_n_events(self):
+        """
+        The buffer flushes by itself once RECIPE_VIEW_FLUSH_EVENTS views were counted.
+        """
+        with override_settings(RECIPE_VIEW_FLUSH_EVENTS=3):
+            for _ in range(3):
+                recipe_views.add(self.soup.id)
+        self.assertEqual(self.view_counts()[self.soup.id], 3)
+
+    def test_flush_adds_to_counts_of_other_workers(self):
+        """
+        A flush adds its views to what other processes already wrote.
+        """
+        Recipe.objects.filter(pk=self.soup.pk).update(view_count=10)
+        recipe_views.add(self.soup.id)
+        recipe_views.flush()
+        self.assertEqual(self.view_counts()[self.soup.id], 11)
+
+    def test_idle_buffer_is_flushed_once_due(self):
+        """
+        The flush thread writes views that are RECIPE_VIEW_FLUSH_SECONDS old without new views arriving.
+        """
+        recipe_views.add(self.soup.id)
+        self.assertEqual(recipe_views.flush_if_due(), 0)
+        with override_settings(RECIPE_VIEW_FLUSH_SECONDS=0):
+            self.assertEqual(recipe_views.flush_if_due(), 1)
+        self.assertEqual(self.view_counts()[self.soup.id], 1)
+
+    def test_forked_child_restarts_the_flush_thread(self):
+        """
+        After a fork the buffer is empty and the flush thread runs again if the parent had one.
+        """
+        counter = ViewCounter()
+        counter.add(self.soup.id)
+        with mock.patch.object(ViewCounter, "run"):
+            counter.after_fork()
+            self.assertIsNone(counter.thread)
+            counter.start()
+            counter.thread.join()
+            counter.after_fork()
+            self.assertIsNotNone(counter.thread)
+        self.assertEqual(counter.pending, {})
@@ -1,34 +1,371 @@
 from django.shortcuts import render
 from rest_framework.viewsets import ModelViewSet
-from rest_framework.status import HTTP_204_NO_CONTENT
+from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+from rest_framework.status import HTTP_204_NO_CONTENT, HTTP_400_BAD_REQUEST
 from .models import Recipe
 from .serializers import RecipeSerializer
 from rest_framework.permissions import IsAuthenticated
 from modules.cookbook.favorites.models import Favorite
-from django.db.models import Exists, OuterRef
+from modules.cookbook.recipe_ingredients.models import RecipeIngredient
+from modules.cookbook.ingredients.models import Ingredient
+from modules.cookbook.ingredients.utils import find_ingredient_ids
+from modules.cookbook.pantry import index as pantry_index
+from modules.cookbook.similarity import index as similarity_index
+from modules.cookbook.trending import scores as trending_scores
+from django.db.models import Exists, OuterRef, Prefetch, Q, prefetch_related_objects
+from cookbook_and_shoppinglist.conditional import ConditionalGetMixin
+from cookbook_and_shoppinglist.export import EXPORT_CHUNK_SIZE, EXPORT_RENDERERS, streaming_export
+from . import search
+from .counters import recipe_views
+from .permissions import IsAuthorOrReadOnly
+from .importer import RecipeImporter
+from .scaling import MAX_PORTIONS, scale_recipe, sum_scaled
 
-class RecipeViewSet(ModelViewSet):
-    permission_classes = [IsAuthenticated]
+
+def ingredient_lines_prefetch():
+    return Prefetch("ingredients", queryset=RecipeIngredient.objects.select_related("ingredient"))
+
+RECIPE_EXPORT_FIELDS = [
+    "id", "name", "instructions", "preparation_time", "difficulty", "category", "portion", "ingredients",
+]
+
+
+def recipe_export_row(recipe):
+    return {
+        "id": recipe.id,
+        "name": recipe.name.capitalize(),
+        "instructions": recipe.instructions,
+        "preparation_time": recipe.preparation_time,
+        "difficulty": recipe.difficulty,
+        "category": recipe.category,
+        "portion": recipe.portion,
+        "ingredients": [
+            {"ingredient": line.ingredient.name.capitalize(), "amount": line.amount, "unit": line.unit}
+            for line in recipe.ingredients.all()
+        ],
+    }
+
+
+def parse_portions(value):
+    portions = int(value)
+    if not 1 <= portions <= MAX_PORTIONS:
+        raise ValueError(value)
+    return portions
+
+
+def flatten_recipe_row(row):
+    return dict(row, ingredients="; ".join(
+        f"{line['amount']} {line['unit']} {line['ingredient']}" for line in row["ingredients"]
+    ))
+
+
+class RecipeViewSet(ConditionalGetMixin, ModelViewSet):
+    permission_classes = [IsAuthenticated, IsAuthorOrReadOnly]
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
 
+    # ?ordering= values and the keys they page by (each backed by an index)
+    ORDERINGS = {
+        "-popularity": ("-favorite_count", "-id"),
+    }
+
+    def get_requested_fields(self):
+        """
+        Sparse fieldsets for reads: ?view=card or ?fields=id,name,...
+        Returns None when the full representation is wanted.
+        """
+        if self.action not in ("list", "retrieve"):
+            return None
+        params = self.request.query_params
+        if params.get("view") == "card":
+            return RecipeSerializer.CARD_FIELDS
+        if "fields" not in params:
+            return None
+        requested = {field.strip() for field in params["fields"].split(",")}
+        return [field for field in RecipeSerializer.Meta.fields if field in requested] or ["id"]
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault("fields", self.get_requested_fields())
+        return super().get_serializer(*args, **kwargs)
+
     def get_queryset(self):
+        """
+        Loads authors, ingredient lines and ingredient names up front so the
+        number of queries does not grow with the number of recipes. With a
+        sparse fieldset only the requested columns and relations are loaded.
+        """
         user = self.request.user
+        fields = self.get_requested_fields()
 
-        return Recipe.objects.annotate(
-            is_favorite=Exists(
-                Favorite.objects.filter(
-                    user=user,
-                    recipe=OuterRef("pk")
+        def wanted(field):
+            return fields is None or field in fields
+
+        queryset = Recipe.objects.all()
+        if wanted("is_favorite"):
+            queryset = queryset.annotate(
+                is_favorite=Exists(
+                    Favorite.objects.filter(
+                        user=user,
+                        recipe=OuterRef("pk")
+                    )
                 )
             )
+        if wanted("author"):
+            queryset = queryset.select_related("author")
+        if wanted("ingredients"):
+            queryset = queryset.prefetch_related(ingredient_lines_prefetch())
+        if fields is not None:
+            concrete = {field.name for field in Recipe._meta.concrete_fields}
+            columns = [field for field in fields if field in concrete]
+            # the cursor reads the ordering key from the last row of a page
+            columns += [key.lstrip("-") for key in self.ORDERINGS.get(self.request.query_params.get("ordering"), ())]
+            if "images" in fields:
+                columns += ["recipe_img", "image_status", "image_renditions"]
+            queryset = queryset.only("id", *columns)
+        return queryset
+
+    def get_object_validators(self):
+        """
+        updated_at changes with the recipe and its ingredients; is_favorite is
+        per user and favorite_count changes without touching the recipe.
+        """
+        row = (
+            Recipe.objects.filter(pk=self.kwargs["pk"])
+            .annotate(is_favorite=Exists(Favorite.objects.filter(user=self.request.user, recipe=OuterRef("pk"))))
+            .values_list("updated_at", "is_favorite", "favorite_count")
+            .first()
         )
+        if row is None:
+            return None
+        updated_at, is_favorite, favorite_count = row
+        # no Last-Modified: removing a favorite leaves no timestamp behind
+        return f"{updated_at.isoformat()}|{is_favorite}|{favorite_count}", None
+
+    def filter_queryset(self, queryset):
+        """
+        ?q= restricts the list to recipes whose name, instructions or
+        ingredient names match, best match first.
+        """
+        queryset = super().filter_queryset(queryset)
+        query = self.request.query_params.get("q", "").strip()
+        if self.action != "list" or not query:
+            return queryset
+
+        if not search.is_available():
+            return queryset.filter(
+                Q(name__icontains=query)
+                | Q(instructions__icontains=query)
+                | Q(ingredients__ingredient__name__icontains=query)
+            ).distinct()
+
+        return search.filter_recipes(queryset, query)
+
+    def get_pagination_ordering(self, queryset):
+        if "search_rank" in queryset.query.annotations:
+            return ("search_rank", "id")
+        return self.ORDERINGS.get(self.request.query_params.get("ordering"))
 
     def perform_create(self, serializer):
-        name = serializer.validated_data["name"].strip().lower()
-        serializer.save(name=name, author=self.request.user)
+        name = Recipe.normalize_name(serializer.validated_data["name"])
+        recipe = serializer.save(name=name, author=self.request.user)
+        prefetch_related_objects([recipe], ingredient_lines_prefetch())
+
+    def perform_update(self, serializer):
+        recipe = serializer.save()
+        # fresh lines for the response, loaded in bulk like in get_queryset()
+        serializer.instance = self.get_queryset().get(pk=recipe.pk)
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            recipe_views.add(int(kwargs["pk"]))
+        return response
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         self.perform_destroy(instance)
         return Response(status=HTTP_204_NO_CONTENT)
+
+    @action(detail=False, methods=["get"], url_path="pantry")
+    def pantry(self, request):
+        """
+        "Cook with what I have": ranks recipes by how many of their ingredients
+        are covered by ?ingredients=tomate,ei (comma separated or repeated)
+        and lists the missing ones.
+        """
+        names = {
+            name
+            for value in request.query_params.getlist("ingredients")
+            for name in value.split(",")
+            if name.strip()
+        }
+        if not names:
+            return Response({"detail": "Please provide at least one ingredient."},
+                            status=HTTP_400_BAD_REQUEST)
+        try:
+            limit = max(1, min(int(request.query_params.get("limit", 20)), 100))
+        except ValueError:
+            return Response({"detail": "limit must be a number."}, status=HTTP_400_BAD_REQUEST)
+
+        # aliases, plurals and spelling variants count as the ingredient they stand for
+        pantry_ids = set(find_ingredient_ids(names).values())
+        matches = pantry_index.match_recipes(pantry_ids, limit=limit)
+
+        recipes = self.get_queryset().in_bulk([match["recipe_id"] for match in matches])
+        missing_names = dict(
+            Ingredient.objects.filter(
+                pk__in={ingredient_id for match in matches for ingredient_id in match["missing_ids"]}
+            ).values_list("id", "name")
+        )
+        results = []
+        for match in matches:
+            recipe = recipes.get(match["recipe_id"])
+            if recipe is None:
+                continue
+            results.append({
+                "recipe": self.get_serializer(recipe).data,
+                "matched": match["matched"],
+                "total": match["total"],
+                "missing": [
+                    missing_names[ingredient_id].capitalize()
+                    for ingredient_id in match["missing_ids"]
+                    if ingredient_id in missing_names
+                ],
+            })
+        return Response(results)
+
+    def get_limit(self, default=10):
+        return max(1, min(int(self.request.query_params.get("limit", default)), 100))
+
+    @action(detail=True, methods=["get"], url_path="similar")
+    def similar(self, request, pk=None):
+        """
+        Recipes with the most similar ingredient sets (estimated Jaccard
+        similarity from the MinHash index), best first.
+        """
+        recipe = get_object_or_404(Recipe.objects.only("id"), pk=pk)
+        try:
+            limit = self.get_limit()
+        except ValueError:
+            return Response({"detail": "limit must be a number."}, status=HTTP_400_BAD_REQUEST)
+
+        matches = similarity_index.similar_recipes(recipe.id, limit=limit)
+        recipes = self.get_queryset().in_bulk([recipe_id for recipe_id, _ in matches])
+        return Response([
+            {"recipe": self.get_serializer(recipes[recipe_id]).data, "similarity": round(similarity, 2)}
+            for recipe_id, similarity in matches
+            if recipe_id in recipes
+        ])
+
+    @action(detail=False, methods=["get"], url_path="recommended")
+    def recommended(self, request):
+        """
+        "Because you favorited X": recipes similar to the user's favorites
+        that are not favorites yet.
+        """
+        try:
+            limit = self.get_limit()
+        except ValueError:
+            return Response({"detail": "limit must be a number."}, status=HTTP_400_BAD_REQUEST)
+
+        matches = similarity_index.recommend_for_user(request.user, limit=limit)
+        recipes = self.get_queryset().in_bulk([recipe_id for recipe_id, _, _ in matches])
+        because = dict(
+            Recipe.objects.filter(pk__in={source_id for _, _, source_id in matches}).values_list("id", "name")
+        )
+        return Response([
+            {
+                "recipe": self.get_serializer(recipes[recipe_id]).data,
+                "similarity": round(similarity, 2),
+                "because": {"id": source_id, "name": because.get(source_id, "").capitalize()},
+            }
+            for recipe_id, similarity, source_id in matches
+            if recipe_id in recipes
+        ])
+
+    @action(detail=False, methods=["get"], url_path="trending")
+    def trending(self, request):
+        """
+        Recipes trending right now: favorites and views, each decayed with a
+        half-life of three days. Reads the list precomputed by
+        manage.py update_trending.
+        """
+        try:
+            limit = self.get_limit(default=20)
+        except ValueError:
+            return Response({"detail": "limit must be a number."}, status=HTTP_400_BAD_REQUEST)
+
+        top = trending_scores.top_recipes(limit)
+        recipes = self.get_queryset().in_bulk([recipe_id for recipe_id, _ in top])
+        return Response([
+            {"recipe": self.get_serializer(recipes[recipe_id]).data, "score": round(score, 3)}
+            for recipe_id, score in top
+            if recipe_id in recipes
+        ])
+
+    @action(detail=False, methods=["post"], url_path="import")
+    def import_recipes(self, request):
+        """
+        Bulk import: the request body is JSON lines, one recipe per line in the
+        same format as POST /api/recipes/. The body is streamed line by line;
+        invalid lines are reported and skipped.
+        """
+        importer = RecipeImporter(author=request.user)
+        return Response(importer.run(request.stream or []))
+
+    @action(detail=False, methods=["get"], url_path="export", renderer_classes=EXPORT_RENDERERS)
+    def export(self, request):
+        """
+        Streams the user's own recipes as NDJSON (default) or CSV (?format=csv).
+        """
+        recipes = (
+            Recipe.objects.filter(author=request.user)
+            .order_by("id")
+            .prefetch_related(ingredient_lines_prefetch())
+        )
+        rows = (recipe_export_row(recipe) for recipe in recipes.iterator(chunk_size=EXPORT_CHUNK_SIZE))
+        return streaming_export(request, rows, RECIPE_EXPORT_FIELDS, "recipes", flatten=flatten_recipe_row)
+
+    @action(detail=True, methods=["get"], url_path="scaled")
+    def scaled(self, request, pk=None):
+        """
+        The ingredient lines for ?portions=N (default: the recipe's own
+        portion), rounded per unit (see scaling.py).
+        """
+        recipe = get_object_or_404(Recipe.objects.prefetch_related(ingredient_lines_prefetch()), pk=pk)
+        try:
+            portions = parse_portions(request.query_params.get("portions") or recipe.portion)
+        except ValueError:
+            return Response({"detail": f"portions must be a number between 1 and {MAX_PORTIONS}."},
+                            status=HTTP_400_BAD_REQUEST)
+        return Response(scale_recipe(recipe, portions))
+
+    @action(detail=False, methods=["get"], url_path="scaled")
+    def scaled_batch(self, request):
+        """
+        Several recipes at once: ?recipes=12:4,15:2 (recipe id:portions, the
+        portions may be left out). "totals" adds up the lines per ingredient
+        and unit, ready for a shopping list.
+        """
+        wanted = {}
+        try:
+            for item in request.query_params.get("recipes", "").split(","):
+                if not item.strip():
+                    continue
+                recipe_id, _, portions = item.partition(":")
+                wanted[int(recipe_id)] = parse_portions(portions) if portions.strip() else None
+        except ValueError:
+            return Response({"detail": f"recipes must look like 12:4,15:2 with 1 to {MAX_PORTIONS} portions."},
+                            status=HTTP_400_BAD_REQUEST)
+        if not wanted or len(wanted) > 100:
+            return Response({"detail": "Please provide between 1 and 100 recipes."}, status=HTTP_400_BAD_REQUEST)
+
+        recipes = Recipe.objects.prefetch_related(ingredient_lines_prefetch()).in_bulk(wanted)
+        scaled = [
+            scale_recipe(recipes[recipe_id], portions or recipes[recipe_id].portion)
+            for recipe_id, portions in wanted.items()
+            if recipe_id in recipes
+        ]
+        return Response({"recipes": scaled, "totals": sum_scaled(scaled)})
@@ -0,0 +1,34 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0013_recipe_view_count'),
+        ('recipe_ingredients', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='recipeingredient',
+            unique_together=set(),
+        ),
+        # Nullable and with a temporary related_name until the old
+        # Recipe.ingredients many-to-many field is gone (0004)
+        migrations.AddField(
+            model_name='recipeingredient',
+            name='recipe',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='recipe.recipe'),
+        ),
+        migrations.AddField(
+            model_name='recipeingredient',
+            name='position',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='recipeingredient',
+            name='note',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+    ]
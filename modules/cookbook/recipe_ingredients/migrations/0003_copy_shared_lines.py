@@ -0,0 +1,48 @@
+from collections import defaultdict
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def copy_shared_lines(apps, schema_editor):
+    """
+    Gives every recipe its own copy of the lines it referenced through the
+    many-to-many table, in the order they were added, and drops the shared rows.
+    """
+    Recipe = apps.get_model("recipe", "Recipe")
+    RecipeIngredient = apps.get_model("recipe_ingredients", "RecipeIngredient")
+
+    rows = Recipe.ingredients.through.objects.order_by("recipe_id", "id").values_list(
+        "recipe_id",
+        "recipeingredient__ingredient_id",
+        "recipeingredient__amount",
+        "recipeingredient__unit",
+    )
+    positions = defaultdict(int)
+    batch = []
+    for recipe_id, ingredient_id, amount, unit in rows.iterator(chunk_size=BATCH_SIZE):
+        batch.append(RecipeIngredient(
+            recipe_id=recipe_id,
+            ingredient_id=ingredient_id,
+            amount=amount,
+            unit=unit,
+            position=positions[recipe_id],
+        ))
+        positions[recipe_id] += 1
+        if len(batch) >= BATCH_SIZE:
+            RecipeIngredient.objects.bulk_create(batch)
+            batch = []
+    RecipeIngredient.objects.bulk_create(batch)
+    RecipeIngredient.objects.filter(recipe__isnull=True).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe_ingredients', '0002_recipeingredient_recipe_lines'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_shared_lines, migrations.RunPython.noop),
+    ]
@@ -3,12 +3,20 @@ from modules.cookbook.ingredients.models import Ingredient
 from django.core.exceptions import ValidationError
 
 class RecipeIngredient(models.Model):
+    """One ingredient line of a recipe, in the order it was entered."""
+    recipe = models.ForeignKey("recipe.Recipe", on_delete=models.CASCADE, related_name="ingredients")
     ingredient = models.ForeignKey(Ingredient, on_delete=models.CASCADE, related_name="ingredient_recipes")
+    position = models.PositiveIntegerField(default=0)
     amount = models.DecimalField(max_digits=10, decimal_places=2, blank=False)
     unit = models.CharField(max_length=50, blank=False)
+    note = models.CharField(max_length=255, blank=True, default="")
 
     class Meta:
-        unique_together = ("ingredient", "amount", "unit")
+        ordering = ["position", "id"]
+        indexes = [
+            # recipe.ingredients.all() is one range scan in line order
+            models.Index(fields=["recipe", "position"], name="recipe_line_position_idx"),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.amount:
@@ -16,4 +24,4 @@ class RecipeIngredient(models.Model):
         super().save(*args, **kwargs)
 
     def __str__(self):
-        return f"{self.amount} {self.unit.strip()} {self.ingredient.name.capitalize()}"
\ No newline at end of file
+        return f"{self.amount} {self.unit.strip()} {self.ingredient.name.capitalize()}"
@@ -1,18 +1,22 @@
 from rest_framework import serializers
 from .models import RecipeIngredient
-from modules.cookbook.ingredients.models import Ingredient 
+from modules.cookbook.ingredients.utils import get_or_create_ingredient
 
 class RecipeIngredientSerializer(serializers.ModelSerializer):
     ingredient = serializers.CharField()
 
     class Meta:
         model = RecipeIngredient
-        fields = ["id", "ingredient", "amount", "unit"]
+        fields = ["id", "ingredient", "amount", "unit", "note"]
 
     def create(self, validated_data):
-        ingredient_name = validated_data["ingredient"].strip().lower()
-        ingredient, created = Ingredient.objects.get_or_create(name=ingredient_name)
-        return RecipeIngredient.objects.create(ingredient=ingredient, amount=validated_data["amount"], unit=validated_data["unit"])
+        return RecipeIngredient.objects.create(
+            recipe=validated_data["recipe"],
+            ingredient=get_or_create_ingredient(validated_data["ingredient"]),
+            amount=validated_data["amount"],
+            unit=validated_data["unit"],
+            note=validated_data.get("note", ""),
+        )
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
@@ -1,14 +1,18 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from modules.cookbook.recipe.models import Recipe
 from modules.cookbook.recipe_ingredients.models import RecipeIngredient
 from modules.cookbook.ingredients.models import Ingredient
-from django.db.utils import IntegrityError
 from django.core.exceptions import ValidationError
 from decimal import Decimal
 
 class RecipeIngredientTestCase(TestCase):
     def setUp(self):
+        user = get_user_model().objects.create_user(email="lines@example.com", password="password")
+        self.recipe = Recipe.objects.create(name="Rührei", instructions="Braten", preparation_time=5, author=user)
         self.ingredient = Ingredient.objects.create(name="Ei")
         self.recipe_ingredient = RecipeIngredient.objects.create(
+            recipe=self.recipe,
             ingredient=self.ingredient,
             amount=Decimal("1.00"),
             unit="Stück"
@@ -24,15 +28,25 @@ class RecipeIngredientTestCase(TestCase):
         """Checks whether __str__() is formatted correctly."""
         self.assertEqual(str(self.recipe_ingredient), "1.00 Stück Ei")
 
-    def test_recipe_ingredient_unique_together(self):
-        """Ensures that ingredient + amount is unique."""
-        with self.assertRaises(IntegrityError):
-            RecipeIngredient.objects.create(ingredient=self.ingredient, amount=Decimal("1.00"), unit="Stück")
+    def test_lines_are_ordered_by_position(self):
+        """Lines come back in their position order, and the same line may appear twice in a recipe."""
+        RecipeIngredient.objects.create(
+            recipe=self.recipe, ingredient=self.ingredient, position=2, amount=Decimal("1.00"), unit="Stück",
+            note="zum Bestreichen",
+        )
+        salt = RecipeIngredient.objects.create(
+            recipe=self.recipe, ingredient=Ingredient.objects.create(name="Salz"), position=1, amount=1, unit="Prise"
+        )
+        self.assertEqual(
+            list(self.recipe.ingredients.values_list("position", "note")), [(0, ""), (1, ""), (2, "zum Bestreichen")]
+        )
+        self.assertEqual(list(self.recipe.ingredients.all())[1], salt)
 
     def test_create_recipe_ingredient(self):
         """Tests the creation of a new RecipeIngredient."""
         ingredient = Ingredient.objects.create(name="Milch")
         recipe_ingredient = RecipeIngredient.objects.create(
+            recipe=self.recipe,
             ingredient=ingredient,
             amount=Decimal("200.00"),  # DecimalField erwartet Zahlen
             unit="ml"
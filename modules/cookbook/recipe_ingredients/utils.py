@@ -0,0 +1,83 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+
+from modules.cookbook.ingredients.utils import get_or_create_ingredients, normalize_name
+from .models import RecipeIngredient
+
+AMOUNT_QUANTUM = Decimal("0.01")
+
+
+def line_key(ingredient_id, amount, unit, note=""):
+    return ingredient_id, Decimal(amount).quantize(AMOUNT_QUANTUM), unit.strip(), note.strip()
+
+
+def build_recipe_ingredients(recipe, lines, ingredient_ids=None):
+    """
+    Unsaved RecipeIngredient rows for ingredient lines ({"ingredient",
+    "amount", "unit", optional "note"}), numbered in the given order.
+    Ingredients are resolved in a constant number of queries.
+
+    ingredient_ids ({normalized name: id}) can be passed when the names were
+    already resolved, e.g. by a bulk import.
+    """
+    lines = list(lines)
+    if any(not line["amount"] for line in lines):
+        # same rule as RecipeIngredient.save(), which bulk_create bypasses
+        raise ValidationError("Amount cannot be empty")
+    if not lines:
+        return []
+
+    if ingredient_ids is None:
+        ingredient_ids = {
+            name: ingredient.id
+            for name, ingredient in get_or_create_ingredients(line["ingredient"] for line in lines).items()
+        }
+    rows = []
+    for position, line in enumerate(lines):
+        ingredient_id, amount, unit, note = line_key(
+            ingredient_ids[normalize_name(line["ingredient"])], line["amount"], line["unit"], line.get("note", "")
+        )
+        rows.append(RecipeIngredient(
+            recipe=recipe, ingredient_id=ingredient_id, position=position, amount=amount, unit=unit, note=note,
+        ))
+    return rows
+
+
+def create_recipe_ingredients(recipe, lines):
+    """Adds the lines to a new recipe with one bulk insert."""
+    return RecipeIngredient.objects.bulk_create(build_recipe_ingredients(recipe, lines))
+
+
+def replace_recipe_ingredients(recipe, lines):
+    """
+    Makes the recipe's lines equal to the given ones. Lines that are still
+    wanted are kept (and renumbered if they moved); only the difference is
+    deleted and inserted, each in one query. Returns True if anything changed.
+    """
+    wanted = build_recipe_ingredients(recipe, lines)
+    existing = defaultdict(list)
+    for line in RecipeIngredient.objects.filter(recipe=recipe).order_by("position", "id"):
+        existing[line_key(line.ingredient_id, line.amount, line.unit, line.note)].append(line)
+
+    to_create = []
+    to_move = []
+    for line in wanted:
+        matches = existing[line_key(line.ingredient_id, line.amount, line.unit, line.note)]
+        if not matches:
+            to_create.append(line)
+            continue
+        kept = matches.pop(0)
+        if kept.position != line.position:
+            kept.position = line.position
+            to_move.append(kept)
+    to_delete = [line.pk for matches in existing.values() for line in matches]
+
+    if to_delete:
+        RecipeIngredient.objects.filter(pk__in=to_delete).delete()
+    if to_move:
+        RecipeIngredient.objects.bulk_update(to_move, ["position"])
+    if to_create:
+        RecipeIngredient.objects.bulk_create(to_create)
+    return bool(to_delete or to_move or to_create)
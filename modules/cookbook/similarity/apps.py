@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class SimilarityConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'modules.cookbook.similarity'
+
+    def ready(self):
+        from . import signals  # noqa: F401
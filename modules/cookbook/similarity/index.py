@@ -0,0 +1,182 @@
+from collections import defaultdict
+
+from django.db import transaction
+
+from modules.cookbook.favorites.models import Favorite
+from modules.cookbook.pantry.index import chunks, ingredient_sets
+from modules.cookbook.pantry.models import pack_ids, unpack_ids
+from .minhash import band_keys, estimate_similarity, pack_signature, signature, unpack_signature
+from .models import LshBucket, RecipeSignature
+
+# Favorites considered for recommendations, most recent first
+RECOMMENDATION_SOURCES = 50
+
+
+def update_recipes(recipe_ids):
+    """
+    Recomputes the signatures of the given recipes and moves them between
+    buckets; only buckets of bands whose values changed are rewritten.
+    Recipes without ingredients (or deleted ones) leave the index.
+    """
+    recipe_ids = set(recipe_ids)
+    if not recipe_ids:
+        return
+    new_signatures = {
+        recipe_id: signature(ids) for recipe_id, ids in ingredient_sets(recipe_ids).items() if ids
+    }
+
+    with transaction.atomic():
+        old_signatures = {
+            entry.recipe_id: unpack_signature(entry.signature)
+            for entry in RecipeSignature.objects.select_for_update().filter(recipe_id__in=recipe_ids)
+        }
+        added = defaultdict(set)
+        removed = defaultdict(set)
+        for recipe_id in recipe_ids:
+            old = old_signatures.get(recipe_id)
+            new = new_signatures.get(recipe_id)
+            if old == new:
+                continue
+            old_keys = set(band_keys(old)) if old else set()
+            new_keys = set(band_keys(new)) if new else set()
+            for key in new_keys - old_keys:
+                added[key].add(recipe_id)
+            for key in old_keys - new_keys:
+                removed[key].add(recipe_id)
+
+        update_buckets(added, removed)
+
+        RecipeSignature.objects.bulk_create(
+            [
+                RecipeSignature(recipe_id=recipe_id, signature=pack_signature(values))
+                for recipe_id, values in new_signatures.items()
+                if values != old_signatures.get(recipe_id)
+            ],
+            update_conflicts=True,
+            unique_fields=["recipe_id"],
+            update_fields=["signature"],
+        )
+        stale = [recipe_id for recipe_id in old_signatures if recipe_id not in new_signatures]
+        if stale:
+            RecipeSignature.objects.filter(recipe_id__in=stale).delete()
+
+
+def update_buckets(added, removed):
+    keys = set(added) | set(removed)
+    if not keys:
+        return
+    buckets = {
+        bucket.bucket: set(unpack_ids(bucket.recipe_ids))
+        for bucket in LshBucket.objects.select_for_update().filter(bucket__in=keys)
+    }
+    changed = []
+    empty = []
+    for key in keys:
+        recipe_ids = (buckets.get(key, set()) | added.get(key, set())) - removed.get(key, set())
+        if recipe_ids:
+            changed.append(LshBucket(bucket=key, recipe_ids=pack_ids(recipe_ids)))
+        else:
+            empty.append(key)
+    LshBucket.objects.bulk_create(
+        changed,
+        update_conflicts=True,
+        unique_fields=["bucket"],
+        update_fields=["recipe_ids"],
+    )
+    if empty:
+        LshBucket.objects.filter(bucket__in=empty).delete()
+
+
+@transaction.atomic
+def rebuild():
+    """Recreates the index from scratch; returns (recipes, buckets) indexed."""
+    LshBucket.objects.all().delete()
+    RecipeSignature.objects.all().delete()
+
+    signatures = {recipe_id: signature(ids) for recipe_id, ids in ingredient_sets().items() if ids}
+    buckets = defaultdict(list)
+    for recipe_id, values in signatures.items():
+        for key in band_keys(values):
+            buckets[key].append(recipe_id)
+
+    for batch in chunks(signatures.items()):
+        RecipeSignature.objects.bulk_create(
+            RecipeSignature(recipe_id=recipe_id, signature=pack_signature(values)) for recipe_id, values in batch
+        )
+    for batch in chunks(buckets.items()):
+        LshBucket.objects.bulk_create(LshBucket(bucket=key, recipe_ids=pack_ids(ids)) for key, ids in batch)
+    return len(signatures), len(buckets)
+
+
+def load_signatures(recipe_ids):
+    signatures = {}
+    for batch in chunks(recipe_ids):
+        signatures.update(
+            (recipe_id, unpack_signature(data))
+            for recipe_id, data in RecipeSignature.objects.filter(recipe_id__in=batch).values_list(
+                "recipe_id", "signature"
+            )
+        )
+    return signatures
+
+
+def candidates(signatures):
+    """{recipe_id: recipe ids sharing at least one bucket} for the given signatures."""
+    keys_by_recipe = {recipe_id: band_keys(values) for recipe_id, values in signatures.items()}
+    members = dict(
+        LshBucket.objects.filter(
+            bucket__in={key for keys in keys_by_recipe.values() for key in keys}
+        ).values_list("bucket", "recipe_ids")
+    )
+    return {
+        recipe_id: {other for key in keys if key in members for other in unpack_ids(members[key])} - {recipe_id}
+        for recipe_id, keys in keys_by_recipe.items()
+    }
+
+
+def similar_recipes(recipe_id, limit=10):
+    """
+    Up to limit (recipe_id, similarity) pairs, most similar first. Only LSH
+    candidates are scored, so the cost does not depend on the number of
+    recipes in the cookbook.
+    """
+    source = load_signatures([recipe_id]).get(recipe_id)
+    if source is None:
+        return []
+    others = candidates({recipe_id: source})[recipe_id]
+    scored = [
+        (estimate_similarity(source, values), other)
+        for other, values in load_signatures(others).items()
+    ]
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return [(other, similarity) for similarity, other in scored[:limit]]
+
+
+def recommend_for_user(user, limit=10):
+    """
+    Recipes similar to the user's recent favorites that are not favorites
+    yet: up to limit (recipe_id, similarity, because_recipe_id), best first.
+    """
+    favorite_ids = list(
+        Favorite.objects.filter(user=user).order_by("-created_at").values_list("recipe_id", flat=True)
+    )
+    sources = load_signatures(favorite_ids[:RECOMMENDATION_SOURCES])
+    if not sources:
+        return []
+    favorites = set(favorite_ids)
+    candidate_ids = candidates(sources)
+    candidate_signatures = load_signatures(
+        {other for others in candidate_ids.values() for other in others} - favorites
+    )
+
+    best = {}
+    for source_id, others in candidate_ids.items():
+        for other in others:
+            values = candidate_signatures.get(other)
+            if values is None:
+                continue
+            similarity = estimate_similarity(sources[source_id], values)
+            if other not in best or similarity > best[other][0]:
+                best[other] = (similarity, source_id)
+    ranked = sorted(best.items(), key=lambda item: (-item[1][0], item[0]))
+    return [(recipe_id, similarity, source_id) for recipe_id, (similarity, source_id) in ranked[:limit]]
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from modules.cookbook.similarity import index
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the MinHash signatures and LSH buckets used for similar recipes."
+
+    def handle(self, *args, **options):
+        recipes, buckets = index.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {recipes} recipes in {buckets} buckets."))
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-18 08:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LshBucket',
+            fields=[
+                ('bucket', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('recipe_ids', models.BinaryField(default=bytes)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RecipeSignature',
+            fields=[
+                ('recipe_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('signature', models.BinaryField(default=bytes)),
+            ],
+        ),
+    ]
@@ -0,0 +1,45 @@
+from array import array
+from collections import defaultdict
+
+from django.db import migrations
+
+from modules.cookbook.similarity.minhash import band_keys, pack_signature, signature
+
+
+def build_index(apps, schema_editor):
+    Recipe = apps.get_model("recipe", "Recipe")
+    RecipeSignature = apps.get_model("similarity", "RecipeSignature")
+    LshBucket = apps.get_model("similarity", "LshBucket")
+
+    sets = defaultdict(set)
+    for recipe_id, ingredient_id in Recipe.ingredients.through.objects.values_list(
+        "recipe_id", "recipeingredient__ingredient_id"
+    ):
+        sets[recipe_id].add(ingredient_id)
+
+    signatures = {recipe_id: signature(ids) for recipe_id, ids in sets.items()}
+    buckets = defaultdict(list)
+    for recipe_id, values in signatures.items():
+        for key in band_keys(values):
+            buckets[key].append(recipe_id)
+
+    RecipeSignature.objects.bulk_create(
+        [RecipeSignature(recipe_id=recipe_id, signature=pack_signature(values)) for recipe_id, values in signatures.items()],
+        batch_size=1000,
+    )
+    LshBucket.objects.bulk_create(
+        [LshBucket(bucket=key, recipe_ids=array("q", sorted(ids)).tobytes()) for key, ids in buckets.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('similarity', '0001_initial'),
+        ('recipe', '0011_recipe_image_placeholder'),
+    ]
+
+    operations = [
+        migrations.RunPython(build_index, migrations.RunPython.noop),
+    ]
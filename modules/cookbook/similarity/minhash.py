@@ -0,0 +1,54 @@
+"""
+MinHash signatures of ingredient sets and their LSH band keys.
+
+Two recipes agree in a signature position with a probability equal to the
+Jaccard similarity of their ingredient sets, so the share of equal positions
+estimates it. Signatures are split into BANDS bands of ROWS positions; two
+recipes become candidates when any band is identical, which happens with
+probability 1 - (1 - s^ROWS)^BANDS (about 50% at s = 0.5, 99% at s = 0.8).
+
+Pure functions without database access, so migrations can use them too.
+"""
+import hashlib
+import random
+from array import array
+
+NUM_HASHES = 64
+BANDS = 16
+ROWS = NUM_HASHES // BANDS
+
+_PRIME = (1 << 61) - 1
+# Fixed seed: signatures must be comparable across processes and deployments
+_rng = random.Random(0x5EED)
+_HASHES = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_HASHES)]
+
+
+def signature(ingredient_ids):
+    """The MinHash signature (NUM_HASHES 32-bit values) of a non-empty set of ids."""
+    ids = list(ingredient_ids)
+    return array("I", (min(((a * x + b) % _PRIME) & 0xFFFFFFFF for x in ids) for a, b in _HASHES))
+
+
+def pack_signature(values):
+    return array("I", values).tobytes()
+
+
+def unpack_signature(data):
+    values = array("I")
+    values.frombytes(bytes(data or b""))
+    return values
+
+
+def band_keys(values):
+    """One signed 64-bit bucket key per band; the band number is part of the key."""
+    keys = []
+    for band in range(BANDS):
+        digest = hashlib.blake2b(
+            bytes([band]) + array("I", values[band * ROWS:(band + 1) * ROWS]).tobytes(), digest_size=8
+        ).digest()
+        keys.append(int.from_bytes(digest, "big", signed=True))
+    return keys
+
+
+def estimate_similarity(first, second):
+    return sum(1 for a, b in zip(first, second) if a == b) / NUM_HASHES
@@ -0,0 +1,26 @@
+from django.db import models
+
+from modules.cookbook.pantry.models import unpack_ids
+from .minhash import unpack_signature
+
+
+class RecipeSignature(models.Model):
+    """MinHash signature of a recipe's ingredient set (256 bytes)."""
+    recipe_id = models.BigIntegerField(primary_key=True)
+    signature = models.BinaryField(default=bytes)
+
+    def __str__(self):
+        return f"Recipe {self.recipe_id}: {len(unpack_signature(self.signature))} hashes"
+
+
+class LshBucket(models.Model):
+    """
+    LSH index: the recipes sharing one band of their signatures. The key
+    combines band number and band values. Like the pantry index, neither
+    table has foreign keys; the index removes deleted recipes itself.
+    """
+    bucket = models.BigIntegerField(primary_key=True)
+    recipe_ids = models.BinaryField(default=bytes)
+
+    def __str__(self):
+        return f"Bucket {self.bucket}: {len(unpack_ids(self.recipe_ids))} recipes"
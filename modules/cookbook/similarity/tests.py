@@ -0,0 +1,114 @@
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from modules.cookbook.favorites.models import Favorite
+from modules.cookbook.ingredients.models import Ingredient
+from modules.cookbook.recipe.models import Recipe
+from modules.cookbook.pantry.models import unpack_ids
+from modules.cookbook.recipe_ingredients.models import RecipeIngredient
+from modules.cookbook.similarity.minhash import estimate_similarity, signature
+from modules.cookbook.similarity.models import LshBucket, RecipeSignature
+
+User = get_user_model()
+
+
+class SimilarityBaseSetup(APITestCase):
+    def setUp(self):
+        """
+        Set up an authenticated user and recipes with more or less overlapping ingredients.
+        """
+        self.user = User.objects.create_user(email="similar@example.com", password="testpassword123")
+        self.client.force_authenticate(user=self.user)
+
+        base = ["ei", "milch", "mehl", "zucker", "butter", "salz", "vanille", "backpulver"]
+        self.pancakes = self.create_recipe("Pfannkuchen", base)
+        self.waffles = self.create_recipe("Waffeln", base[:7] + ["zimt"])
+        self.crepes = self.create_recipe("Crêpes", base[:6] + ["rum", "orange"])
+        self.salad = self.create_recipe("Salat", ["tomate", "gurke", "essig", "öl"])
+
+    def create_recipe(self, name, ingredient_names):
+        recipe = Recipe.objects.create(name=name, instructions="...", preparation_time=10, author=self.user)
+        for ingredient_name in ingredient_names:
+            ingredient, _ = Ingredient.objects.get_or_create(name=ingredient_name)
+            RecipeIngredient.objects.create(recipe=recipe, ingredient=ingredient, amount=1, unit="Stück")
+        return recipe
+
+
+class MinHashTests(SimilarityBaseSetup):
+    def test_signature_estimates_jaccard(self):
+        """
+        The share of equal signature positions approximates the Jaccard similarity.
+        """
+        first = signature(range(1, 101))
+        second = signature(range(21, 121))  # Jaccard 80 / 120
+        self.assertAlmostEqual(estimate_similarity(first, second), 80 / 120, delta=0.15)
+        self.assertEqual(estimate_similarity(first, signature(range(1, 101))), 1.0)
+
+    def test_index_is_updated_incrementally(self):
+        """
+        Recipes enter the index with their ingredients and leave it when deleted.
+        """
+        self.assertEqual(RecipeSignature.objects.count(), 4)
+        self.salad.delete()
+        self.assertEqual(RecipeSignature.objects.count(), 3)
+        for recipe_ids in LshBucket.objects.values_list("recipe_ids", flat=True):
+            self.assertNotIn(self.salad.id, unpack_ids(recipe_ids))
+
+    def test_rebuild_command(self):
+        """
+        rebuild_similarity_index recreates the same index.
+        """
+        buckets = set(LshBucket.objects.values_list("bucket", flat=True))
+        out = StringIO()
+        call_command("rebuild_similarity_index", stdout=out)
+        self.assertIn("Indexed 4 recipes", out.getvalue())
+        self.assertEqual(set(LshBucket.objects.values_list("bucket", flat=True)), buckets)
+
+
+class SimilarRecipesEndpointTests(SimilarityBaseSetup):
+    def test_similar_recipes_ranked_by_overlap(self):
+        """
+        Waffles share more ingredients with pancakes than crêpes; the salad shares none.
+        """
+        response = self.client.get(reverse("recipes-similar", kwargs={"pk": self.pancakes.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [match["recipe"]["id"] for match in response.data]
+        self.assertEqual(ids[0], self.waffles.id)
+        self.assertNotIn(self.pancakes.id, ids)
+        self.assertNotIn(self.salad.id, ids)
+
+    def test_changed_ingredients_move_recipe(self):
+        """
+        After its ingredients change, a recipe shows up for its new neighbours.
+        """
+        for name in ["ei", "milch", "mehl", "zucker", "butter", "salz", "vanille", "backpulver"]:
+            RecipeIngredient.objects.create(
+                recipe=self.salad, ingredient=Ingredient.objects.get(name=name), amount=1, unit="Stück"
+            )
+        for line in self.salad.ingredients.filter(ingredient__name__in=["tomate", "gurke", "essig", "öl"]):
+            line.delete()
+        response = self.client.get(reverse("recipes-similar", kwargs={"pk": self.pancakes.id}))
+        self.assertEqual(response.data[0]["recipe"]["id"], self.salad.id)
+        self.assertEqual(response.data[0]["similarity"], 1.0)
+
+    def test_recommendations_from_favorites(self):
+        """
+        Recommendations come from favorites, exclude them and name the source.
+        """
+        Favorite.objects.create(user=self.user, recipe=self.pancakes)
+        Favorite.objects.create(user=self.user, recipe=self.crepes)
+        response = self.client.get(reverse("recipes-recommended"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]["recipe"]["id"], self.waffles.id)
+        self.assertEqual(response.data[0]["because"]["id"], self.pancakes.id)
+        self.assertNotIn(self.crepes.id, [match["recipe"]["id"] for match in response.data])
+
+    def test_no_favorites_no_recommendations(self):
+        """
+        Without favorites there is nothing to recommend from.
+        """
+        response = self.client.get(reverse("recipes-recommended"))
+        self.assertEqual(response.data, [])
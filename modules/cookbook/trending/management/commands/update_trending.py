@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from modules.cookbook.trending import scores
+
+
+class Command(BaseCommand):
+    help = "Adds new favorites and recipe views to the trending scores and refreshes the top list."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=scores.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        consumed = scores.update(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Consumed {consumed} events."))
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 09:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trending', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trendingstate',
+            name='top',
+            field=models.JSONField(default=list),
+        ),
+        migrations.AddField(
+            model_name='trendingstate',
+            name='top_computed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
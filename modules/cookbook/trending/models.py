@@ -0,0 +1,41 @@
+from django.db import models
+from django.utils import timezone
+
+
+class RecipeViewEvent(models.Model):
+    """A recipe was viewed; consumed and deleted by trending.update()."""
+    recipe_id = models.BigIntegerField()
+    weight = models.FloatField(default=1.0)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Recipe {self.recipe_id} viewed at {self.created_at}"
+
+
+class TrendingScore(models.Model):
+    """
+    Forward-decayed popularity: the sum of weight * 2 ** ((t - landmark) / half-life)
+    over all events of a recipe. Scores only grow, so new events are simply
+    added; comparing scores compares the decayed values at any point in time.
+    """
+    recipe_id = models.BigIntegerField(primary_key=True)
+    score = models.FloatField(default=0.0, db_index=True)
+
+    def __str__(self):
+        return f"Recipe {self.recipe_id}: {self.score:.3f}"
+
+
+class TrendingState(models.Model):
+    """
+    Single row: the landmark of the decay, how far the event streams were
+    consumed and the top list of the last update, shared by all processes.
+    """
+    landmark = models.DateTimeField(default=timezone.now)
+    last_favorite_id = models.BigIntegerField(default=0)
+    last_view_event_id = models.BigIntegerField(default=0)
+    # [[recipe_id, score as of top_computed_at], ...], highest first
+    top = models.JSONField(default=list)
+    top_computed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Landmark {self.landmark}, favorites up to {self.last_favorite_id}"
@@ -0,0 +1,153 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from modules.cookbook.favorites.models import Favorite
+from .models import RecipeViewEvent, TrendingScore, TrendingState
+
+HALF_LIFE = timedelta(days=3)
+FAVORITE_WEIGHT = 5.0
+
+# Scores grow by 2 ** (days since landmark / 3); well before floats overflow
+# the landmark moves forward and all scores are scaled down once.
+RESCALE_AFTER = timedelta(days=60)
+# Scores below this (after rescaling) are older than any trending recipe
+MIN_SCORE = 1e-3
+
+BATCH_SIZE = 1000
+TOP_N = 100
+TOP_CACHE_KEY = "trending:top"
+# The top list is stored on TrendingState by update(); each process keeps
+# its copy this many seconds before reading the row again.
+TOP_CACHE_TIMEOUT = 60
+
+
+def decay(moment, landmark):
+    return 2 ** ((moment - landmark) / HALF_LIFE)
+
+
+def get_state():
+    state, _ = TrendingState.objects.select_for_update().get_or_create(pk=1)
+    return state
+
+
+def add_scores(increments):
+    scores = dict(
+        TrendingScore.objects.filter(recipe_id__in=increments).values_list("recipe_id", "score")
+    )
+    TrendingScore.objects.bulk_create(
+        [
+            TrendingScore(recipe_id=recipe_id, score=scores.get(recipe_id, 0.0) + increment)
+            for recipe_id, increment in increments.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["recipe_id"],
+        update_fields=["score"],
+    )
+
+
+@transaction.atomic
+def consume_batch(batch_size=BATCH_SIZE):
+    """
+    Adds the next batch of new favorites and view events to the scores and
+    moves the watermarks past them. Returns the number of events consumed.
+    """
+    state = get_state()
+    favorites = list(
+        Favorite.objects.filter(pk__gt=state.last_favorite_id)
+        .order_by("pk")
+        .values_list("pk", "recipe_id", "created_at")[:batch_size]
+    )
+    views = list(
+        RecipeViewEvent.objects.filter(pk__gt=state.last_view_event_id)
+        .order_by("pk")
+        .values_list("pk", "recipe_id", "created_at", "weight")[:batch_size]
+    )
+
+    increments = defaultdict(float)
+    for _, recipe_id, created_at in favorites:
+        increments[recipe_id] += FAVORITE_WEIGHT * decay(created_at, state.landmark)
+    for _, recipe_id, created_at, weight in views:
+        increments[recipe_id] += weight * decay(created_at, state.landmark)
+    if increments:
+        add_scores(increments)
+
+    if favorites:
+        state.last_favorite_id = favorites[-1][0]
+    if views:
+        state.last_view_event_id = views[-1][0]
+        RecipeViewEvent.objects.filter(pk__lte=state.last_view_event_id).delete()
+    state.save()
+    return len(favorites) + len(views)
+
+
+@transaction.atomic
+def rescale(now=None):
+    """Moves the landmark to now, scaling all scores to match, and drops the faded ones."""
+    now = now or timezone.now()
+    state = get_state()
+    factor = 1 / decay(now, state.landmark)
+    TrendingScore.objects.update(score=F("score") * factor)
+    TrendingScore.objects.filter(score__lt=MIN_SCORE).delete()
+    state.landmark = now
+    state.save()
+
+
+def update(batch_size=BATCH_SIZE, now=None):
+    """
+    Consumes all new events in batches and refreshes the cached top list.
+    Meant to run every few minutes (manage.py update_trending).
+    """
+    now = now or timezone.now()
+    if now - TrendingState.objects.get_or_create(pk=1)[0].landmark > RESCALE_AFTER:
+        rescale(now)
+    consumed = 0
+    while True:
+        count = consume_batch(batch_size)
+        consumed += count
+        if count == 0:
+            break
+    refresh_top(now)
+    return consumed
+
+
+def compute_top(now=None, limit=TOP_N):
+    """[(recipe_id, score as of now)], highest first."""
+    now = now or timezone.now()
+    landmark = TrendingState.objects.get_or_create(pk=1)[0].landmark
+    factor = 1 / decay(now, landmark)
+    return [
+        (recipe_id, score * factor)
+        for recipe_id, score in TrendingScore.objects.order_by("-score", "recipe_id").values_list(
+            "recipe_id", "score"
+        )[:limit]
+    ]
+
+
+def refresh_top(now=None):
+    now = now or timezone.now()
+    top = compute_top(now)
+    TrendingState.objects.filter(pk=1).update(top=top, top_computed_at=now)
+    cache.set(TOP_CACHE_KEY, top, TOP_CACHE_TIMEOUT)
+    return top
+
+
+def top_recipes(limit=20):
+    """
+    The top list of the last update, read from the state row at most every
+    TOP_CACHE_TIMEOUT seconds; computed from the scores if there was no
+    update yet.
+    """
+    top = cache.get(TOP_CACHE_KEY)
+    if top is None:
+        row = TrendingState.objects.filter(pk=1).values_list("top", "top_computed_at").first()
+        if row is None or row[1] is None:
+            top = refresh_top()
+        else:
+            top = [(recipe_id, score) for recipe_id, score in row[0]]
+            cache.set(TOP_CACHE_KEY, top, TOP_CACHE_TIMEOUT)
+    return top[:limit]
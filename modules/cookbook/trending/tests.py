@@ -0,0 +1,104 @@
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from modules.cookbook.favorites.models import Favorite
+from modules.cookbook.recipe.counters import recipe_views
+from modules.cookbook.recipe.models import Recipe
+from modules.cookbook.trending import scores
+from modules.cookbook.trending.models import RecipeViewEvent, TrendingScore, TrendingState
+
+User = get_user_model()
+
+
+class TrendingTests(APITestCase):
+    def setUp(self):
+        """
+        Set up two users, three recipes and an empty top list.
+        """
+        cache.delete(scores.TOP_CACHE_KEY)
+        recipe_views.reset()
+        self.user = User.objects.create_user(email="trend@example.com", password="testpassword123")
+        self.other_user = User.objects.create_user(email="trend2@example.com", password="testpassword123")
+        self.client.force_authenticate(user=self.user)
+        self.soup, self.salad, self.cake = [
+            Recipe.objects.create(name=name, instructions="...", preparation_time=10, author=self.user)
+            for name in ["Suppe", "Salat", "Kuchen"]
+        ]
+
+    def test_recent_events_outweigh_old_ones(self):
+        """
+        Two favorites from two weeks ago count less than one from today.
+        """
+        two_weeks_ago = timezone.now() - timedelta(days=14)
+        for user in [self.user, self.other_user]:
+            favorite = Favorite.objects.create(user=user, recipe=self.soup)
+            Favorite.objects.filter(pk=favorite.pk).update(created_at=two_weeks_ago)
+        Favorite.objects.create(user=self.user, recipe=self.cake)
+
+        scores.update()
+        self.assertEqual([recipe_id for recipe_id, _ in scores.top_recipes()], [self.cake.id, self.soup.id])
+
+    def test_updates_are_incremental(self):
+        """
+        Consumed events are not counted twice; views are deleted once consumed.
+        """
+        Favorite.objects.create(user=self.user, recipe=self.salad)
+        self.assertEqual(scores.update(batch_size=1), 1)
+        score = TrendingScore.objects.get(recipe_id=self.salad.id).score
+
+        RecipeViewEvent.objects.bulk_create([RecipeViewEvent(recipe_id=self.salad.id) for _ in range(3)])
+        self.assertEqual(scores.update(batch_size=2), 3)
+        self.assertEqual(scores.update(), 0)
+        self.assertAlmostEqual(TrendingScore.objects.get(recipe_id=self.salad.id).score, score * 8 / 5, places=2)
+        self.assertFalse(RecipeViewEvent.objects.exists())
+
+    def test_rescaling_keeps_the_ranking(self):
+        """
+        Moving the landmark scales the scores down and drops faded ones.
+        """
+        Favorite.objects.create(user=self.user, recipe=self.salad)
+        scores.update()
+        TrendingState.objects.update(landmark=timezone.now() - scores.RESCALE_AFTER - timedelta(days=1))
+        Favorite.objects.create(user=self.user, recipe=self.cake)
+        scores.update()
+        self.assertLess(TrendingScore.objects.get(recipe_id=self.cake.id).score, 10)
+        self.assertEqual(scores.top_recipes()[0][0], self.cake.id)
+
+    def test_endpoint_reads_the_precomputed_list(self):
+        """
+        /api/recipes/trending/ serves the list from the last update; detail views are recorded.
+        """
+        self.client.get(reverse("recipes-detail", kwargs={"pk": self.salad.id}))
+        recipe_views.flush()
+        self.assertEqual(RecipeViewEvent.objects.get().recipe_id, self.salad.id)
+        out = StringIO()
+        call_command("update_trending", stdout=out)
+        self.assertIn("Consumed 1 events.", out.getvalue())
+
+        Favorite.objects.create(user=self.user, recipe=self.cake)  # not consumed yet
+        response = self.client.get(reverse("recipes-trending"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([entry["recipe"]["id"] for entry in response.data], [self.salad.id])
+
+    def test_other_processes_see_the_stored_top_list(self):
+        """
+        The list is stored on the state row; a process with an expired copy rereads it without recomputing.
+        """
+        Favorite.objects.create(user=self.user, recipe=self.soup)
+        scores.update()
+        cache.delete(scores.TOP_CACHE_KEY)
+        with self.assertNumQueries(1):
+            self.assertEqual([recipe_id for recipe_id, _ in scores.top_recipes()], [self.soup.id])
+
+        Favorite.objects.create(user=self.other_user, recipe=self.cake)
+        Favorite.objects.create(user=self.user, recipe=self.cake)
+        scores.update()
+        self.assertEqual(TrendingState.objects.get().top[0][0], self.cake.id)
+        cache.delete(scores.TOP_CACHE_KEY)
+        self.assertEqual(scores.top_recipes()[0][0], self.cake.id)
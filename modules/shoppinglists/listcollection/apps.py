@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ListcollectionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'modules.shoppinglists.listcollection'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,32 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from modules.shoppinglists.shoppinglistitem.models import ShoppingListItem
+from .models import ListCollection
+
+
+def touch_lists(list_ids):
+    """Changes to items and participants count as changes of the list (ETag / Last-Modified)."""
+    list_ids = set(list_ids)
+    if list_ids:
+        ListCollection.objects.filter(pk__in=list_ids).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=ShoppingListItem)
+@receiver(post_delete, sender=ShoppingListItem)
+def changed_item(sender, instance, raw=False, **kwargs):
+    if not raw:
+        touch_lists([instance.shopping_list_id])
+
+
+@receiver(m2m_changed, sender=ListCollection.participants.through)
+def changed_participants(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == "pre_clear":
+        instance._touched_list_ids = set(instance.shared_collections.values_list("id", flat=True))
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if reverse:
+        touch_lists(pk_set or getattr(instance, "_touched_list_ids", ()))
+    else:
+        touch_lists([instance.pk])
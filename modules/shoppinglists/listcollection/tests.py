@@ -1,10 +1,14 @@
+import json
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.contrib.auth import get_user_model
 from modules.shoppinglists.listcollection.models import ListCollection
+from modules.shoppinglists.shoppinglistitem.models import ShoppingListItem
+from modules.cookbook.ingredients.models import Ingredient
 from django.utils import timezone
 import time
+from datetime import timedelta
 
 User = get_user_model()
 
@@ -50,9 +54,9 @@ class ListCollectionCommonTests(BaseListCollectionSetup):
         response = self.client.get(self.list_collections_url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["name"], self.list_user1.name)
-        self.assertEqual(response.data[0]["author"], self.user1.id)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["name"], self.list_user1.name)
+        self.assertEqual(response.data["results"][0]["author"], self.user1.id)
 
 
     def test_create_without_name(self):
@@ -85,13 +89,13 @@ class ListCollectionCommonTests(BaseListCollectionSetup):
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        list_names = [l["name"] for l in response.data]
+        list_names = [l["name"] for l in response.data["results"]]
 
         self.assertIn(self.list_user1.name, list_names)
         self.assertIn(self.list_user2.name, list_names)
 
         list_user1_data = next(
-            (l for l in response.data if l["id"] == self.list_user1.id), None
+            (l for l in response.data["results"] if l["id"] == self.list_user1.id), None
         )
 
         self.assertIsNotNone(list_user1_data)
@@ -105,7 +109,7 @@ class ListCollectionCommonTests(BaseListCollectionSetup):
         self.client.force_authenticate(user=self.user2)
         response = self.client.get(self.list_collections_url)
         list_user1_data = next(
-            (l for l in response.data if l["id"] == self.list_user1.id), None
+            (l for l in response.data["results"] if l["id"] == self.list_user1.id), None
         )
         participants_field = list_user1_data["participants"]
 
@@ -133,7 +137,7 @@ class ListCollectionCommonTests(BaseListCollectionSetup):
         response = self.client.get(self.list_collections_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         list_user1_data = next(
-            (l for l in response.data if l["name"] == "Testliste"), None
+            (l for l in response.data["results"] if l["name"] == "Testliste"), None
         )
         self.assertIsNotNone(list_user1_data)
         self.assertEqual(list_user1_data["author"], self.user1.id)
@@ -331,4 +335,88 @@ class ListCollectionAuthorRemoveParticipantsTests(BaseListCollectionSetup):
         self.assertLessEqual(collection.created_at, timezone.now())
         self.assertLessEqual(collection.updated_at, timezone.now())
         delta = abs((collection.updated_at - collection.created_at).total_seconds())
-        self.assertLess(delta, 1, f"created_at and updated_at differ by {delta} seconds")
\ No newline at end of file
+        self.assertLess(delta, 1, f"created_at and updated_at differ by {delta} seconds")
+
+class ListCollectionExportTests(BaseListCollectionSetup):
+
+    def setUp(self):
+        super().setUp()
+        for name, amount in [("tomaten", 4), ("käse", 1)]:
+            ShoppingListItem.objects.create(
+                ingredient=Ingredient.objects.create(name=name), amount=amount, unit="Stück", shopping_list=self.list_user1
+            )
+        self.export_url_list_user1 = reverse("listcollection-export", args=[self.list_user1.id])
+
+    def test_participant_can_export_list_as_ndjson(self):
+        """
+        Ensures that the items of a list are streamed as one JSON object per line.
+        """
+        self.client.force_authenticate(user=self.user2)
+        response = self.client.get(self.export_url_list_user1)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson; charset=utf-8")
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row["ingredient"] for row in rows], ["Tomaten", "Käse"])
+        self.assertEqual(rows[0]["amount"], "4.00")
+
+    def test_author_can_export_list_as_csv(self):
+        """
+        Ensures that ?format=csv streams a CSV file with a header row.
+        """
+        self.client.force_authenticate(user=self.user1)
+        response = self.client.get(self.export_url_list_user1, {"format": "csv"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "id,ingredient,amount,unit,shopping_list")
+        self.assertEqual(lines[2].split(",")[1:], ["Käse", "1.00", "Stück", str(self.list_user1.id)])
+
+    def test_non_member_cannot_export_list(self):
+        """
+        Ensures that users who are neither author nor participant get a 404.
+        """
+        self.client.force_authenticate(user=self.user3)
+        response = self.client.get(self.export_url_list_user1)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ListCollectionConditionalGetTests(BaseListCollectionSetup):
+
+    def setUp(self):
+        super().setUp()
+        self.detail_url_list_user1 = reverse("listcollection-detail", args=[self.list_user1.id])
+
+    def test_detail_returns_304_until_an_item_changes(self):
+        """
+        Ensures that adding an item to a list invalidates the list's validators.
+        """
+        self.client.force_authenticate(user=self.user1)
+        ListCollection.objects.filter(pk=self.list_user1.pk).update(updated_at=timezone.now() - timedelta(minutes=5))
+        response = self.client.get(self.detail_url_list_user1)
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+
+        response = self.client.get(self.detail_url_list_user1, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        ShoppingListItem.objects.create(
+            ingredient=Ingredient.objects.create(name="milch"), amount=1, unit="l", shopping_list=self.list_user1
+        )
+        response = self.client.get(self.detail_url_list_user1, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_collection_etag_is_per_user(self):
+        """
+        Ensures that the list collection ETag changes when the user joins another list.
+        """
+        self.client.force_authenticate(user=self.user3)
+        etag = self.client.get(self.list_collections_url)["ETag"]
+        response = self.client.get(self.list_collections_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.list_user2.participants.add(self.user3)
+        response = self.client.get(self.list_collections_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 1)
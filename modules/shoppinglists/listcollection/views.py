@@ -7,9 +7,11 @@ from django.db import models
 from rest_framework.response import Response
 from rest_framework import status
 from django.contrib.auth import get_user_model
+from cookbook_and_shoppinglist.conditional import ConditionalGetMixin
+from cookbook_and_shoppinglist.export import EXPORT_CHUNK_SIZE, EXPORT_RENDERERS, streaming_export
 
 User = get_user_model()
-class ListCollectionView(viewsets.ModelViewSet):
+class ListCollectionView(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = ListCollection.objects.all()
     serializer_class = ListCollectionSerializer
     permission_classes = [IsAuthenticated]  # Nur authentifizierte User dürfen darauf zugreifen
@@ -21,6 +23,17 @@ class ListCollectionView(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    def get_list_validators(self):
+        """Version der Listen-Sammlung des Users: Anzahl + letzte Änderung."""
+        lists = self.get_queryset().aggregate(count=models.Count("id"), last_update=models.Max("updated_at"))
+        return f"{lists['count']}|{lists['last_update']}", None
+
+    def get_object_validators(self):
+        updated_at = self.get_queryset().filter(pk=self.kwargs["pk"]).values_list("updated_at", flat=True).first()
+        if updated_at is None:
+            return None
+        return updated_at.isoformat(), updated_at
+
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
         if not instance.can_delete(request.user):
@@ -97,4 +110,22 @@ class ListCollectionView(viewsets.ModelViewSet):
         return Response({"detail": "Participant removed successfully.",
                          "participant_id": user_to_remove.id},
                         status=status.HTTP_200_OK)
-    
\ No newline at end of file
+
+    @action(detail=True, methods=["get"], url_path="export", renderer_classes=EXPORT_RENDERERS)
+    def export(self, request, pk=None):
+        """Streamt die Einträge der Liste als NDJSON (Standard) oder CSV (?format=csv)."""
+        list_obj = self.get_object()
+        items = list_obj.items.select_related("ingredient").order_by("id")
+        rows = (
+            {
+                "id": item.id,
+                "ingredient": item.ingredient.name.capitalize(),
+                "amount": item.amount,
+                "unit": item.unit,
+                "shopping_list": list_obj.id,
+            }
+            for item in items.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+        return streaming_export(
+            request, rows, ["id", "ingredient", "amount", "unit", "shopping_list"], f"shoppinglist-{list_obj.id}"
+        )
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from .models import ShoppingListItem
-from modules.cookbook.ingredients.models import Ingredient
+from modules.cookbook.ingredients.utils import get_or_create_ingredient
 
 class ShoppingListItemSerializer(serializers.ModelSerializer):
     ingredient = serializers.CharField()
@@ -10,13 +10,12 @@ class ShoppingListItemSerializer(serializers.ModelSerializer):
         fields = ["id", "ingredient", "amount", "unit", "shopping_list"]
 
     def create(self, validated_data):
-        ingredient_name = validated_data["ingredient"].strip().lower()
         shopping_amount = validated_data["amount"]
         unit = validated_data["unit"]
         shopping_list = validated_data["shopping_list"]
 
         # Ingredient abrufen oder erstellen
-        ingredient, _ = Ingredient.objects.get_or_create(name=ingredient_name)
+        ingredient = get_or_create_ingredient(validated_data["ingredient"])
 
         # ShoppingListItem abrufen oder erstellen
         shopping_item, created = ShoppingListItem.objects.get_or_create(
@@ -36,9 +35,7 @@ class ShoppingListItemSerializer(serializers.ModelSerializer):
         """Beim Update Ingredient-String in Objekt umwandeln."""
         ingredient_name = validated_data.get("ingredient")
         if isinstance(ingredient_name, str):
-            ingredient_name = ingredient_name.strip().lower()
-            ingredient, _ = Ingredient.objects.get_or_create(name=ingredient_name)
-            instance.ingredient = ingredient
+            instance.ingredient = get_or_create_ingredient(ingredient_name)
         else:
             instance.ingredient = validated_data.get("ingredient", instance.ingredient)
 
@@ -80,9 +80,9 @@ class ShoppingListAuthTests(BaseShoppingListSetup):
         response = self.client.get(self.list_collections_url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["name"], self.list_user1.name)
-        self.assertEqual(response.data[0]["author"], self.user1.id)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["name"], self.list_user1.name)
+        self.assertEqual(response.data["results"][0]["author"], self.user1.id)
 
 
 class ShoppingListGetTests(BaseShoppingListSetup):
@@ -97,11 +97,11 @@ class ShoppingListGetTests(BaseShoppingListSetup):
         response = self.client.get(self.shopping_list_url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["ingredient"], self.shopping_list_list_user1.ingredient.name.capitalize())
-        self.assertEqual(response.data[0]["amount"], f"{self.shopping_list_list_user1.amount:.2f}")
-        self.assertEqual(response.data[0]["unit"], self.shopping_list_list_user1.unit)
-        self.assertEqual(response.data[0]["shopping_list"], self.shopping_list_list_user1.shopping_list.id)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["ingredient"], self.shopping_list_list_user1.ingredient.name.capitalize())
+        self.assertEqual(response.data["results"][0]["amount"], f"{self.shopping_list_list_user1.amount:.2f}")
+        self.assertEqual(response.data["results"][0]["unit"], self.shopping_list_list_user1.unit)
+        self.assertEqual(response.data["results"][0]["shopping_list"], self.shopping_list_list_user1.shopping_list.id)
 
 
     def test_user_sees_items_from_lists_in_which_he_is_a_participant(self):
@@ -112,9 +112,9 @@ class ShoppingListGetTests(BaseShoppingListSetup):
         response = self.client.get(self.shopping_list_url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data["results"]), 1)
         self.assertEqual(
-        response.data[0]["shopping_list"], self.list_user1.id
+        response.data["results"][0]["shopping_list"], self.list_user1.id
     )
 
 
@@ -127,7 +127,7 @@ class ShoppingListGetTests(BaseShoppingListSetup):
         response = self.client.get(self.shopping_list_url)
     
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 0)
+        self.assertEqual(len(response.data["results"]), 0)
 
 class ShoppingListPostTests(BaseShoppingListSetup):
     """